@@ -0,0 +1,124 @@
+import click
+import os
+import sys
+import tempfile
+from ..core.bench import (
+    BASELINE_FILE, SCALES, compare, load_baseline, measure, save_baseline, synthetic_project
+)
+from ..core.storage import clear_load_cache
+from ..core.test_generator import TestGenerator
+from .config import DEFAULT_CONFIG
+from .objectives import load_objectives, save_objectives
+from .user_stories import load_user_stories, save_user_stories
+from .design import build_design_context, load_design, refinement_context, save_design
+
+def write_project(scale, seed=0):
+    """Write a synthetic project of the given scale to the current directory"""
+    objectives_data, stories_data, design_data = synthetic_project(seed=seed, **SCALES[scale])
+    save_objectives(objectives_data)
+    save_user_stories(stories_data)
+    save_design(design_data)
+    return objectives_data, stories_data, design_data
+
+def bench_cases(objectives_data, stories_data, design_data):
+    """List (name, fn, setup) for every benchmarked path, run against files in the current directory"""
+    # A large budget keeps the design context on the full-text path, which needs no LLM
+    config = dict(DEFAULT_CONFIG, design_context_max_tokens=10 ** 9)
+    objectives_list = objectives_data['objectives']
+    user_stories_list = stories_data['user_stories']
+
+    def drop_retrieval_index():
+        clear_load_cache()
+        if os.path.exists('bob_retrieval_index.json'):
+            os.remove('bob_retrieval_index.json')
+
+    generator = TestGenerator(config)
+    return [
+        ("objectives.save", lambda: save_objectives(objectives_data), None),
+        ("objectives.load", load_objectives, clear_load_cache),
+        ("objectives.load_cached", load_objectives, None),
+        ("user_stories.save", lambda: save_user_stories(stories_data), None),
+        ("user_stories.load", load_user_stories, clear_load_cache),
+        ("design.save", lambda: save_design(design_data), None),
+        ("design.load", load_design, clear_load_cache),
+        ("design.context", lambda: build_design_context(objectives_list, user_stories_list, config, None, map_reduce=False), None),
+        ("design.refinement_context", lambda: refinement_context(objectives_list, user_stories_list, "add audit logging", config),
+         drop_retrieval_index),
+        ("test_generator.load_design", generator.load_design, None),
+        ("test_generator.test_prompt", lambda: generator.test_prompt(None), drop_retrieval_index),
+    ]
+
+@click.group()
+def bench():
+    """Benchmark storage and prompt building on synthetic projects (no LLM needed)"""
+    pass
+
+@bench.command()
+@click.option('--scale', type=click.Choice(list(SCALES)), default='small', help='Size of the synthetic project')
+@click.option('--repeat', default=3, help='Timed runs per case; the best is kept')
+@click.option('--only', multiple=True, help='Run only cases whose name starts with this (can be repeated)')
+@click.option('--baseline', 'baseline_path', default=BASELINE_FILE, type=click.Path(dir_okay=False),
+              help='Baseline file to compare with or save to')
+@click.option('--save-baseline', 'save', is_flag=True, help='Record the results as the baseline for this scale')
+@click.option('--check', is_flag=True, help='Exit with an error if any case regressed against the baseline')
+@click.option('--time-threshold', default=1.5, help='Slowdown factor that counts as a regression')
+@click.option('--memory-threshold', default=1.5, help='Peak memory growth factor that counts as a regression')
+@click.option('--memory/--no-memory', default=True, help='Also measure peak memory (much slower)')
+def run(scale, repeat, only, baseline_path, save, check, time_threshold, memory_threshold, memory):
+    """Time and memory-profile loading, saving and prompt building"""
+    baseline_path = os.path.abspath(baseline_path)
+    baseline = load_baseline(baseline_path).get(scale, {}).get('cases', {})
+    if check and not baseline:
+        click.echo(f"No {scale} baseline in {baseline_path}; run with --save-baseline first", err=True)
+        sys.exit(1)
+
+    sizes = ', '.join(f"{value} {name}" for name, value in SCALES[scale].items())
+    click.echo(f"Generating {scale} project ({sizes})...")
+    results = {}
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix='bob-bench-') as directory:
+        os.chdir(directory)
+        try:
+            data = write_project(scale)
+            for name, fn, setup in bench_cases(*data):
+                if only and not name.startswith(tuple(only)):
+                    continue
+                result = results[name] = measure(fn, setup, repeat, memory)
+                base = baseline.get(name)
+                peak = f"{result['peak_kb']:>9} KB" if result['peak_kb'] is not None else ''
+                vs = f"  (baseline {base['seconds']:.3f}s, {base['peak_kb']} KB)" if base else ''
+                click.echo(f"  {name:<30} {result['seconds']:>8.3f}s {peak}{vs}")
+        finally:
+            os.chdir(cwd)
+            clear_load_cache()
+
+    if save:
+        # Keep the recorded peak memory of cases that were only timed this run
+        for name, result in results.items():
+            if result['peak_kb'] is None and name in baseline:
+                result['peak_kb'] = baseline[name].get('peak_kb')
+        save_baseline(baseline_path, scale, dict(baseline, **results))
+        click.echo(f"Saved {scale} baseline to {baseline_path}")
+
+    regressions = compare(results, baseline, time_threshold, memory_threshold)
+    for regression in regressions:
+        click.echo(f"Regression: {regression}", err=True)
+    if check:
+        if regressions:
+            sys.exit(1)
+        click.echo("No regressions against the baseline")
+
+@bench.command()
+@click.argument('directory', type=click.Path(file_okay=False))
+@click.option('--scale', type=click.Choice(list(SCALES)), default='small', help='Size of the synthetic project')
+@click.option('--seed', default=0, help='Random seed for the generated content')
+def generate(directory, scale, seed):
+    """Write a synthetic project to DIRECTORY for manual profiling"""
+    os.makedirs(directory, exist_ok=True)
+    cwd = os.getcwd()
+    os.chdir(directory)
+    try:
+        write_project(scale, seed)
+    finally:
+        os.chdir(cwd)
+    click.echo(f"Wrote a {scale} synthetic project to {directory}")
@@ -1,8 +1,16 @@
 import click
+import json
 import logging
-from .config import load_config, DEFAULT_CONFIG
-from .chat import AIProvider
-from ..core.test_generator import TestGenerator
+import os
+import threading
+from .config import load_config, DEFAULT_CONFIG, DEFAULT_CONFIG_PATH
+from .chat import get_ai_provider
+from .llm_config import get_config_path
+from ..core.test_generator import TestGenerator, DESIGN_FILE
+from ..core.speculation import SpeculationStore
+from ..core.storage import replace_file, atomic_write
+from ..core.cancellation import CancelToken
+from ..core.watch import watch_files
 
 # Configure logging
 logging.basicConfig(
@@ -12,10 +20,139 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-@click.group()
-def build():
+def take_speculative(test_generator, kind, target, ai_provider, output_file):
+    """Move a result generated in the background by design --speculative into place.
+
+    Returns False if there is none for the current design.
+    """
+    store = SpeculationStore()
+    # Building the key means building the prompt, so skip it when nothing was speculated
+    if target or not os.path.exists(store.manifest_path):
+        return False
+    # Key on the project's latest design alone, as design --speculative keys its draft
+    latest = TestGenerator(test_generator.config, design={"designs": test_generator.design['designs'][-1:]})
+    key = latest.speculation_key(kind, target, ai_provider)
+    path = store.take(key, on_wait=lambda: click.echo("Waiting for the background generation to finish..."))
+    if not path:
+        return False
+    os.makedirs(os.path.dirname(os.path.abspath(output_file)), exist_ok=True)
+    replace_file(path, output_file)
+    return True
+
+BUILD_STATE_FILE = 'bob_build_state.json'
+
+# Artifacts kept up to date by build --watch: generator method and output path attribute
+WATCH_ARTIFACTS = {
+    'test': ('generate_test_code', 'test_file'),
+    'docs': ('generate_docs', 'docs_file'),
+}
+
+def load_build_state(path=BUILD_STATE_FILE):
+    """Load the prompt keys each artifact was last built from"""
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+class WatchBuilder:
+    """Regenerates artifacts whose prompt changed, cancelling generations made stale.
+
+    An artifact's key is the hash of its prompt and model (the same key
+    speculative results are stored under), so an edit to a part of the
+    design that an artifact does not use leaves it alone.
+    """
+
+    def __init__(self, kinds, state_path=BUILD_STATE_FILE):
+        self.kinds = kinds
+        self.state_path = state_path
+        self.built = load_build_state(state_path)
+        self.running = {}
+        self.lock = threading.Lock()
+
+    def refresh(self):
+        """Start regenerating every artifact that is out of date"""
+        try:
+            config = load_config() if os.path.exists(DEFAULT_CONFIG_PATH) else DEFAULT_CONFIG
+            test_generator = TestGenerator(config)
+            ai_provider = get_ai_provider()
+            keys = {kind: test_generator.speculation_key(kind, None, ai_provider) for kind in self.kinds}
+        except (Exception, click.Abort) as e:
+            # Most likely a file caught halfway through an edit; the next save retries
+            click.echo(f"Not rebuilding: {e}")
+            return
+
+        for kind, key in keys.items():
+            with self.lock:
+                current = self.running.get(kind)
+                if current and current['thread'].is_alive():
+                    if current['key'] == key:
+                        continue
+                    current['cancel'].cancel()
+                    click.echo(f"[{kind}] cancelled the outdated generation")
+                elif self.built.get(kind) == key:
+                    continue
+                click.echo(f"[{kind}] regenerating...")
+                self.start(kind, key, test_generator, ai_provider)
+
+    def start(self, kind, key, test_generator, ai_provider):
+        method, output = WATCH_ARTIFACTS[kind]
+        cancel = CancelToken()
+
+        def run():
+            try:
+                success = getattr(test_generator, method)(None, ai_provider, cancel=cancel)
+            except Exception as e:
+                if not cancel.cancelled:
+                    logger.error(f"Error during {kind} generation: {str(e)}")
+                    click.echo(f"[{kind}] failed: {e}")
+                return
+            if cancel.cancelled:
+                return
+            if not success:
+                click.echo(f"[{kind}] failed")
+                return
+            with self.lock:
+                self.built[kind] = key
+                atomic_write(self.state_path, json.dumps(self.built, indent=2))
+            click.echo(f"[{kind}] updated {os.path.normpath(getattr(test_generator, output))}")
+
+        thread = threading.Thread(target=run, daemon=True)
+        self.running[kind] = {"key": key, "cancel": cancel, "thread": thread}
+        thread.start()
+
+    def stop(self):
+        with self.lock:
+            for current in self.running.values():
+                current['cancel'].cancel()
+
+@click.group(invoke_without_command=True)
+@click.option('--watch', is_flag=True, help='Watch the project and regenerate tests and docs when the design changes')
+@click.option('--only', type=click.Choice(sorted(WATCH_ARTIFACTS)), multiple=True, help='Artifact to keep up to date with --watch (repeatable, default: all)')
+@click.option('--debounce', default=1.0, show_default=True, help='Seconds without edits before rebuilding')
+@click.option('--interval', default=0.5, show_default=True, help='Seconds between checks for changes')
+@click.pass_context
+def build(ctx, watch, only, debounce, interval):
     """Build commands"""
-    pass
+    if ctx.invoked_subcommand is not None:
+        return
+    if not watch:
+        click.echo(ctx.get_help())
+        return
+
+    builder = WatchBuilder(list(only) or list(WATCH_ARTIFACTS))
+    paths = [os.path.abspath(DESIGN_FILE), os.path.abspath(DEFAULT_CONFIG_PATH), os.path.normpath(get_config_path())]
+    click.echo(f"Watching {', '.join(paths)} (Ctrl-C to stop)")
+    builder.refresh()
+    try:
+        for changed in watch_files(paths, interval=interval, debounce=debounce):
+            logger.info(f"Changed: {', '.join(sorted(changed))}")
+            builder.refresh()
+    except KeyboardInterrupt:
+        builder.stop()
+        click.echo("\nStopped watching")
 
 @build.command()
 @click.argument('target', required=False)
@@ -34,7 +171,7 @@ def test(target, verbose):
 
     # Create AI provider
     logger.info("Initializing AI provider...")
-    ai_provider = AIProvider()
+    ai_provider = get_ai_provider()
     logger.debug(f"Using AI provider: {ai_provider.provider} with model: {ai_provider.model_name}")
     
     click.echo("Loading design ", nl=False)
@@ -43,6 +180,10 @@ def test(target, verbose):
         test_generator = TestGenerator(config)
         bar.update(1)
     
+    if take_speculative(test_generator, 'test', target, ai_provider, test_generator.test_file):
+        click.echo("Test code generated in the background was used")
+        return
+
     click.echo("Generating test code ", nl=False)
     with click.progressbar(length=1) as bar:
         try:
@@ -55,12 +196,13 @@ def test(target, verbose):
                 click.echo("\nTest code generated successfully!")
             else:
                 logger.error("Test code generation failed")
-                click.echo("\nFailed to generate test code")
                 
         except Exception as e:
             logger.error(f"Error during test generation: {str(e)}", exc_info=True)
-            click.echo(f"\nError: {str(e)}")
-            return
+            # A non-zero exit marks the stage failed for bob jobs and bob workspace
+            raise click.ClickException(str(e))
+        if not success:
+            raise click.ClickException("Failed to generate test code")
 
 @build.command()
 @click.argument('target', required=False)
@@ -79,7 +221,7 @@ def docs(target, verbose):
 
     # Create AI provider
     logger.info("Initializing AI provider...")
-    ai_provider = AIProvider()
+    ai_provider = get_ai_provider()
     logger.debug(f"Using AI provider: {ai_provider.provider} with model: {ai_provider.model_name}")
     
     click.echo("Loading design ", nl=False)
@@ -88,6 +230,10 @@ def docs(target, verbose):
         test_generator = TestGenerator(config)
         bar.update(1)
     
+    if take_speculative(test_generator, 'docs', target, ai_provider, test_generator.docs_file):
+        click.echo("Documentation generated in the background was used")
+        return
+
     click.echo("Generating documentation ", nl=False)
     with click.progressbar(length=1) as bar:
         try:
@@ -100,9 +246,39 @@ def docs(target, verbose):
                 click.echo("\nDocumentation generated successfully!")
             else:
                 logger.error("Documentation generation failed")
-                click.echo("\nFailed to generate documentation")
                 
         except Exception as e:
             logger.error(f"Error during documentation generation: {str(e)}", exc_info=True)
-            click.echo(f"\nError: {str(e)}")
-            return
\ No newline at end of file
+            # A non-zero exit marks the stage failed for bob jobs and bob workspace
+            raise click.ClickException(str(e))
+        if not success:
+            raise click.ClickException("Failed to generate documentation")
+
+@build.command()
+@click.argument('test_file', type=click.Path(exists=True, dir_okay=False), required=False)
+@click.option('--verbose', '-v', is_flag=True, help='Enable verbose logging')
+def repair(test_file, verbose):
+    """Repair syntax errors in generated test code without regenerating it"""
+    if verbose:
+        logger.setLevel(logging.DEBUG)
+    
+    try:
+        config = load_config()
+    except click.Abort:
+        logger.warning("Using default configuration")
+        config = DEFAULT_CONFIG
+
+    ai_provider = get_ai_provider()
+    test_generator = TestGenerator(config)
+    test_file = test_file or test_generator.test_file
+
+    try:
+        logger.info(f"Repairing {test_file}...")
+        count = test_generator.repair_test_file(test_file, ai_provider)
+        if count:
+            click.echo(f"Repaired {count} broken chunk(s) in {test_file}")
+        else:
+            click.echo(f"{test_file} has no syntax errors")
+    except Exception as e:
+        logger.error(f"Error during test repair: {str(e)}", exc_info=True)
+        raise click.ClickException(str(e))
@@ -1,13 +1,67 @@
+import asyncio
 import click
+import json
+import os
 import requests
-from .llm_config import load_llm_config
+import signal
+import sys
+import threading
+import time
+from contextlib import closing, nullcontext
+from .config import load_config, DEFAULT_CONFIG, DEFAULT_CONFIG_PATH
+from .llm_config import load_llm_config, resolve_route, DEFAULT_MAX_OUTPUT_TOKENS, DEFAULT_MAX_CONTINUATIONS
+from .client import PROVIDER_KEY_ENV
+from ..core.continuation import OVERLAP_WINDOW, continuation_delta, continuation_messages, continuation_prompt
+from ..core.rate_limit import RateLimiter, ConcurrencyLimiter, LLM_CONCURRENCY_ENV, LLM_SLOT_DIR_ENV
+from ..core.cancellation import CancelToken
+from ..core.streaming import StreamAborted
+from ..core.chat_sessions import ChatSession, list_sessions
+from ..core.summarize import estimate_tokens
+from ..core.context_window import context_sizes, size_context, DEFAULT_MIN_OUTPUT_TOKENS
+from ..core.endpoints import endpoint_pool, CONNECT_TIMEOUT, DEFAULT_HEALTH_INTERVAL, NODE_ERRORS, NODE_STATUS_CODES
+
+# How often a request rejected by the provider's rate limit is retried
+RATE_LIMIT_RETRIES = 3
+
+def is_rate_limited(error):
+    """Check whether an API error is a 429 rate limit response"""
+    response = getattr(error, 'response', None)
+    status = getattr(error, 'status_code', None) or getattr(response, 'status_code', None)
+    return status == 429
+
+def retry_after(error, attempt):
+    """Get how long to back off after a rate limit error"""
+    headers = getattr(getattr(error, 'response', None), 'headers', None) or {}
+    try:
+        return float(headers.get('retry-after'))
+    except (TypeError, ValueError):
+        return 2 ** attempt * 5
+
+# Providers are reused across commands in a long-lived process (see `bob serve`)
+# so SDK clients and their HTTP connection pools stay warm.
+_provider_cache = {}
+
+# Environment variables read when a provider is built; under `bob serve` they come from each client
+PROVIDER_ENV = (LLM_CONCURRENCY_ENV, LLM_SLOT_DIR_ENV) + PROVIDER_KEY_ENV
+
+def get_ai_provider(model_name=None, provider_name=None):
+    """Get an AIProvider for the current LLM configuration, reusing a cached one if possible"""
+    config_key = json.dumps([load_llm_config(), [os.environ.get(name) for name in PROVIDER_ENV]], sort_keys=True)
+    provider = _provider_cache.get((config_key, model_name, provider_name))
+    if provider is None:
+        # Drop providers built from an older configuration
+        for key in [key for key in _provider_cache if key[0] != config_key]:
+            del _provider_cache[key]
+        provider = AIProvider(model_name, provider_name)
+        _provider_cache[(config_key, model_name, provider_name)] = provider
+    return provider
 
 class AIProvider:
-    def __init__(self, model_name=None):
+    def __init__(self, model_name=None, provider_name=None):
         self.llm_config = load_llm_config()
         
         # Get provider from config
-        self.provider = self.llm_config.get('ai_provider', 'openai')
+        self.provider = provider_name or self.llm_config.get('ai_provider', 'openai')
         
         # Get provider-specific configuration
         provider_config = self.llm_config.get('providers', {}).get(self.provider, {})
@@ -15,9 +69,28 @@ class AIProvider:
         
         # Use passed model_name if provided, otherwise use from config
         self.model_name = model_name or provider_config.get('model')
+        # A provider built for an explicit model serves every task itself;
+        # otherwise tasks follow the routing profile in llm_config.json
+        self.routing = model_name is None
+        
+        # Client-side rate limiting shared across bob processes
+        self.rate_limiter = RateLimiter.from_config(self.provider, provider_config)
+        # Cap on requests in flight, set when running under `bob workspace run`
+        self.concurrency_limiter = ConcurrencyLimiter.from_env()
         
         if self.provider == 'ollama':
             self.ollama_base_url = provider_config.get('ollama_base_url', 'http://localhost:11434')
+            # Requests are balanced over ollama_endpoints when it lists several servers
+            self.endpoints = endpoint_pool(
+                provider_config.get('ollama_endpoints') or [self.ollama_base_url],
+                provider_config.get('health_check_interval', DEFAULT_HEALTH_INTERVAL)
+            )
+            self.context_sizes = context_sizes(provider_config.get('context_sizes'))
+            try:
+                self.min_output_tokens = int(provider_config.get('min_output_tokens') or DEFAULT_MIN_OUTPUT_TOKENS)
+            except (TypeError, ValueError):
+                self.min_output_tokens = DEFAULT_MIN_OUTPUT_TOKENS
+            self.session = requests.Session()
         elif self.provider == 'openai':
             from openai import OpenAI
             self.client = OpenAI(api_key=self.api_key)
@@ -32,7 +105,13 @@ class AIProvider:
         """List available models from provider"""
         try:
             if self.provider == 'ollama':
-                response = requests.get(f"{self.ollama_base_url}/api/tags")
+                endpoint = self.endpoints.acquire(self.model_name)
+                try:
+                    response = self.session.get(f"{endpoint.url}/api/tags", timeout=(CONNECT_TIMEOUT, None))
+                except NODE_ERRORS:
+                    self.endpoints.release(endpoint, failed=True)
+                    raise
+                self.endpoints.release(endpoint)
                 response.raise_for_status()
                 return response.json().get('models', [])
             # Add model listing for other providers if needed
@@ -43,67 +122,499 @@ class AIProvider:
                 click.echo(f"Response details: {e.response.text}")
             return []
 
-    def get_response(self, prompt):
-        """Get response from AI model"""
+    def output_tokens(self, task=None):
+        """Get the output token limit for a task type from llm_config.json"""
+        limits = self.llm_config.get('max_output_tokens', {})
+        for value in (limits.get(task), limits.get('default')):
+            try:
+                if value and int(value) > 0:
+                    return int(value)
+            except (TypeError, ValueError):
+                pass
+        return DEFAULT_MAX_OUTPUT_TOKENS
+
+    @property
+    def max_continuations(self):
+        try:
+            return max(0, int(self.llm_config.get('max_continuations', DEFAULT_MAX_CONTINUATIONS)))
+        except (TypeError, ValueError):
+            return DEFAULT_MAX_CONTINUATIONS
+
+    def for_task(self, task):
+        """Get the provider that serves a task type under the active routing profile"""
+        if not self.routing or task is None:
+            return self
+        provider, model = resolve_route(self.llm_config, task)
+        if provider == self.provider and model == self.model_name:
+            return self
+        return get_ai_provider(model, provider)
+
+    def get_response(self, prompt, task=None):
+        """Get response from AI model.
+
+        The request goes to the provider and model routed for task. If the
+        model stops at the output limit, it is asked to continue where it
+        stopped and the pieces are joined, up to max_continuations times.
+        """
+        routed = self.for_task(task)
+        if routed is not self:
+            return routed.get_response(prompt, task)
+        max_tokens = self.output_tokens(task)
+        text, truncated = self._request(prompt, max_tokens)
+        continuations = 0
+        while truncated and text and continuations < self.max_continuations:
+            continuations += 1
+            more, truncated = self._request(prompt, max_tokens, partial=text)
+            if not more:
+                break
+            text += continuation_delta(text, more)
+        if truncated:
+            click.echo(f"Warning: response was cut off at the output limit ({max_tokens} tokens)", err=True)
+        return text
+
+    def _request(self, prompt, max_tokens, partial=None):
+        """Send one request with rate limiting and retries. Returns (text, truncated)"""
+        for attempt in range(RATE_LIMIT_RETRIES + 1):
+            if self.rate_limiter:
+                self.rate_limiter.acquire(estimate_tokens(prompt + (partial or '')))
+            with self._request_slot():
+                result = self._get_response(prompt, max_tokens, partial, attempt)
+            if result is not None:
+                if self.rate_limiter and result[0]:
+                    self.rate_limiter.settle(estimate_tokens(result[0]))
+                return result
+        return "", False
+
+    def _get_response(self, prompt, max_tokens, partial=None, attempt=RATE_LIMIT_RETRIES):
+        """Send one request. Returns (text, truncated), or None if it was rate limited and should be retried"""
         try:
             if self.provider == 'ollama':
-                response = requests.post(
-                    f"{self.ollama_base_url}/api/generate",
-                    json={
-                        "model": self.model_name,
-                        "prompt": prompt,
-                        "stream": False,
-                        "options": {
-                            "temperature": 0.7
-                        }
-                    }
-                )
-                response.raise_for_status()
-                return response.json().get('response', '')
+                endpoint, response = self._ollama_post(self._ollama_request(
+                    continuation_prompt(prompt, partial) if partial else prompt, max_tokens, stream=False
+                ))
+                failed = False
+                try:
+                    response.raise_for_status()
+                    data = response.json()
+                except NODE_ERRORS:
+                    failed = True
+                    raise
+                finally:
+                    self.endpoints.release(endpoint, self.model_name if response.ok else None, failed)
+                return data.get('response', ''), data.get('done_reason') == 'length'
                 
-            elif self.provider == 'openai':
+            elif self.provider in ('openai', 'groq'):
                 completion = self.client.chat.completions.create(
                     model=self.model_name,
-                    messages=[{"role": "user", "content": prompt}]
+                    messages=self._messages(prompt, partial),
+                    max_tokens=max_tokens
                 )
-                return completion.choices[0].message.content
+                choice = completion.choices[0]
+                return choice.message.content or '', choice.finish_reason == 'length'
                 
             elif self.provider == 'anthropic':
                 message = self.client.messages.create(
                     model=self.model_name,
-                    max_tokens=1000,
-                    messages=[{"role": "user", "content": prompt}]
+                    max_tokens=max_tokens,
+                    messages=self._messages(prompt, partial)
                 )
-                return message.content
-                
-            elif self.provider == 'groq':
-                chat_completion = self.client.chat.completions.create(
-                    messages=[{"role": "user", "content": prompt}],
-                    model=self.model_name,
-                )
-                return chat_completion.choices[0].message.content
+                text = ''.join(block.text for block in message.content if getattr(block, 'type', None) == 'text')
+                return text, message.stop_reason == 'max_tokens'
                 
             else:
                 click.echo(f"Unsupported AI provider: {self.provider}")
-                return ""
+                return "", False
                 
-        except requests.exceptions.RequestException as e:
-            click.echo(f"API Error: {str(e)}")
-            if hasattr(e.response, 'text'):
-                click.echo(f"Response details: {e.response.text}")
-            return ""
         except Exception as e:
-            click.echo(f"Error: {str(e)}")
-            return ""
+            if attempt < RATE_LIMIT_RETRIES and is_rate_limited(e):
+                self._back_off(e, attempt)
+                return None
+            if isinstance(e, requests.exceptions.RequestException):
+                click.echo(f"API Error: {str(e)}")
+                if hasattr(e.response, 'text'):
+                    click.echo(f"Response details: {e.response.text}")
+            else:
+                click.echo(f"Error: {str(e)}")
+            return "", False
+
+    def _ollama_post(self, body, stream=False):
+        """POST a generate request to the least busy healthy Ollama endpoint.
+
+        A node that cannot be reached or answers that it is down (502, 503,
+        504) is ejected and the request goes to the next one. Returns
+        (endpoint, response); the caller releases the endpoint when done with it.
+        """
+        tried = []
+        while True:
+            endpoint = self.endpoints.acquire(self.model_name, exclude=tried)
+            try:
+                response = self.session.post(
+                    f"{endpoint.url}/api/generate", json=body, stream=stream, timeout=(CONNECT_TIMEOUT, None)
+                )
+                if response.status_code not in NODE_STATUS_CODES:
+                    return endpoint, response
+                error = requests.HTTPError(f"{response.status_code} Server Error from {endpoint.url}", response=response)
+            except NODE_ERRORS as e:
+                error = e
+            except BaseException:
+                self.endpoints.release(endpoint)
+                raise
+            self.endpoints.release(endpoint, failed=True)
+            tried.append(endpoint)
+            if len(tried) >= len(self.endpoints):
+                raise error
+            click.echo(f"Ollama endpoint {endpoint.url} failed ({error}); trying another", err=True)
+
+    def _ollama_request(self, prompt, max_tokens, stream):
+        """Build an Ollama generate request with num_ctx and num_predict sized to the prompt"""
+        num_ctx, num_predict, fits = size_context(prompt, max_tokens, self.context_sizes, self.min_output_tokens)
+        if not fits:
+            click.echo(f"Warning: prompt is larger than the largest context size ({num_ctx} tokens) "
+                       "and will be truncated; add a larger size to context_sizes in llm_config.json", err=True)
+        return {
+            "model": self.model_name,
+            "prompt": prompt,
+            "stream": stream,
+            "options": {
+                "temperature": 0.7,
+                "num_ctx": num_ctx,
+                "num_predict": num_predict
+            }
+        }
+
+    def _messages(self, prompt, partial=None):
+        if partial:
+            # Anthropic continues a prefilled assistant turn directly
+            return continuation_messages(prompt, partial, prefill=self.provider == 'anthropic')
+        return [{"role": "user", "content": prompt}]
+
+    def _request_slot(self):
+        return self.concurrency_limiter.hold() if self.concurrency_limiter else nullcontext()
+
+    def _back_off(self, error, attempt):
+        """Wait out a provider rate limit, holding other bob processes back as well"""
+        seconds = retry_after(error, attempt)
+        click.echo(f"Rate limited by {self.provider}; retrying in {seconds:.0f}s", err=True)
+        if self.rate_limiter:
+            self.rate_limiter.penalize(seconds)
+        else:
+            time.sleep(seconds)
+
+    def stream_response(self, prompt, task=None, cancel=None):
+        """Stream a response from the AI model as text chunks.
+
+        Requests are routed and truncated responses are continued as in
+        get_response. Closing the generator early aborts the underlying
+        request, as does cancelling cancel (a CancelToken) from another thread.
+        """
+        routed = self.for_task(task)
+        if routed is not self:
+            with closing(routed.stream_response(prompt, task, cancel)) as chunks:
+                yield from chunks
+            return
+        max_tokens = self.output_tokens(task)
+        finish = {}
+        text = ''
+        with closing(self._stream_request(prompt, max_tokens, None, finish, cancel)) as chunks:
+            for chunk in chunks:
+                text += chunk
+                yield chunk
+
+        continuations = 0
+        while finish.get('truncated') and text and continuations < self.max_continuations:
+            if cancel and cancel.cancelled:
+                return
+            continuations += 1
+            finish = {}
+            # Hold back the start of the continuation until its overlap with
+            # the text so far can be judged
+            pending = ''
+            joined = False
+            with closing(self._stream_request(prompt, max_tokens, text, finish, cancel)) as chunks:
+                for chunk in chunks:
+                    if joined:
+                        text += chunk
+                        yield chunk
+                        continue
+                    pending += chunk
+                    if len(pending) >= OVERLAP_WINDOW:
+                        delta = continuation_delta(text, pending)
+                        text += delta
+                        joined = True
+                        if delta:
+                            yield delta
+            if not joined:
+                if not pending:
+                    break
+                delta = continuation_delta(text, pending)
+                text += delta
+                if delta:
+                    yield delta
+
+        if finish.get('truncated') and not (cancel and cancel.cancelled):
+            click.echo(f"Warning: response was cut off at the output limit ({max_tokens} tokens)", err=True)
+
+    def _stream_request(self, prompt, max_tokens, partial, finish, cancel=None):
+        """Stream one request with rate limiting; sets finish['truncated'] when the output limit was hit"""
+        if self.rate_limiter:
+            self.rate_limiter.acquire(estimate_tokens(prompt + (partial or '')))
+        received = []
+        chunks = self._stream_response(prompt, max_tokens, partial, finish, cancel)
+        try:
+            with self._request_slot():
+                for chunk in chunks:
+                    received.append(chunk)
+                    yield chunk
+        finally:
+            chunks.close()
+            if self.rate_limiter:
+                self.rate_limiter.settle(estimate_tokens(''.join(received)))
+
+    def _stream_response(self, prompt, max_tokens, partial, finish, cancel=None):
+        # Closing the response from the cancelling thread unblocks a pending read
+        unregister = lambda: None
+        try:
+            if self.provider == 'ollama':
+                endpoint, response = self._ollama_post(self._ollama_request(
+                    continuation_prompt(prompt, partial) if partial else prompt, max_tokens, stream=True
+                ), stream=True)
+                if cancel:
+                    unregister = cancel.on_cancel(response.close)
+                failed = False
+                try:
+                    response.raise_for_status()
+                    for line in response.iter_lines():
+                        if not line:
+                            continue
+                        chunk = json.loads(line)
+                        if chunk.get('response'):
+                            yield chunk['response']
+                        if chunk.get('done'):
+                            finish['truncated'] = chunk.get('done_reason') == 'length'
+                            break
+                except NODE_ERRORS:
+                    # A response closed by cancelling is not the node's fault
+                    failed = not (cancel and cancel.cancelled)
+                    raise
+                finally:
+                    response.close()
+                    self.endpoints.release(endpoint, self.model_name if response.ok else None, failed)
+
+            elif self.provider in ('openai', 'groq'):
+                stream = self.client.chat.completions.create(
+                    model=self.model_name,
+                    messages=self._messages(prompt, partial),
+                    max_tokens=max_tokens,
+                    stream=True
+                )
+                if cancel and hasattr(stream, 'close'):
+                    unregister = cancel.on_cancel(stream.close)
+                try:
+                    for chunk in stream:
+                        if not chunk.choices:
+                            continue
+                        if chunk.choices[0].delta.content:
+                            yield chunk.choices[0].delta.content
+                        if chunk.choices[0].finish_reason:
+                            finish['truncated'] = chunk.choices[0].finish_reason == 'length'
+                finally:
+                    if hasattr(stream, 'close'):
+                        stream.close()
+
+            elif self.provider == 'anthropic':
+                with self.client.messages.stream(
+                    model=self.model_name,
+                    max_tokens=max_tokens,
+                    messages=self._messages(prompt, partial)
+                ) as stream:
+                    if cancel:
+                        unregister = cancel.on_cancel(stream.close)
+                    for text in stream.text_stream:
+                        yield text
+                    finish['truncated'] = stream.get_final_message().stop_reason == 'max_tokens'
+
+            else:
+                raise StreamAborted(f"Unsupported AI provider: {self.provider}")
+
+        except StreamAborted:
+            raise
+        except Exception as e:
+            if cancel and cancel.cancelled:
+                # The error comes from aborting the request
+                return
+            # Raised rather than ending the stream, so output cut short is never taken as complete
+            if isinstance(e, requests.exceptions.RequestException):
+                details = getattr(e.response, 'text', None)
+                raise StreamAborted(f"API Error: {str(e)}" + (f" ({details})" if details else "")) from e
+            raise StreamAborted(f"Error: {str(e)}") from e
+        finally:
+            unregister()
+
+STOP_COMMAND = '/stop'
+EXIT_COMMANDS = ('exit', 'quit')
+
+def _read_lines(loop, lines):
+    """Feed lines typed on stdin to an asyncio queue until end of input"""
+    try:
+        try:
+            for line in iter(sys.stdin.readline, ''):
+                loop.call_soon_threadsafe(lines.put_nowait, line.rstrip('\n'))
+        finally:
+            loop.call_soon_threadsafe(lines.put_nowait, None)
+    except RuntimeError:
+        # The chat ended, closing its loop, while this was waiting for input
+        pass
+
+async def _stream_reply(ai_provider, message, cancel, session=None, context_tokens=None, received=None):
+    """Print a streamed reply as it arrives. The request runs in a thread so the loop stays responsive"""
+    loop = asyncio.get_running_loop()
+    chunks = asyncio.Queue()
+
+    def produce():
+        try:
+            # Building a session prompt may summarize older turns, so it runs here too
+            prompt = session.prompt(ai_provider, message, context_tokens) if session else message
+            with closing(ai_provider.stream_response(prompt, task='chat', cancel=cancel)) as stream:
+                for chunk in stream:
+                    if cancel.cancelled:
+                        break
+                    loop.call_soon_threadsafe(chunks.put_nowait, chunk)
+        except StreamAborted as e:
+            loop.call_soon_threadsafe(chunks.put_nowait, StreamAborted(str(e)))
+        finally:
+            loop.call_soon_threadsafe(chunks.put_nowait, None)
+
+    # A daemon thread, so a request that is slow to abort never holds up exiting
+    threading.Thread(target=produce, daemon=True).start()
+    click.echo("\nAI> ", nl=False)
+    while True:
+        chunk = await chunks.get()
+        if chunk is None:
+            break
+        if isinstance(chunk, StreamAborted):
+            click.echo(f"\n{chunk}", err=True)
+            continue
+        if received is not None:
+            received.append(chunk)
+        click.echo(chunk, nl=False)
+    click.echo()
+
+async def interactive_chat(ai_provider, session=None, context_tokens=None):
+    """Chat until exit or end of input.
+
+    Replies stream while the next message can already be typed; messages
+    sent during a reply are answered in turn. Ctrl-C or /stop cancels the
+    reply in progress (aborting its request) without ending the session.
+    With a session, every exchange is appended to its log and sent as
+    context with later messages.
+    """
+    loop = asyncio.get_running_loop()
+    lines = asyncio.Queue()
+    messages = asyncio.Queue()
+    state = {"reply": None, "cancel": None, "interrupted": False}
+
+    def stop_reply():
+        reply = state['reply']
+        if reply is None or reply.done():
+            return False
+        state['cancel'].cancel()
+        reply.cancel()
+        return True
+
+    def interrupt():
+        if stop_reply():
+            state['interrupted'] = False
+        elif state['interrupted']:
+            # Ctrl-C twice with nothing running ends the session
+            lines.put_nowait(None)
+        else:
+            state['interrupted'] = True
+            click.echo(f"\n(Type '{EXIT_COMMANDS[0]}' or press Ctrl-C again to quit)")
+
+    async def respond():
+        while True:
+            message = await messages.get()
+            state['cancel'] = CancelToken()
+            received = []
+            state['reply'] = asyncio.ensure_future(
+                _stream_reply(ai_provider, message, state['cancel'], session, context_tokens, received)
+            )
+            # wait() rather than await, so cancelling the reply does not cancel this loop
+            await asyncio.wait([state['reply']])
+            stopped = state['reply'].cancelled()
+            if stopped:
+                click.echo("\n[stopped]")
+            # A reply that failed or was stopped before any text arrived is not saved
+            if session and received:
+                session.append('user', message)
+                session.append('assistant', ''.join(received), **({"stopped": True} if stopped else {}))
+            state['reply'] = None
+            if messages.empty():
+                click.echo("\nYou> ", nl=False)
+
+    # Signal handlers can only be installed from the main thread; elsewhere /stop still works
+    previous_handler = None
+    if threading.current_thread() is threading.main_thread():
+        previous_handler = signal.signal(signal.SIGINT, lambda signum, frame: loop.call_soon_threadsafe(interrupt))
+    threading.Thread(target=_read_lines, args=(loop, lines), daemon=True).start()
+    responder = asyncio.ensure_future(respond())
+    click.echo("\nYou> ", nl=False)
+    try:
+        while True:
+            line = await lines.get()
+            if line is None:
+                # End of input: let the replies already asked for finish
+                while state['reply'] is not None or not messages.empty():
+                    await asyncio.sleep(0.05)
+                break
+            text = line.strip()
+            state['interrupted'] = False
+            if not text:
+                continue
+            if text.lower() in EXIT_COMMANDS:
+                stop_reply()
+                break
+            if text == STOP_COMMAND:
+                if not stop_reply():
+                    click.echo("Nothing to stop")
+                continue
+            messages.put_nowait(text)
+    finally:
+        stop_reply()
+        responder.cancel()
+        if previous_handler is not None:
+            signal.signal(signal.SIGINT, previous_handler)
+    click.echo("\nEnding chat session.")
+
+def show_sessions():
+    sessions = list_sessions()
+    if not sessions:
+        click.echo("No saved chat sessions.")
+        return
+    for session in sessions:
+        first = session['first_message'].splitlines()[0][:60] if session['first_message'] else ''
+        click.echo(f"{session['id']}  {session['updated_at']}  {session['size'] // 1024:>6} KB  {first}")
 
 @click.command()
 @click.argument('message', required=False)
 @click.option('--list-models', is_flag=True, help='List available models')
-def chat(message, list_models):
-    """Chat with AI assistant. If no message is provided, starts interactive mode."""
-    ai_provider = AIProvider()
-    provider_config = ai_provider.llm_config.get('providers', {}).get(ai_provider.provider, {})
-    model_name = provider_config.get('model', 'unknown')
+@click.option('--list', 'list_sessions_flag', is_flag=True, help='List saved chat sessions')
+@click.option('--resume', 'resume_id', help='Continue a saved session (ID or unique ID prefix)')
+@click.option('--no-save', is_flag=True, help='Do not save this interactive session')
+def chat(message, list_models, list_sessions_flag, resume_id, no_save):
+    """Chat with AI assistant. If no message is provided, starts interactive mode.
+
+    Interactive sessions are saved under ~/.bob/chat_sessions/, wherever
+    chat is run, and can be continued with --resume; a MESSAGE with
+    --resume is added to that session.
+    """
+    if list_sessions_flag:
+        show_sessions()
+        return
+
+    ai_provider = get_ai_provider()
+    chat_provider = ai_provider.for_task('chat')
+    model_name = chat_provider.model_name or 'unknown'
     
     if list_models:
         models = ai_provider.list_models()
@@ -114,29 +625,44 @@ def chat(message, list_models):
         else:
             click.echo("No models available or unable to fetch models")
         return
+
+    # Chat also works outside a bob project, where there is no bob_config.json
+    config = DEFAULT_CONFIG
+    if os.path.exists(DEFAULT_CONFIG_PATH):
+        try:
+            config = load_config()
+        except click.Abort:
+            pass
+    context_tokens = config.get('chat_context_tokens', DEFAULT_CONFIG['chat_context_tokens'])
+
+    session = None
+    if resume_id:
+        try:
+            session = ChatSession.find(resume_id)
+        except KeyError as e:
+            click.echo(f"Error: {e.args[0]}", err=True)
+            return
     
     if message:
         # Single message mode
-        response = ai_provider.get_response(message)
+        prompt = session.prompt(ai_provider, message, context_tokens) if session else message
+        response = ai_provider.get_response(prompt, task='chat')
         click.echo(response)
+        if session and response:
+            session.append('user', message)
+            session.append('assistant', response)
     else:
         # Interactive mode
-        click.echo(f"Starting chat with {model_name} ({ai_provider.provider})")
-        click.echo("Type 'exit' or 'quit' to end")
+        click.echo(f"Starting chat with {model_name} ({chat_provider.provider})")
+        if session:
+            # Only the tail of the log is read; older turns come from the cached summary
+            for turn in session.load(context_tokens)[-6:]:
+                speaker = 'You' if turn['role'] == 'user' else 'AI'
+                click.echo(f"{speaker}> {turn['content']}")
+            click.echo(f"Resumed session {session.id}")
+        elif not no_save:
+            session = ChatSession.create()
+            click.echo(f"Session {session.id} (continue later with: bob chat --resume {session.id})")
+        click.echo(f"Type 'exit' or 'quit' to end, '{STOP_COMMAND}' or Ctrl-C to stop a reply")
         click.echo("----------------------------------------")
-        
-        while True:
-            # Get user input
-            message = click.prompt("\nYou", prompt_suffix="> ")
-            
-            # Check for exit command
-            if message.lower() in ['exit', 'quit']:
-                click.echo("\nEnding chat session.")
-                break
-                
-            # Get and display AI response
-            click.echo("\nAI", nl=False)
-            with click.progressbar(length=1, label='thinking') as bar:
-                response = ai_provider.get_response(message)
-                bar.update(1)
-            click.echo("> " + response)
\ No newline at end of file
+        asyncio.run(interactive_chat(ai_provider, session, context_tokens))
@@ -0,0 +1,156 @@
+# bob/cli/client.py
+#
+# Thin entry point for the `bob` command. When a `bob serve` daemon is
+# listening it forwards the invocation over a Unix socket, otherwise it falls
+# back to running the CLI in-process. Keep the imports here to the standard
+# library so that forwarding stays cheap.
+
+import json
+import os
+import socket
+import sys
+
+SOCKET_ENV = 'BOB_SOCKET'
+NO_DAEMON_ENV = 'BOB_NO_DAEMON'
+
+# Commands that must never be forwarded to the daemon
+LOCAL_COMMANDS = ['serve']
+
+# Commands that run until stopped stay local too: they gain nothing from the
+# daemon's warm start and would keep one of its processes busy meanwhile.
+# Each entry is (command prefix, options that make it long-running or () for always).
+LONG_RUNNING_COMMANDS = [
+    (['jobs', 'work'], ()),
+    (['jobs', 'wait'], ()),
+    (['jobs', 'logs'], ('--follow', '-f')),
+    (['build'], ('--watch',)),
+]
+
+# Exit status of a command stopped with Ctrl-C
+INTERRUPTED_EXIT = 130
+
+# Environment a forwarded command gets from the caller: bob's own settings
+# and the provider SDKs' API keys. Everything else is the daemon's.
+FORWARDED_ENV_PREFIX = 'BOB_'
+PROVIDER_KEY_ENV = ('OPENAI_API_KEY', 'ANTHROPIC_API_KEY', 'GROQ_API_KEY')
+
+def is_forwarded_env(name):
+    return name.startswith(FORWARDED_ENV_PREFIX) or name in PROVIDER_KEY_ENV
+
+def is_interactive_chat(args):
+    """Check whether chat arguments start an interactive session (no MESSAGE, nothing to list)"""
+    args = iter(args)
+    for arg in args:
+        if arg == '--resume':
+            next(args, None)
+        elif arg in ('--list', '--list-models', '--help'):
+            return False
+        elif not arg.startswith('-'):
+            return False
+    return True
+
+def runs_locally(argv):
+    """Check whether a command line must run in-process instead of on the daemon"""
+    if argv[0] in LOCAL_COMMANDS:
+        return True
+    # Interactive chat reads stdin while replies stream and handles Ctrl-C itself
+    if argv[0] == 'chat' and is_interactive_chat(argv[1:]):
+        return True
+    for prefix, options in LONG_RUNNING_COMMANDS:
+        if argv[:len(prefix)] == prefix and (not options or any(arg in options for arg in argv[len(prefix):])):
+            return True
+    return False
+
+def default_socket_path():
+    """Get the path of the daemon's Unix socket"""
+    return os.environ.get(SOCKET_ENV) or os.path.join(os.path.expanduser('~'), '.bob', 'bob.sock')
+
+def send_message(wfile, message):
+    """Write one newline-delimited JSON message"""
+    wfile.write(json.dumps(message).encode('utf-8') + b'\n')
+    wfile.flush()
+
+def read_message(rfile):
+    """Read one newline-delimited JSON message, or None at end of stream"""
+    line = rfile.readline()
+    if not line:
+        return None
+    return json.loads(line.decode('utf-8'))
+
+def connect(socket_path=None):
+    """Connect to a running daemon, returning None if there is none"""
+    if not hasattr(socket, 'AF_UNIX'):
+        return None
+    socket_path = socket_path or default_socket_path()
+    if not os.path.exists(socket_path):
+        return None
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(socket_path)
+    except OSError:
+        sock.close()
+        return None
+    return sock
+
+def forward(argv, socket_path=None):
+    """Run argv on the daemon and relay its I/O.
+
+    The command runs in this process's cwd, with its bob settings and
+    API keys from the environment (see is_forwarded_env). Ctrl-C
+    interrupts it on the daemon; a second Ctrl-C gives up waiting for it.
+    Returns the command's exit code, or None if no daemon is reachable and
+    the command should run in-process instead.
+    """
+    sock = connect(socket_path)
+    if sock is None:
+        return None
+
+    with sock:
+        rfile = sock.makefile('rb')
+        wfile = sock.makefile('wb')
+        try:
+            send_message(wfile, {"argv": argv, "cwd": os.getcwd(), "env": {
+                name: value for name, value in os.environ.items() if is_forwarded_env(name)
+            }})
+        except OSError:
+            return None
+
+        interrupted = False
+        while True:
+            try:
+                message = read_message(rfile)
+                if message is None:
+                    sys.stderr.write("Error: lost connection to bob daemon\n")
+                    return 1
+
+                if 'data' in message:
+                    stream = sys.stderr if message.get('stream') == 'stderr' else sys.stdout
+                    stream.write(message['data'])
+                    stream.flush()
+                elif message.get('input'):
+                    line = sys.stdin.readline()
+                    send_message(wfile, {"line": line} if line else {"eof": True})
+                elif 'exit' in message:
+                    return message['exit']
+            except KeyboardInterrupt:
+                if interrupted:
+                    return INTERRUPTED_EXIT
+                interrupted = True
+                try:
+                    send_message(wfile, {"interrupt": True})
+                except OSError:
+                    return INTERRUPTED_EXIT
+            except OSError:
+                sys.stderr.write("Error: lost connection to bob daemon\n")
+                return 1
+
+def main():
+    """Console script entry point"""
+    argv = sys.argv[1:]
+    if argv[:1] and not runs_locally(argv) and not os.environ.get(NO_DAEMON_ENV):
+        code = forward(argv)
+        if code is not None:
+            sys.exit(code)
+
+    from .main import cli
+    cli(prog_name='bob')
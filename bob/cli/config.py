@@ -1,12 +1,24 @@
 import os
 import json
 import click
+from ..core.storage import atomic_write, file_lock, locked_update
 
 DEFAULT_CONFIG_PATH = 'bob_config.json'
 
 DEFAULT_CONFIG = {
-    "ai_model": "chatgpt",
-    "max_test_retries": 3
+    "max_test_retries": 3,
+    "job_concurrency": 2,
+    "design_context_max_tokens": 8000,
+    "summary_chunk_tokens": 2000,
+    "summary_workers": 4,
+    "retrieval_top_k": 8,
+    "dedup_threshold": 0.8,
+    "speculative": False,
+    "refine_mode": "patch",
+    "story_fan_out_threshold": 30,
+    "story_cluster_size": 5,
+    "story_workers": 4,
+    "chat_context_tokens": 4000
 }
 
 def load_config():
@@ -30,12 +42,16 @@ def load_config():
 def save_config(config):
     """Save configuration to bob_config.json"""
     try:
-        with open(DEFAULT_CONFIG_PATH, 'w') as f:
-            json.dump(config, f, indent=4)
+        with file_lock(DEFAULT_CONFIG_PATH):
+            atomic_write(DEFAULT_CONFIG_PATH, json.dumps(config, indent=4))
     except Exception as e:
         click.echo(f"Error saving configuration: {str(e)}", err=True)
         raise click.Abort()
 
+def update_config(mutate):
+    """Apply mutate to the latest configuration on disk and save it under the file lock"""
+    return locked_update(DEFAULT_CONFIG_PATH, load_config, save_config, mutate)
+
 @click.group()
 def config():
     """Configure Bob settings"""
@@ -51,35 +67,53 @@ def show():
         click.echo(f"{key}: {value}")
 
 @config.command()
-@click.option('--ai-model', 
-              type=click.Choice(['chatgpt', 'gpt-4', 'gpt-3.5-turbo', 'claude-3.5-sonnet', 'llama3']), 
-              help='AI model to use')
+# Deprecated: models are chosen per task in llm_config.json. Still accepted so scripts get a warning, not a usage error
+@click.option('--ai-model', hidden=True)
 @click.option('--max-retries', type=int, help='Maximum number of test retries')
-def set(ai_model, max_retries):
+@click.option('--job-concurrency', type=int, help='Number of background jobs a worker runs at once')
+@click.option('--speculative/--no-speculative', default=None,
+              help='Start generating the next pipeline stage in the background while you review')
+@click.option('--refine-mode', type=click.Choice(['patch', 'full']),
+              help='Have refinements return edits to apply (patch) or the whole document (full)')
+def set(ai_model, max_retries, job_concurrency, speculative, refine_mode):
     """Set configuration values"""
     config = load_config()
     
-    if ai_model is None and max_retries is None:
+    if (ai_model is None and max_retries is None and job_concurrency is None and speculative is None
+            and refine_mode is None):
         click.echo("No configuration values provided. Use --help for usage information.")
         return
 
-    changes_made = False
+    changes = {}
     
     if ai_model is not None:
-        config['ai_model'] = ai_model
-        changes_made = True
-        click.echo(f"AI model set to: {ai_model}")
+        click.echo("Warning: --ai-model is deprecated and has no effect. Models are chosen per task by "
+                   "the routing_profiles section of llm_config.json; see 'bob llm route'.", err=True)
     
     if max_retries is not None:
         if max_retries < 1:
             click.echo("Error: max-retries must be at least 1", err=True)
             return
-        config['max_test_retries'] = max_retries
-        changes_made = True
+        changes['max_test_retries'] = max_retries
         click.echo(f"Maximum test retries set to: {max_retries}")
     
-    if changes_made:
-        save_config(config)
+    if job_concurrency is not None:
+        if job_concurrency < 1:
+            click.echo("Error: job-concurrency must be at least 1", err=True)
+            return
+        changes['job_concurrency'] = job_concurrency
+        click.echo(f"Job concurrency set to: {job_concurrency}")
+
+    if speculative is not None:
+        changes['speculative'] = speculative
+        click.echo(f"Speculative generation {'enabled' if speculative else 'disabled'}")
+
+    if refine_mode is not None:
+        changes['refine_mode'] = refine_mode
+        click.echo(f"Refine mode set to: {refine_mode}")
+    
+    if changes:
+        update_config(lambda config: config.update(changes))
         click.echo("Configuration updated successfully!")
 
 @config.command()
@@ -89,7 +123,5 @@ def reset():
         click.echo("Reset cancelled.")
         return
     
-    config = load_config()
-    config.update(DEFAULT_CONFIG)
-    save_config(config)
+    update_config(lambda config: config.update(DEFAULT_CONFIG))
     click.echo("Configuration reset to default values.")
\ No newline at end of file
@@ -1,11 +1,27 @@
 import click
+import json
 import yaml
 import os
 from datetime import datetime
-from .chat import AIProvider
+from ..core.storage import atomic_write, cached_load, file_lock, locked_update
+from .chat import get_ai_provider
 from .objectives import load_objectives
 from .user_stories import load_user_stories
 from .config import load_config, DEFAULT_CONFIG
+from ..core.design_structure import (
+    DESIGN_SCHEMA, STRUCTURED_DESIGN_INSTRUCTIONS, split_design_response, validate_structured_design,
+    build_design_index, latest_structure, find_class, find_methods, class_relationships,
+    format_class, format_method
+)
+from ..core.summarize import SummaryCache, estimate_tokens, map_reduce_summarize
+from ..core.retrieval import (
+    latest_story_texts, objective_documents, select_covering, split_story_items, sync_project_index
+)
+from ..core.dedup import dedup_story_blocks
+from ..core.patching import PatchFailed, patch_refine
+from ..core.prompt_compaction import compact_text, report_savings
+from ..core.speculation import SpeculationStore, design_inputs, speculation_key
+from ..core.test_generator import TestGenerator
 
 DESIGN_FILE = 'bob_design.yaml'
 
@@ -13,8 +29,7 @@ def load_design():
     """Load existing design from file"""
     if os.path.exists(DESIGN_FILE):
         try:
-            with open(DESIGN_FILE, 'r') as f:
-                return yaml.safe_load(f) or {"designs": [], "created_at": "", "updated_at": ""}
+            return cached_load(DESIGN_FILE, yaml.safe_load) or {"designs": [], "created_at": "", "updated_at": ""}
         except yaml.YAMLError:
             return {"designs": [], "created_at": "", "updated_at": ""}
     return {"designs": [], "created_at": "", "updated_at": ""}
@@ -28,57 +43,145 @@ def represent_str_multiline(dumper, data):
 def save_design(design_data):
     """Save design to file with multiline format"""
     yaml.add_representer(str, represent_str_multiline)
-    with open(DESIGN_FILE, 'w') as f:
-        yaml.dump(design_data, f, default_flow_style=False, sort_keys=False, allow_unicode=True, indent=2)
+    content = yaml.dump(design_data, default_flow_style=False, sort_keys=False, allow_unicode=True, indent=2)
+    with file_lock(DESIGN_FILE):
+        atomic_write(DESIGN_FILE, content)
 
-@click.command()
-@click.option('--interactive/--no-interactive', default=True, help='Enable/disable interactive mode')
-def design(interactive):
-    """Design classes and functions based on objectives and user stories"""
-    try:
-        config = load_config()
-    except click.Abort:
-        config = DEFAULT_CONFIG
-        
-    ai_model = config.get('ai_model', 'chatgpt')
-    ai_provider = AIProvider(ai_model)
-    
-    try:
-        with click.progressbar(length=2, label='Loading project data') as bar:
-            objectives_data = load_objectives()
-            objectives_list = objectives_data.get('objectives', [])
-            bar.update(1)
-            
-            stories_data = load_user_stories()
-            user_stories_list = stories_data.get('user_stories', [])
-            bar.update(1)
-        
-        if not objectives_list:
-            click.echo("No objectives found. Please add objectives first.")
-            return
-            
-        if not user_stories_list:
-            click.echo("No user stories found. Please generate user stories first.")
-            return
-            
-    except Exception as e:
-        click.echo(f"Error loading data: {str(e)}")
-        return
+def update_design(mutate):
+    """Apply mutate to the latest design on disk and save it under the file lock"""
+    return locked_update(DESIGN_FILE, load_design, save_design, mutate)
 
-    # Create context from objectives and user stories
-    context = "Here are the project objectives:\n"
-    for idx, obj in enumerate(objectives_list, 1):
-        title = obj.get('title', 'Untitled')
-        description = obj.get('description', 'No description')
-        context += f"{idx}. {title}: {description}\n"
-    
-    context += "\nHere are the user stories:\n"
+def structure_design(ai_provider, response):
+    """Split a design response into prose and validated structured data.
+
+    If the response carries no valid JSON block, the model is asked once more
+    to restate the design as JSON. Returns (prose, structured, index), with
+    structured and index set to None if no valid structure could be obtained.
+    """
+    prose, structured = split_design_response(response)
+    if not prose:
+        return prose, None, None
+    if structured is None or validate_structured_design(structured):
+        retry = ai_provider.get_response(
+            "Restate the following software design as JSON that validates against this JSON schema. "
+            "Return only the JSON in a ```json fenced block.\n\n"
+            f"Schema:\n{json.dumps(DESIGN_SCHEMA)}\n\nDesign:\n{prose}",
+            task='design'
+        )
+        _, structured = split_design_response(retry)
+    if structured is None:
+        return prose, None, None
+    errors = validate_structured_design(structured)
+    if errors:
+        click.echo(f"Warning: structured design is invalid ({errors[0]}); storing prose only", err=True)
+        return prose, None, None
+    return prose, structured, build_design_index(structured)
+
+def objective_texts(objectives_list):
+    """Render each objective as one line of design context"""
+    return [
+        f"{idx}. {obj.get('title', 'Untitled')}: {obj.get('description', 'No description')}"
+        for idx, obj in enumerate(objectives_list, 1)
+    ]
+
+def story_group_texts(user_stories_list):
+    """Render each story group, with its refinements, as one block of design context"""
+    texts = []
     for story_group in user_stories_list:
-        stories = story_group.get('stories', '')
-        context += f"{stories}\n"
+        text = story_group.get('stories', '')
         # Include any refinements
         for refinement in story_group.get('refined_stories', []):
-            context += f"Refined version:\n{refinement.get('refined_result', '')}\n"
+            text += f"\nRefined version:\n{refinement.get('refined_result', '')}"
+        texts.append(text)
+    return texts
+
+def relevant_story_texts(objectives_list, story_texts, config):
+    """Drop the stories of each group that are not among the most relevant to any objective"""
+    k = config.get('retrieval_top_k', DEFAULT_CONFIG['retrieval_top_k'])
+    groups = [split_story_items(text or '') for text in story_texts]
+    items = [item for group in groups for item in group]
+    if not k or len(items) <= k:
+        return story_texts
+    index = sync_project_index(objectives_list, story_texts)
+    queries = [doc['text'] for doc in objective_documents(objectives_list).values()]
+    relevant = set(select_covering(index, queries, items, 'story', k))
+    texts = ["\n".join(item for item in group if item in relevant) for group in groups]
+    return [text for text in texts if text]
+
+def build_design_context(objectives_list, user_stories_list, config, ai_provider, map_reduce=None):
+    """Build the objectives and user stories context for the design prompt.
+
+    Only the latest version of each story group is used, since a refinement
+    restates the whole group. Every objective is kept, as the design has to
+    cover all of them; once there are more than retrieval_top_k stories,
+    only those among the top retrieval_top_k for some objective are, and
+    stories repeated across groups are deduplicated (see dedup_threshold). When the
+    context is larger than design_context_max_tokens (or map_reduce is
+    True) objectives and story groups are summarized hierarchically so the
+    prompt stays within budget. map_reduce=False always uses the full text.
+    """
+    objectives = objective_texts(objectives_list)
+    threshold = config.get('dedup_threshold', DEFAULT_CONFIG['dedup_threshold'])
+    story_texts = relevant_story_texts(objectives_list, latest_story_texts(user_stories_list), config)
+    stories = [compact_text(text) for text in story_texts]
+    if threshold:
+        stories = dedup_story_blocks(stories, threshold)
+    report_savings(
+        'design context',
+        sum(estimate_tokens(text) for text in objectives + story_group_texts(user_stories_list)),
+        sum(estimate_tokens(text) for text in objectives + stories)
+    )
+    max_tokens = config.get('design_context_max_tokens', DEFAULT_CONFIG['design_context_max_tokens'])
+    total_tokens = sum(estimate_tokens(text) for text in objectives + stories)
+
+    # --map-reduce summarizes even a context that is already within budget
+    forced = map_reduce is True
+    if map_reduce is None:
+        map_reduce = total_tokens > max_tokens
+    elif not map_reduce and total_tokens > max_tokens:
+        click.echo(f"Warning: design context is about {total_tokens} tokens, "
+                   f"over the {max_tokens} token budget; the model may truncate it", err=True)
+
+    if map_reduce:
+        cache = SummaryCache()
+        workers = config.get('summary_workers', DEFAULT_CONFIG['summary_workers'])
+        chunk_tokens = config.get('summary_chunk_tokens', DEFAULT_CONFIG['summary_chunk_tokens'])
+
+        def report(depth, chunks):
+            click.echo(f"Summarizing level {depth}: {chunks} chunks")
+
+        objectives = map_reduce_summarize(
+            ai_provider, objectives, max_tokens // 3,
+            "Summarize these software project objectives.",
+            chunk_tokens=chunk_tokens, workers=workers, cache=cache, on_level=report, force=forced
+        )
+        stories = map_reduce_summarize(
+            ai_provider, stories, max_tokens - max_tokens // 3,
+            "Summarize these user stories.",
+            chunk_tokens=chunk_tokens, workers=workers, cache=cache, on_level=report, force=forced
+        )
+
+    context = "Here are the project objectives:\n"
+    context += "".join(f"{text}\n" for text in objectives)
+    context += "\nHere are the user stories:\n"
+    context += "".join(f"{text}\n" for text in stories)
+    return context
+
+def refinement_context(objectives_list, user_stories_list, refinement, config):
+    """Get the objectives and stories most relevant to a refinement request, as prompt text"""
+    k = config.get('retrieval_top_k', DEFAULT_CONFIG['retrieval_top_k'])
+    if not k:
+        return ""
+    index = sync_project_index(objectives_list, latest_story_texts(user_stories_list))
+    relevant = index.search(refinement, k=k)
+    if not relevant:
+        return ""
+    return "Relevant objectives and user stories:\n" + "".join(f"- {text}\n" for text in relevant) + "\n"
+
+def generate_design(ai_provider, objectives_list, user_stories_list, config, map_reduce=None):
+    """Generate a design from objectives and user stories. Returns (prose, structured, index)"""
+    # Create context from objectives and user stories
+    context = build_design_context(objectives_list, user_stories_list, config, ai_provider, map_reduce)
     
     prompt = (
         "You are a software architect helping to design classes and their functions. "
@@ -93,54 +196,189 @@ def design(interactive):
         "   - Any important notes about implementation\n"
         "3. Key relationships between classes\n"
         "4. Any design patterns that would be beneficial\n\n"
-        "Focus on creating a modular and extensible design that fulfills the objectives and user stories."
+        "Focus on creating a modular and extensible design that fulfills the objectives and user stories.\n\n"
+        f"{STRUCTURED_DESIGN_INSTRUCTIONS}"
+    )
+    return structure_design(ai_provider, ai_provider.get_response(prompt, task='design'))
+
+def design_document(prose, structured):
+    """Render a design the way the model writes it: prose followed by its JSON block"""
+    if structured is None:
+        return prose
+    return f"{prose}\n\n```json\n{json.dumps(structured, indent=2)}\n```"
+
+def refine_design(ai_provider, response, structured, refinement, context, config):
+    """Refine a design based on feedback. Returns (prose, structured, index).
+
+    With refine_mode 'patch' the model returns edits to the current design,
+    which are applied and validated locally; if they do not apply, the
+    full design is regenerated as in 'full' mode.
+    """
+    def regenerate():
+        return ai_provider.get_response(
+            f"Previous design:\n{response}\n\n"
+            f"{context}"
+            f"Refine based on this feedback: {refinement}\n\n"
+            f"{STRUCTURED_DESIGN_INSTRUCTIONS}",
+            task='refine'
+        )
+
+    if config.get('refine_mode', DEFAULT_CONFIG['refine_mode']) != 'patch':
+        return structure_design(ai_provider, regenerate())
+
+    def validate(text):
+        prose, revised = split_design_response(text)
+        if not prose:
+            raise PatchFailed("the edits removed the design text")
+        if structured is not None:
+            if revised is None:
+                raise PatchFailed("the edits broke the JSON block")
+            errors = validate_structured_design(revised)
+            if errors:
+                raise PatchFailed(f"the edited JSON is invalid ({errors[0]})")
+
+    def fallback(reason):
+        click.echo(f"\nCould not apply the edits ({reason}); regenerating the full design", err=True)
+
+    text, _ = patch_refine(
+        ai_provider, design_document(response, structured), refinement, regenerate,
+        kind='design', context=context, notes="Keep the JSON block consistent with any change to the design.",
+        validate=validate, on_fallback=fallback
     )
+    return structure_design(ai_provider, text)
+
+def speculate_build(draft_design, config):
+    """Start generating tests and docs for a design the user is still reviewing.
+
+    Speculations for earlier drafts are cancelled. Returns the keys started.
+    """
+    ai_provider = get_ai_provider()
+    generator = TestGenerator(config, design={"designs": [draft_design]})
+    store = SpeculationStore()
+    keys = []
+    for kind in ('test', 'docs'):
+        key = generator.speculation_key(kind, None, ai_provider)
+        store.start(key, kind, {"design": draft_design})
+        keys.append(key)
+    store.cancel_except(('test', 'docs'), keys)
+    return keys
+
+@click.group(invoke_without_command=True)
+@click.option('--interactive/--no-interactive', default=True, help='Enable/disable interactive mode')
+@click.option('--map-reduce/--no-map-reduce', default=None,
+              help='Summarize objectives and stories before designing (default: only when over budget)')
+@click.option('--speculative/--no-speculative', default=None,
+              help='Generate tests and docs in the background while you review (default: speculative in bob_config.json)')
+@click.pass_context
+def design(ctx, interactive, map_reduce, speculative):
+    """Design classes and functions based on objectives and user stories"""
+    if ctx.invoked_subcommand is not None:
+        return
+
+    try:
+        config = load_config()
+    except click.Abort:
+        config = DEFAULT_CONFIG
+    if speculative is None:
+        speculative = config.get('speculative', False)
+        
+    # Models are chosen per task by the routing profile in llm_config.json
+    ai_provider = get_ai_provider()
     
-    with click.progressbar(length=1, label='Generating design') as bar:
-        response = ai_provider.get_response(prompt)
-        bar.update(1)
+    try:
+        with click.progressbar(length=2, label='Loading project data') as bar:
+            objectives_data = load_objectives()
+            objectives_list = objectives_data.get('objectives', [])
+            bar.update(1)
+            
+            stories_data = load_user_stories()
+            user_stories_list = stories_data.get('user_stories', [])
+            bar.update(1)
+    except Exception as e:
+        raise click.ClickException(f"Error loading data: {str(e)}")
+
+    if not objectives_list:
+        raise click.ClickException("No objectives found. Please add objectives first.")
+    if not user_stories_list:
+        raise click.ClickException("No user stories found. Please generate user stories first.")
+
+    # Use a design generated ahead of time (see --speculative on user-stories) if the inputs still match
+    store = SpeculationStore()
+    design_key = speculation_key('design', design_inputs(objectives_list, user_stories_list, map_reduce, config), ai_provider)
+    speculative_path = store.take(design_key, on_wait=lambda: click.echo("Waiting for the design generated in the background..."))
+    if speculative_path:
+        with open(speculative_path, 'r') as f:
+            result = json.load(f)
+        os.remove(speculative_path)
+        response, structured, index = result['design'], result['structured_design'], result['design_index']
+        click.echo("Using the design generated in the background.")
+    else:
+        with click.progressbar(length=1, label='Generating design') as bar:
+            response, structured, index = generate_design(ai_provider, objectives_list, user_stories_list, config, map_reduce)
+            bar.update(1)
     
+    if not (response or '').strip():
+        # get_response returns "" when the provider request failed
+        raise click.ClickException("No design was generated, so nothing was saved")
+
     click.echo("\nGenerated Design:")
     click.echo(response)
     
-    # Load existing design or create new structure
-    design_data = load_design()
-    if not design_data['created_at']:
-        design_data['created_at'] = datetime.now().isoformat()
-    
     # Create new design entry
     new_design = {
         "generated_at": datetime.now().isoformat(),
         "objectives_snapshot": objectives_list,
         "user_stories_snapshot": [story.get('stories') for story in user_stories_list],
         "design": response,
+        "structured_design": structured,
+        "design_index": index,
         "refined_designs": []
     }
     
-    if interactive:
-        while click.confirm("\nWould you like to refine this design?"):
-            refinement = click.prompt("What would you like to clarify or modify?")
-            with click.progressbar(length=1, label='Refining design') as bar:
-                response = ai_provider.get_response(
-                    f"Previous design:\n{response}\n\nRefine based on this feedback: {refinement}"
-                )
-                bar.update(1)
-            click.echo("\nUpdated Design:")
-            click.echo(response)
-            new_design["refined_designs"].append({
-                "refinement_prompt": refinement,
-                "refined_result": response,
-                "refined_at": datetime.now().isoformat()
-            })
-    
-    # Add new design to the data
-    design_data['designs'].append(new_design)
-    design_data['updated_at'] = datetime.now().isoformat()
-    
-    # Save to file
-    with click.progressbar(length=1, label='Saving design') as bar:
-        save_design(design_data)
-        bar.update(1)
+    if speculative:
+        speculate_build(new_design, config)
+
+    try:
+        if interactive:
+            while click.confirm("\nWould you like to refine this design?"):
+                if speculative:
+                    # Work started for the current draft will not be used
+                    SpeculationStore().cancel_except(('test', 'docs'), [])
+                refinement = click.prompt("What would you like to clarify or modify?")
+                with click.progressbar(length=1, label='Refining design') as bar:
+                    response, structured, index = refine_design(
+                        ai_provider, response, structured, refinement,
+                        refinement_context(objectives_list, user_stories_list, refinement, config), config
+                    )
+                    bar.update(1)
+                click.echo("\nUpdated Design:")
+                click.echo(response)
+                new_design["refined_designs"].append({
+                    "refinement_prompt": refinement,
+                    "refined_result": response,
+                    "structured_design": structured,
+                    "design_index": index,
+                    "refined_at": datetime.now().isoformat()
+                })
+                if speculative:
+                    speculate_build(new_design, config)
+        
+        # Add new design to the latest data on disk and save
+        def append_design(design_data):
+            now = datetime.now().isoformat()
+            if not design_data['created_at']:
+                design_data['created_at'] = now
+            design_data['designs'].append(new_design)
+            design_data['updated_at'] = now
+
+        with click.progressbar(length=1, label='Saving design') as bar:
+            update_design(append_design)
+            bar.update(1)
+    except BaseException:
+        if speculative:
+            # The draft was abandoned
+            SpeculationStore().cancel_except(('test', 'docs'), [])
+        raise
     
     click.echo(f"\nDesign has been saved to {DESIGN_FILE}")
     click.echo("\nNote: You can manually edit the design in the following ways:")
@@ -151,6 +389,45 @@ def design(interactive):
     click.echo("     - objectives_snapshot: Objectives used for generation")
     click.echo("     - user_stories_snapshot: User stories used for generation")
     click.echo("     - design: The generated design")
+    click.echo("     - structured_design: Classes, methods and relationships as structured data")
+    click.echo("     - design_index: Lookup index over structured_design (rebuilt if removed)")
     click.echo("     - refined_designs: List of any refinements made")
     click.echo("3. Feel free to modify the design while maintaining the YAML structure")
-    click.echo("4. You can also use the interactive refinement option to let AI help with modifications") 
\ No newline at end of file
+    click.echo("4. You can also use the interactive refinement option to let AI help with modifications")
+
+@design.command()
+@click.option('--class', 'class_name', help='Show a single class')
+@click.option('--method', 'method_name', help='Show a method, as Class.method or method')
+def show(class_name, method_name):
+    """Show classes and methods of the latest structured design"""
+    design_data = load_design()
+    if not design_data['designs']:
+        click.echo("No designs found. Please run 'bob design' first.")
+        return
+
+    structured, index = latest_structure(design_data['designs'][-1])
+    if structured is None:
+        click.echo("The latest design has no structured data. Please regenerate it with 'bob design'.")
+        return
+
+    if method_name:
+        matches = find_methods(structured, index, method_name)
+        if not matches:
+            click.echo(f"No method found matching '{method_name}'")
+            return
+        for cls, method in matches:
+            click.echo(f"{cls['name']}:")
+            click.echo(format_method(method))
+        return
+
+    if class_name:
+        cls = find_class(structured, index, class_name)
+        if cls is None:
+            click.echo(f"No class found named '{class_name}'")
+            return
+        click.echo(format_class(cls, class_relationships(structured, cls['name'])))
+        return
+
+    click.echo("\nClasses:")
+    for cls in structured['classes']:
+        click.echo(f"- {cls['name']}: {cls.get('responsibility', '')} ({len(cls.get('methods', []))} methods)")
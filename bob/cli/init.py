@@ -87,6 +87,14 @@ ENV/
 
 # Bob specific
 bob_config.json
+bob_*.lock
+bob_jobs.db*
+bob_jobs/
+bob_summaries.json
+bob_retrieval_index.json
+.bob_workspace/
+bob_speculative/
+bob_build_state.json
     """
     with open('.gitignore', 'w') as f:
         f.write(gitignore_content.strip())
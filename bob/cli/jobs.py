@@ -0,0 +1,151 @@
+import os
+import subprocess
+import sys
+import time
+import click
+from .config import load_config, DEFAULT_CONFIG
+from ..core.jobs import JobQueue, JobWorker, JOB_COMMANDS, FINISHED_STATES, QUEUED, RUNNING, DONE, FAILED, CANCELLED
+
+def get_job_concurrency():
+    """Get the configured number of jobs a worker runs at once"""
+    try:
+        config = load_config()
+    except click.Abort:
+        config = DEFAULT_CONFIG
+    return config.get('job_concurrency', DEFAULT_CONFIG['job_concurrency'])
+
+def start_background_worker():
+    """Start a detached worker that exits once the queue is empty"""
+    kwargs = {}
+    if os.name == 'posix':
+        kwargs['start_new_session'] = True
+    subprocess.Popen(
+        [sys.executable, '-m', 'bob.cli.main', 'jobs', 'work', '--exit-when-idle'],
+        stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        env=dict(os.environ, BOB_NO_DAEMON='1'), **kwargs
+    )
+
+def format_job(job):
+    """Format a job as a single status line"""
+    line = f"#{job['id']:<5} {job['status']:<10} {job['kind']:<13} priority={job['priority']}"
+    if job['status'] == RUNNING and job['cancel_requested']:
+        line += " (cancelling)"
+    if job['finished_at']:
+        line += f"  finished {job['finished_at']}"
+    elif job['started_at']:
+        line += f"  started {job['started_at']}"
+    else:
+        line += f"  queued {job['created_at']}"
+    if job['error']:
+        line += f"\n       {job['error']}"
+    return line
+
+@click.group()
+def jobs():
+    """Queue long generations and run them in the background"""
+    pass
+
+@jobs.command()
+@click.argument('kind', type=click.Choice(sorted(JOB_COMMANDS)))
+@click.argument('target', required=False)
+@click.option('--priority', '-p', type=int, default=0, help='Higher priority jobs run first')
+@click.option('--no-worker', is_flag=True, help='Do not start a background worker if none is running')
+def submit(kind, target, priority, no_worker):
+    """Queue a generation job (user-stories, design, test or docs)"""
+    queue = JobQueue()
+    args = [target] if target else []
+    job_id = queue.submit(kind, args, priority)
+    click.echo(f"Submitted job #{job_id} ({kind})")
+
+    if not no_worker and not queue.active_workers():
+        start_background_worker()
+        click.echo("Started background worker")
+
+@jobs.command()
+@click.option('--status', type=click.Choice([QUEUED, RUNNING, DONE, FAILED, CANCELLED]), help='Only show jobs with this status')
+@click.option('--limit', '-n', type=int, default=20, help='Maximum number of jobs to show')
+def list(status, limit):
+    """List jobs, most recent first"""
+    queue = JobQueue()
+    job_list = queue.list(status=status, limit=limit)
+    if not job_list:
+        click.echo("No jobs found.")
+        return
+    for job in job_list:
+        click.echo(format_job(job))
+
+@jobs.command()
+@click.argument('job_ids', type=int, nargs=-1, required=True)
+@click.option('--timeout', type=float, default=None, help='Give up after this many seconds')
+def wait(job_ids, timeout):
+    """Wait for jobs to finish"""
+    queue = JobQueue()
+    finished = queue.wait(job_ids, timeout=timeout)
+    if finished is None:
+        click.echo("Timed out waiting for jobs.")
+        sys.exit(1)
+
+    failed = False
+    for job_id, job in zip(job_ids, finished):
+        if job is None:
+            click.echo(f"#{job_id}: no such job")
+            failed = True
+            continue
+        click.echo(format_job(job))
+        failed = failed or job['status'] != DONE
+    if failed:
+        sys.exit(1)
+
+@jobs.command()
+@click.argument('job_id', type=int)
+def cancel(job_id):
+    """Cancel a queued or running job"""
+    queue = JobQueue()
+    status = queue.cancel(job_id)
+    if status is None:
+        click.echo(f"Error: No job found with id {job_id}")
+    elif status == CANCELLED:
+        click.echo(f"Cancelled job #{job_id}")
+    elif status == RUNNING:
+        click.echo(f"Cancellation requested for running job #{job_id}")
+    else:
+        click.echo(f"Job #{job_id} has already finished ({status})")
+
+@jobs.command()
+@click.argument('job_id', type=int)
+@click.option('--follow', '-f', is_flag=True, help='Keep printing output until the job finishes')
+def logs(job_id, follow):
+    """Show the output of a job"""
+    queue = JobQueue()
+    if queue.get(job_id) is None:
+        click.echo(f"Error: No job found with id {job_id}")
+        return
+
+    log_path = queue.log_path(job_id)
+    position = 0
+    while True:
+        finished = not follow or queue.get(job_id)['status'] in FINISHED_STATES
+        if os.path.exists(log_path):
+            with open(log_path, 'r') as f:
+                f.seek(position)
+                output = f.read()
+                position = f.tell()
+            if output:
+                click.echo(output, nl=False)
+        if finished:
+            break
+        time.sleep(1)
+
+    if not follow and position == 0:
+        click.echo("No output yet.")
+
+@jobs.command()
+@click.option('--concurrency', '-j', type=int, default=None, help='Number of jobs to run at once (default: job_concurrency from bob_config.json)')
+@click.option('--exit-when-idle', is_flag=True, help='Exit once the queue is empty')
+def work(concurrency, exit_when_idle):
+    """Run queued jobs in the foreground"""
+    concurrency = concurrency or get_job_concurrency()
+    queue = JobQueue()
+    click.echo(f"Worker running with concurrency {concurrency} (Ctrl-C to stop)")
+    JobWorker(queue, concurrency=concurrency, exit_when_idle=exit_when_idle).run()
+    click.echo("Worker stopped.")
@@ -1,28 +1,76 @@
 import click
+import copy
 import json
 import os
 from pathlib import Path
+from ..core.storage import atomic_write, file_lock
+from ..core.context_window import DEFAULT_CONTEXT_SIZES, DEFAULT_MIN_OUTPUT_TOKENS
+from ..core.endpoints import DEFAULT_HEALTH_INTERVAL
+
+# Task types that commands tag their requests with
+TASK_TYPES = ['design', 'stories', 'refine', 'test-gen', 'docs', 'summarize', 'repair', 'chat']
+
+DEFAULT_MAX_OUTPUT_TOKENS = 4096
+DEFAULT_MAX_CONTINUATIONS = 3
+
+# Model tiers a route can name instead of a model; 'fast' means the provider's fast_model
+ROUTE_TIERS = ['fast']
 
 DEFAULT_LLM_CONFIG = {
     "max_test_retries": 3,
     "ai_provider": "openai",
+    "max_output_tokens": {
+        "default": DEFAULT_MAX_OUTPUT_TOKENS,
+        "design": 8192,
+        "refine": 8192,
+        "test-gen": 8192,
+        "docs": 8192,
+        "summarize": 1024,
+        "repair": 2048
+    },
+    "max_continuations": DEFAULT_MAX_CONTINUATIONS,
+    # A single model for everything; 'bob llm route --use fast' sends summaries and repairs to fast_model
+    "routing_profile": "quality",
+    "routing_profiles": {
+        "quality": {},
+        "fast": {
+            "summarize": "fast",
+            "repair": "fast"
+        }
+    },
     "providers": {
         "openai": {
             "model": "gpt-4",
-            "api_key": ""
+            "fast_model": "gpt-3.5-turbo",
+            "api_key": "",
+            "requests_per_minute": 0,
+            "tokens_per_minute": 0
         },
         "ollama": {
             "model": "llama2",
+            "fast_model": "",
             "api_key": "",
-            "ollama_base_url": "http://localhost:11434"
+            "ollama_base_url": "http://localhost:11434",
+            "ollama_endpoints": [],
+            "health_check_interval": DEFAULT_HEALTH_INTERVAL,
+            "context_sizes": DEFAULT_CONTEXT_SIZES,
+            "min_output_tokens": DEFAULT_MIN_OUTPUT_TOKENS,
+            "requests_per_minute": 0,
+            "tokens_per_minute": 0
         },
         "anthropic": {
             "model": "claude-3-sonnet",
-            "api_key": ""
+            "fast_model": "claude-3-haiku-20240307",
+            "api_key": "",
+            "requests_per_minute": 0,
+            "tokens_per_minute": 0
         },
         "groq": {
             "model": "mixtral-8x7b-32768",
-            "api_key": ""
+            "fast_model": "llama3-8b-8192",
+            "api_key": "",
+            "requests_per_minute": 0,
+            "tokens_per_minute": 0
         }
     }
 }
@@ -38,22 +86,63 @@ def load_llm_config():
         with open(config_path, 'r') as f:
             return json.load(f)
     except FileNotFoundError:
-        return DEFAULT_LLM_CONFIG.copy()
+        return copy.deepcopy(DEFAULT_LLM_CONFIG)
     except Exception as e:
         click.echo(f"Error loading LLM config: {str(e)}")
-        return DEFAULT_LLM_CONFIG.copy()
+        return copy.deepcopy(DEFAULT_LLM_CONFIG)
 
 def save_llm_config(config):
     """Save LLM configuration to llm_config.json"""
     config_path = get_config_path()
     try:
-        with open(config_path, 'w') as f:
-            json.dump(config, f, indent=4)
+        with file_lock(config_path):
+            atomic_write(config_path, json.dumps(config, indent=4))
         return True
     except Exception as e:
         click.echo(f"Error saving LLM config: {str(e)}")
         return False
 
+def update_llm_config(mutate):
+    """Apply mutate to the latest LLM configuration on disk and save it under the file lock"""
+    config_path = get_config_path()
+    with file_lock(config_path):
+        config = load_llm_config()
+        mutate(config)
+        return save_llm_config(config)
+
+def resolve_route(config, task):
+    """Get the (provider, model) that serves a task type under the active routing profile.
+
+    A route is a tier name such as 'fast' (the active provider's fast_model)
+    or a {"provider", "model"} mapping, either part of which may be left out.
+    Tasks without a route use the active provider and its model.
+    """
+    default_provider = config.get('ai_provider', 'openai')
+    providers = config.get('providers', {})
+    profile = config.get('routing_profiles', {}).get(config.get('routing_profile') or '', {})
+    route = profile.get(task) if task else None
+    if isinstance(route, str):
+        route = {"model": providers.get(default_provider, {}).get(f"{route}_model")}
+    route = route or {}
+    provider = route.get('provider') or default_provider
+    model = route.get('model') or providers.get(provider, {}).get('model')
+    return provider, model
+
+def parse_route(target, providers):
+    """Parse a route given on the command line: a tier, MODEL or PROVIDER:MODEL"""
+    if target in ROUTE_TIERS:
+        return target
+    provider, sep, model = target.partition(':')
+    # Ollama model names contain ':' themselves, so only split off a known provider
+    if sep and provider in providers:
+        return {"provider": provider, "model": model} if model else {"provider": provider}
+    return {"model": target}
+
+def format_route(route):
+    if isinstance(route, str):
+        return route
+    return ':'.join(part for part in (route.get('provider'), route.get('model')) if part)
+
 @click.group()
 def llm():
     """Manage LLM configuration"""
@@ -79,12 +168,15 @@ def set(provider, key, value):
         click.echo(f"Unknown provider: {provider}")
         return
     
-    if key not in config['providers'][provider]:
+    known_keys = config['providers'][provider].keys() | DEFAULT_LLM_CONFIG['providers'].get(provider, {}).keys()
+    if key not in known_keys:
         click.echo(f"Unknown configuration key: {key}")
         return
     
-    config['providers'][provider][key] = value
-    if save_llm_config(config):
+    def set_value(config):
+        config['providers'].setdefault(provider, {})[key] = value
+
+    if update_llm_config(set_value):
         click.echo(f"Updated {provider}.{key} = {value}")
     else:
         click.echo("Failed to save configuration")
@@ -109,6 +201,7 @@ def get(provider):
         click.echo("\nCurrent configuration:")
         click.echo(f"Active provider: {config['ai_provider']}")
         click.echo(f"Max test retries: {config['max_test_retries']}")
+        click.echo(f"Routing profile: {config.get('routing_profile') or 'none'} (see 'bob llm route')")
         click.echo("\nProviders:")
         for provider, settings in config['providers'].items():
             click.echo(f"\n{provider}:")
@@ -118,6 +211,94 @@ def get(provider):
                     value = value[:8] + '...' if value else ''
                 click.echo(f"  {key}: {value}")
 
+@llm.command()
+@click.argument('task', required=False, type=click.Choice(['default'] + TASK_TYPES))
+@click.argument('max_tokens', required=False, type=int)
+@click.option('--continuations', type=int, help='How many times a truncated response is continued')
+def tokens(task, max_tokens, continuations):
+    """Show or set output token limits per task type"""
+    if (task is not None and max_tokens is not None) or continuations is not None:
+        def set_limits(config):
+            if max_tokens is not None:
+                limits = config.setdefault('max_output_tokens', copy.deepcopy(DEFAULT_LLM_CONFIG['max_output_tokens']))
+                limits[task] = max_tokens
+            if continuations is not None:
+                config['max_continuations'] = continuations
+
+        if not update_llm_config(set_limits):
+            click.echo("Failed to save configuration")
+            return
+        if max_tokens is not None:
+            click.echo(f"Updated max output tokens for {task} = {max_tokens}")
+        if continuations is not None:
+            click.echo(f"Updated max continuations = {continuations}")
+        return
+
+    config = load_llm_config()
+    limits = config.get('max_output_tokens', DEFAULT_LLM_CONFIG['max_output_tokens'])
+    default = limits.get('default', DEFAULT_MAX_OUTPUT_TOKENS)
+    click.echo("\nMax output tokens:")
+    for name in ([task] if task else ['default'] + TASK_TYPES):
+        value = limits.get(name)
+        click.echo(f"  {name}: {value if value else f'{default} (default)'}")
+    click.echo(f"Max continuations: {config.get('max_continuations', DEFAULT_MAX_CONTINUATIONS)}")
+
+@llm.command()
+@click.argument('task', required=False, type=click.Choice(TASK_TYPES))
+@click.argument('target', required=False)
+@click.option('--profile', help='Routing profile to show or change (default: the active one)')
+@click.option('--use', 'use_profile', help='Make a routing profile the active one')
+def route(task, target, profile, use_profile):
+    """Show or set which provider and model serve each task type.
+
+    TARGET is a tier (fast), a model, PROVIDER:MODEL, or 'default' to
+    remove the route so the task uses the active provider's model.
+    """
+    config = load_llm_config()
+    if use_profile is not None:
+        def set_profile(config):
+            config['routing_profile'] = use_profile
+            config.setdefault('routing_profiles', {}).setdefault(use_profile, {})
+
+        if not update_llm_config(set_profile):
+            click.echo("Failed to save configuration")
+            return
+        click.echo(f"Now using routing profile {use_profile}")
+        config = load_llm_config()
+
+    profile = profile or config.get('routing_profile') or 'default'
+    if task is not None and target is not None:
+        route = None if target == 'default' else parse_route(target, config.get('providers', {}))
+        if isinstance(route, dict) and route.get('provider') not in (None, *config.get('providers', {})):
+            click.echo(f"Unknown provider: {route['provider']}")
+            return
+
+        def set_route(config):
+            routes = config.setdefault('routing_profiles', {}).setdefault(profile, {})
+            if route is None:
+                routes.pop(task, None)
+            else:
+                routes[task] = route
+
+        if update_llm_config(set_route):
+            click.echo(f"Updated route for {task} in profile {profile} = {format_route(route) if route else 'default'}")
+        else:
+            click.echo("Failed to save configuration")
+        return
+
+    active = config.get('routing_profile') or 'default'
+    routes = config.get('routing_profiles', {}).get(profile, {})
+    # Resolve against the profile being shown, which may not be the active one
+    shown = dict(config, routing_profile=profile)
+    click.echo(f"\nRouting profile: {profile}{' (active)' if profile == active else ''}")
+    for name in ([task] if task else TASK_TYPES):
+        provider, model = resolve_route(shown, name)
+        via = f" [{format_route(routes[name])}]" if name in routes else ''
+        click.echo(f"  {name}: {provider}:{model}{via}")
+    others = [name for name in config.get('routing_profiles', {}) if name != profile]
+    if others:
+        click.echo(f"Other profiles: {', '.join(others)}")
+
 @llm.command()
 @click.argument('provider')
 def use(provider):
@@ -128,8 +309,10 @@ def use(provider):
         click.echo(f"Unknown provider: {provider}")
         return
     
-    config['ai_provider'] = provider
-    if save_llm_config(config):
+    def set_provider(config):
+        config['ai_provider'] = provider
+
+    if update_llm_config(set_provider):
         click.echo(f"Now using {provider} as the active provider")
     else:
         click.echo("Failed to update active provider")
@@ -153,7 +336,7 @@ def test():
         return
     
     if provider == 'ollama':
-        if not provider_config.get('ollama_base_url'):
+        if not provider_config.get('ollama_base_url') and not provider_config.get('ollama_endpoints'):
             click.echo("Error: Ollama base URL not configured")
             return
     
@@ -7,6 +7,11 @@ from .user_stories import user_stories
 from .design import design
 from .build import build
 from .llm_config import llm
+from .serve import serve
+from .jobs import jobs
+from .workspace import workspace
+from .speculate import speculate
+from .bench import bench
 
 @click.group()
 def cli():
@@ -21,5 +26,13 @@ cli.add_command(user_stories)
 cli.add_command(design)
 cli.add_command(build)
 cli.add_command(llm)
+cli.add_command(serve)
+cli.add_command(jobs)
+cli.add_command(workspace)
+cli.add_command(speculate)
+cli.add_command(bench)
 
-__all__ = ['cli']
\ No newline at end of file
+__all__ = ['cli']
+
+if __name__ == '__main__':
+    cli()
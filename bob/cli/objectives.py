@@ -2,18 +2,26 @@ import click
 import yaml
 import os
 from datetime import datetime
+from ..core.objective_import import (
+    FORMATS, YAML_DUMPER, YAML_LOADER, ImportAborted, detect_format, import_objectives
+)
+from ..core.objective_index import SORT_KEYS, ObjectiveIndex, allocate_id, assign_missing_ids
+from ..core.storage import atomic_write, atomic_writer, cached_load, file_lock, locked_update
 
 OBJECTIVES_FILE = 'bob_objectives.yaml'
 
 def load_objectives():
-    """Load existing objectives from file"""
+    """Load existing objectives from file, giving any objective without an ID one"""
+    data = None
     if os.path.exists(OBJECTIVES_FILE):
         try:
-            with open(OBJECTIVES_FILE, 'r') as f:
-                return yaml.safe_load(f) or {"objectives": [], "created_at": "", "updated_at": ""}
+            data = cached_load(OBJECTIVES_FILE, lambda f: yaml.load(f, Loader=YAML_LOADER))
         except yaml.YAMLError:
-            return {"objectives": [], "created_at": "", "updated_at": ""}
-    return {"objectives": [], "created_at": "", "updated_at": ""}
+            data = None
+    if not data:
+        data = {"objectives": [], "created_at": "", "updated_at": ""}
+    assign_missing_ids(data)
+    return data
 
 def represent_str_multiline(dumper, data):
     """Custom representer for multiline strings"""
@@ -21,125 +29,242 @@ def represent_str_multiline(dumper, data):
         return dumper.represent_scalar('tag:yaml.org,2002:str', data, style='|')
     return dumper.represent_scalar('tag:yaml.org,2002:str', data)
 
+YAML_DUMPER.add_representer(str, represent_str_multiline)
+
+def dump_yaml(data):
+    return yaml.dump(data, Dumper=YAML_DUMPER, default_flow_style=False, sort_keys=False, allow_unicode=True, indent=2)
+
 def save_objectives(objectives):
     """Save objectives to file with multiline format"""
-    yaml.add_representer(str, represent_str_multiline)
-    with open(OBJECTIVES_FILE, 'w') as f:
-        yaml.dump(objectives, f, default_flow_style=False, sort_keys=False, allow_unicode=True, indent=2)
+    content = dump_yaml(objectives)
+    with file_lock(OBJECTIVES_FILE):
+        atomic_write(OBJECTIVES_FILE, content)
+
+def update_objectives(mutate):
+    """Apply mutate to the latest objectives on disk and save them under the file lock"""
+    return locked_update(OBJECTIVES_FILE, load_objectives, save_objectives, mutate)
 
 @click.group()
 def objectives():
     """Manage project objectives"""
     pass
 
+def format_objective(obj):
+    """Format an objective for display"""
+    return (
+        f"\n{obj['id']}. {obj['title']}\n"
+        f"   Description: {obj['description']}\n"
+        f"   Priority: {obj['priority']}\n"
+        f"   Added: {obj['added_at']}"
+    )
+
+def date_bound(value):
+    """Format a --since/--until value for comparison; a bare date covers the whole day"""
+    if value is None:
+        return None
+    if value.time() == datetime.min.time():
+        return value.date().isoformat()
+    return value.isoformat()
+
 @objectives.command()
-def list():
-    """List all project objectives"""
+@click.option('--priority', '-p', multiple=True, type=click.Choice(['high', 'medium', 'low'], case_sensitive=False),
+              help='Only show objectives with this priority (repeatable)')
+@click.option('--since', type=click.DateTime(), help='Only show objectives added on or after this date')
+@click.option('--until', type=click.DateTime(), help='Only show objectives added on or before this date')
+@click.option('--sort', type=click.Choice(SORT_KEYS), default='added', help='Sort order (default: added)')
+@click.option('--reverse', '-r', is_flag=True, help='Reverse the sort order')
+@click.option('--limit', '-n', type=int, default=None, help='Show at most this many objectives')
+@click.option('--offset', type=int, default=0, help='Skip this many objectives (for paging)')
+def list(priority, since, until, sort, reverse, limit, offset):
+    """List project objectives"""
     data = load_objectives()
     if not data['objectives']:
         click.echo("No objectives defined yet.")
         return
 
+    index = ObjectiveIndex(data['objectives'])
+    total, page = index.query(
+        priorities=[p.lower() for p in priority],
+        since=date_bound(since),
+        until=date_bound(until),
+        sort=sort, reverse=reverse,
+        offset=max(0, offset), limit=limit
+    )
+    if not page:
+        click.echo("No objectives match." if not total else f"No objectives past offset {offset} ({total} match).")
+        return
+
     click.echo("\nProject Objectives:")
     click.echo("------------------")
-    for idx, obj in enumerate(data['objectives'], 1):
-        click.echo(f"\n{idx}. {obj['title']}")
-        click.echo(f"   Description: {obj['description']}")
-        click.echo(f"   Priority: {obj['priority']}")
-        click.echo(f"   Added: {obj['added_at']}")
+    for obj in page:
+        click.echo(format_objective(obj))
+
+    shown_to = max(0, offset) + len(page)
+    if shown_to < total or offset:
+        click.echo(f"\nShowing {max(0, offset) + 1}-{shown_to} of {total}")
+        if shown_to < total:
+            click.echo(f"Use --offset {shown_to} to see more.")
+
+def import_file(file, fmt=None, skip_invalid=False, dry_run=False):
+    """Import objectives from a YAML, JSONL or CSV file in one atomic write.
+
+    The existing objectives are written out first and imported ones are
+    streamed after them, so the import never holds the whole file in memory.
+    """
+    try:
+        fmt = fmt or detect_format(file)
+    except ValueError as e:
+        click.echo(f"Error: {e}")
+        return None
+
+    with file_lock(OBJECTIVES_FILE):
+        data = load_objectives()
+        if dry_run:
+            summary = import_objectives(file, data['objectives'], fmt=fmt)
+        else:
+            try:
+                with atomic_writer(OBJECTIVES_FILE) as f:
+                    f.write("objectives:\n")
+                    for start in range(0, len(data['objectives']), 1000):
+                        f.write(dump_yaml(data['objectives'][start:start + 1000]))
+                    def write_batch(batch):
+                        f.write(dump_yaml([{"id": allocate_id(data), **obj} for obj in batch]))
+
+                    summary = import_objectives(
+                        file, data['objectives'], write_batch, fmt=fmt, skip_invalid=skip_invalid
+                    )
+                    if not summary['added'] or (summary['errors'] and not skip_invalid):
+                        raise ImportAborted()
+                    now = datetime.now().isoformat()
+                    rest = {key: value for key, value in data.items() if key != 'objectives'}
+                    rest['created_at'] = data.get('created_at') or now
+                    rest['updated_at'] = now
+                    f.write(dump_yaml(rest))
+            except ImportAborted:
+                pass
+
+    for line_no, message in summary['errors']:
+        click.echo(f"{file}:{line_no}: {message}")
+    counts = f"{summary['read']} read, {summary['added']} new, {summary['duplicates']} duplicates, {len(summary['errors'])} errors"
+    if dry_run:
+        click.echo(f"Dry run: {counts}")
+    elif summary['errors'] and not skip_invalid:
+        click.echo(f"Error: Nothing imported ({counts}). Fix the errors above or use --skip-invalid.")
+    else:
+        click.echo(f"Imported {summary['added']} objectives from file ({counts})")
+    return summary
+
+@objectives.command(name='import')
+@click.argument('file', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'fmt', type=click.Choice(FORMATS), help='File format (default: from the extension)')
+@click.option('--skip-invalid', is_flag=True, help='Import the valid records even if some are invalid')
+@click.option('--dry-run', is_flag=True, help='Only validate the file and report what would be imported')
+def import_command(file, fmt, skip_invalid, dry_run):
+    """Import objectives from a YAML, JSONL or CSV file"""
+    import_file(file, fmt, skip_invalid, dry_run)
 
 @objectives.command()
-@click.option('--file', '-f', type=click.Path(exists=True), help='YAML file containing objectives')
+@click.option('--file', '-f', type=click.Path(exists=True), help='YAML, JSONL or CSV file containing objectives')
 def add(file):
     """Add objectives interactively or from a file"""
-    data = load_objectives()
-    
-    if not data['created_at']:
-        data['created_at'] = datetime.now().isoformat()
-
     if file:
-        # Add objectives from file
-        try:
-            with open(file, 'r') as f:
-                file_data = yaml.safe_load(f)
-                
-            if not isinstance(file_data, list):
-                click.echo("Error: File must contain a list of objectives")
-                return
-
-            for obj in file_data:
-                if not all(k in obj for k in ('title', 'description', 'priority')):
-                    click.echo("Error: Each objective must have title, description, and priority")
-                    return
-                if obj['priority'].lower() not in ['high', 'medium', 'low']:
-                    click.echo("Error: Priority must be high, medium, or low")
-                    return
-
-                new_objective = {
-                    "title": obj['title'],
-                    "description": obj['description'],
-                    "priority": obj['priority'].lower(),
-                    "added_at": datetime.now().isoformat()
-                }
-                data['objectives'].append(new_objective)
-
-            click.echo(f"Added {len(file_data)} objectives from file")
+        import_file(file)
+        return
 
-        except yaml.YAMLError:
-            click.echo("Error: Invalid YAML file")
-            return
-        except Exception as e:
-            click.echo(f"Error reading file: {str(e)}")
-            return
-    else:
-        # Interactive input mode
-        while True:
-            title = click.prompt('Objective title (or :done to finish)')
-            
-            if title.lower() == ':done':
-                break
-
-            description = click.prompt('Description')
-            priority = click.prompt(
-                'Priority level',
-                type=click.Choice(['high', 'medium', 'low'], case_sensitive=False)
-            )
-
-            new_objective = {
-                "title": title,
-                "description": description,
-                "priority": priority.lower(),
-                "added_at": datetime.now().isoformat()
-            }
-
-            data['objectives'].append(new_objective)
-            click.echo(f"\nObjective '{title}' added successfully!")
-            
-            if not click.confirm('\nAdd another objective?'):
-                break
-
-    data['updated_at'] = datetime.now().isoformat()
-    save_objectives(data)
+    # Interactive input mode
+    new_objectives = []
+    while True:
+        title = click.prompt('Objective title (or :done to finish)')
+        
+        if title.lower() == ':done':
+            break
+
+        description = click.prompt('Description')
+        priority = click.prompt(
+            'Priority level',
+            type=click.Choice(['high', 'medium', 'low'], case_sensitive=False)
+        )
+
+        new_objective = {
+            "title": title,
+            "description": description,
+            "priority": priority.lower(),
+            "added_at": datetime.now().isoformat()
+        }
+
+        new_objectives.append(new_objective)
+        click.echo(f"\nObjective '{title}' added successfully!")
+        
+        if not click.confirm('\nAdd another objective?'):
+            break
+
+    def append_objectives(data):
+        now = datetime.now().isoformat()
+        if not data['created_at']:
+            data['created_at'] = now
+        data['objectives'].extend({"id": allocate_id(data), **obj} for obj in new_objectives)
+        data['updated_at'] = now
+
+    update_objectives(append_objectives)
     click.echo("\nAll objectives have been saved!")
 
 @objectives.command()
-@click.argument('index', type=int)
-def remove(index):
-    """Remove an objective by its index"""
-    data = load_objectives()
-    
-    if not data['objectives']:
-        click.echo("No objectives to remove.")
-        return
-    
+@click.argument('objective_ids', nargs=-1, required=True)
+def remove(objective_ids):
+    """Remove objectives by ID (e.g. O12)"""
+    def remove_objectives(data):
+        index = ObjectiveIndex(data['objectives'])
+        positions = {}
+        for objective_id in objective_ids:
+            position = index.get(objective_id)
+            if position is None:
+                # Abort before anything is saved
+                raise KeyError(objective_id)
+            positions[position] = data['objectives'][position]
+        data['objectives'] = [obj for position, obj in enumerate(data['objectives']) if position not in positions]
+        data['updated_at'] = datetime.now().isoformat()
+        return positions.values()
+
     try:
-        idx = index - 1  # Convert to 0-based index
-        removed = data['objectives'].pop(idx)
+        removed = update_objectives(remove_objectives)
+    except KeyError as e:
+        click.echo(f"Error: No objective found with ID {e.args[0]}")
+        return
+    for obj in removed:
+        click.echo(f"Removed objective {obj['id']}: {obj['title']}")
+
+@objectives.command()
+@click.argument('objective_id')
+@click.option('--title', help='New title')
+@click.option('--description', help='New description')
+@click.option('--priority', type=click.Choice(['high', 'medium', 'low'], case_sensitive=False), help='New priority')
+def update(objective_id, title, description, priority):
+    """Update an objective by ID"""
+    changes = {}
+    if title is not None:
+        changes['title'] = title
+    if description is not None:
+        changes['description'] = description
+    if priority is not None:
+        changes['priority'] = priority.lower()
+    if not changes:
+        click.echo("Nothing to update. Use --title, --description or --priority.")
+        return
+
+    def update_objective(data):
+        position = ObjectiveIndex(data['objectives']).get(objective_id)
+        if position is None:
+            raise KeyError(objective_id)
+        data['objectives'][position].update(changes)
         data['updated_at'] = datetime.now().isoformat()
-        save_objectives(data)
-        click.echo(f"\nRemoved objective: {removed['title']}")
-    except IndexError:
-        click.echo(f"Error: No objective found at index {index}")
+        return data['objectives'][position]
+
+    try:
+        updated = update_objectives(update_objective)
+    except KeyError:
+        click.echo(f"Error: No objective found with ID {objective_id}")
+        return
+    click.echo(f"Updated objective {updated['id']}: {updated['title']}")
 
 @objectives.command()
 def clear():
@@ -148,8 +273,9 @@ def clear():
         click.echo("Operation cancelled.")
         return
     
-    if os.path.exists(OBJECTIVES_FILE):
-        os.remove(OBJECTIVES_FILE)
-        click.echo("All objectives have been removed.")
-    else:
-        click.echo("No objectives file found.") 
\ No newline at end of file
+    with file_lock(OBJECTIVES_FILE):
+        if os.path.exists(OBJECTIVES_FILE):
+            os.remove(OBJECTIVES_FILE)
+            click.echo("All objectives have been removed.")
+        else:
+            click.echo("No objectives file found.") 
\ No newline at end of file
@@ -0,0 +1,258 @@
+import io
+import logging
+import os
+import queue
+import signal
+import socketserver
+import sys
+import threading
+import click
+from .client import (
+    default_socket_path, connect, send_message, read_message, is_forwarded_env, INTERRUPTED_EXIT
+)
+
+class _Channel:
+    """Newline-delimited JSON channel to one connected client.
+
+    Once a command starts, a reader thread takes the client's messages:
+    input lines are queued for the command and an interrupt (the client
+    pressed Ctrl-C or went away) sends SIGINT to the command's process,
+    just as Ctrl-C would if the command ran in the client's terminal.
+    """
+
+    def __init__(self, rfile, wfile):
+        self.rfile = rfile
+        self.wfile = wfile
+        self._write_lock = threading.Lock()
+        self._replies = queue.Queue()
+
+    def send(self, message):
+        with self._write_lock:
+            send_message(self.wfile, message)
+
+    def receive(self):
+        return read_message(self.rfile)
+
+    def start_command(self):
+        """Relay the client's messages to the command running in this process"""
+        threading.Thread(target=self._read, daemon=True).start()
+
+    def interrupt(self):
+        os.kill(os.getpid(), signal.SIGINT)
+
+    def receive_reply(self):
+        # Polling rather than blocking, so the command stays responsive to an interrupt while waiting
+        while True:
+            try:
+                return self._replies.get(timeout=0.1)
+            except queue.Empty:
+                pass
+
+    def _read(self):
+        while True:
+            try:
+                message = self.receive()
+            except (OSError, ValueError):
+                message = None
+            if message is None:
+                self._replies.put(None)
+                self.interrupt()
+                return
+            if message.get('interrupt'):
+                self.interrupt()
+            else:
+                self._replies.put(message)
+
+class _RemoteOutput(io.TextIOBase):
+    """Text stream that relays writes to the client"""
+
+    def __init__(self, channel, stream):
+        self.channel = channel
+        self.stream = stream
+
+    def writable(self):
+        return True
+
+    def isatty(self):
+        return False
+
+    def write(self, data):
+        if not isinstance(data, str):
+            raise TypeError(f"write() argument must be str, not {type(data).__name__}")
+        if data:
+            self.channel.send({"stream": self.stream, "data": data})
+        return len(data)
+
+class _RemoteInput(io.TextIOBase):
+    """Text stream that asks the client for a line of its stdin"""
+
+    def __init__(self, channel):
+        self.channel = channel
+
+    def readable(self):
+        return True
+
+    def isatty(self):
+        return False
+
+    def readline(self, size=-1):
+        self.channel.send({"input": True})
+        message = self.channel.receive_reply()
+        if message is None or message.get('eof'):
+            return ''
+        return message.get('line', '')
+
+def _invoke(argv):
+    from .main import cli
+
+    try:
+        cli.main(args=argv, prog_name='bob', standalone_mode=True)
+        return 0
+    except SystemExit as e:
+        if e.code is None:
+            return 0
+        if isinstance(e.code, int):
+            return e.code
+        sys.stderr.write(f"{e.code}\n")
+        return 1
+    except KeyboardInterrupt:
+        sys.stderr.write("Aborted!\n")
+        return INTERRUPTED_EXIT
+    except Exception as e:
+        sys.stderr.write(f"Error: {str(e)}\n")
+        return 1
+
+def _redirect_logging(replacements):
+    """Point root logging handlers at other streams, given {old stream: new stream}"""
+    targets = {id(old): new for old, new in replacements.items()}
+    for handler in logging.getLogger().handlers:
+        if isinstance(handler, logging.StreamHandler) and id(handler.stream) in targets:
+            handler.setStream(targets[id(handler.stream)])
+
+def run_command(argv, cwd, channel, env=None):
+    """Run a bob command with the client's cwd, environment and stdio.
+
+    Each command runs in its own process forked from the daemon, so this
+    changes process-wide state freely and never restores it.
+    """
+    saved_streams = (sys.stdin, sys.stdout, sys.stderr)
+    os.chdir(cwd)
+    if env is not None:
+        # Only bob's own and the providers' variables are forwarded; the rest stay the daemon's
+        for name in [name for name in os.environ if is_forwarded_env(name)]:
+            del os.environ[name]
+        os.environ.update(env)
+    sys.stdin = _RemoteInput(channel)
+    sys.stdout = _RemoteOutput(channel, 'stdout')
+    sys.stderr = _RemoteOutput(channel, 'stderr')
+    # Handlers created at import (logging.basicConfig) hold the daemon's own streams
+    _redirect_logging({saved_streams[1]: sys.stdout, saved_streams[2]: sys.stderr})
+    try:
+        channel.start_command()
+        return _invoke(argv)
+    except KeyboardInterrupt:
+        # An interrupt that arrived just as the command finished
+        return INTERRUPTED_EXIT
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        channel = _Channel(self.rfile, self.wfile)
+        request = channel.receive()
+        if not request:
+            return
+
+        if request.get('control') == 'stop':
+            channel.send({"exit": 0})
+            # This runs in a forked child; the daemon stops on SIGINT like it does on Ctrl-C
+            os.kill(os.getppid(), signal.SIGINT)
+            return
+
+        try:
+            code = run_command(request.get('argv', []), request.get('cwd', os.getcwd()), channel, request.get('env'))
+            channel.send({"exit": code})
+        except (BrokenPipeError, ConnectionResetError):
+            # Client went away mid-command
+            pass
+
+if hasattr(socketserver, 'ForkingMixIn') and hasattr(socketserver, 'UnixStreamServer'):
+    class _DaemonServer(socketserver.ForkingMixIn, socketserver.UnixStreamServer):
+        """Serves each connection in a process forked from the warmed-up daemon.
+
+        Commands run concurrently, each with its own cwd, environment and
+        stdio, and none of them can leave state behind in the daemon.
+        """
+        # Stopping the daemon does not wait for commands still running
+        block_on_close = False
+
+def stop_daemon(socket_path):
+    """Ask a running daemon to shut down. Returns False if none is running"""
+    sock = connect(socket_path)
+    if sock is None:
+        return False
+    with sock:
+        send_message(sock.makefile('wb'), {"control": "stop"})
+        read_message(sock.makefile('rb'))
+    return True
+
+@click.command()
+@click.option('--socket', 'socket_path', type=click.Path(), default=None,
+              help='Unix socket to listen on (default: $BOB_SOCKET or ~/.bob/bob.sock)')
+@click.option('--stop', is_flag=True, help='Stop a running daemon')
+def serve(socket_path, stop):
+    """Run a local daemon that keeps the CLI and AI provider loaded.
+
+    While it is running, other bob commands forward to it instead of
+    starting from scratch. Each command runs in a process forked from the
+    daemon, in the caller's working directory, so several can run at once.
+    """
+    socket_path = socket_path or default_socket_path()
+
+    if stop:
+        if stop_daemon(socket_path):
+            click.echo("Daemon stopped.")
+        else:
+            click.echo("No daemon is running.")
+        return
+
+    if not hasattr(socketserver, 'UnixStreamServer') or not hasattr(os, 'fork'):
+        click.echo("Error: bob serve requires Unix domain sockets and fork()", err=True)
+        raise click.Abort()
+
+    existing = connect(socket_path)
+    if existing is not None:
+        existing.close()
+        click.echo(f"A daemon is already listening on {socket_path}", err=True)
+        raise click.Abort()
+    if os.path.exists(socket_path):
+        # Stale socket left behind by a daemon that did not shut down cleanly
+        os.remove(socket_path)
+    os.makedirs(os.path.dirname(os.path.abspath(socket_path)), mode=0o700, exist_ok=True)
+
+    old_umask = os.umask(0o077)
+    try:
+        server = _DaemonServer(socket_path, _RequestHandler)
+    finally:
+        os.umask(old_umask)
+    # Only this user may connect: commands run with the daemon's files and the caller's API keys
+    os.chmod(socket_path, 0o700)
+    # Interrupts and --stop arrive as SIGINT, which a daemon started in the background may ignore
+    signal.signal(signal.SIGINT, signal.default_int_handler)
+
+    # Warm up the CLI and provider SDK imports before accepting requests
+    from . import main  # noqa: F401
+    from .chat import get_ai_provider
+    try:
+        get_ai_provider()
+    except Exception as e:
+        click.echo(f"Warning: could not initialize AI provider: {str(e)}", err=True)
+
+    click.echo(f"bob daemon listening on {socket_path} (Ctrl-C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        click.echo("\nDaemon stopped.")
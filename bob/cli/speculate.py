@@ -0,0 +1,57 @@
+import click
+import json
+import signal
+import sys
+from ..core.storage import atomic_write
+from ..core.speculation import SpeculationStore
+from ..core.test_generator import TestGenerator
+from .config import load_config, DEFAULT_CONFIG
+from .chat import get_ai_provider
+from .design import generate_design
+
+def _terminate(signum, frame):
+    sys.exit(128 + signum)
+
+@click.command(hidden=True)
+@click.argument('key')
+def speculate(key):
+    """Generate a speculative result in the background (started by --speculative)"""
+    # Cancellation sends SIGTERM; exit through the normal path so streams are closed
+    signal.signal(signal.SIGTERM, _terminate)
+    store = SpeculationStore()
+    payload = store.load_payload(key)
+    if payload is None:
+        click.echo(f"No speculation found for {key}", err=True)
+        return
+
+    try:
+        config = load_config()
+    except click.Abort:
+        config = DEFAULT_CONFIG
+
+    try:
+        ai_provider = get_ai_provider()
+        if payload['kind'] == 'design':
+            response, structured, index = generate_design(
+                ai_provider, payload['objectives'], payload['user_stories'], config, payload.get('map_reduce')
+            )
+            if not response:
+                raise Exception("no design was generated")
+            atomic_write(store.output_path(key), json.dumps({
+                "design": response,
+                "structured_design": structured,
+                "design_index": index,
+            }))
+        else:
+            test_generator = TestGenerator(config, design={"designs": [payload['design']]})
+            if payload['kind'] == 'test':
+                success = test_generator.generate_test_code(None, ai_provider, output_file=store.output_path(key))
+            else:
+                success = test_generator.generate_docs(None, ai_provider, output_file=store.output_path(key))
+            if not success:
+                raise Exception(f"{payload['kind']} generation failed")
+    except Exception as e:
+        click.echo(f"Error: {str(e)}", err=True)
+        store.finish(key, error=str(e))
+        sys.exit(1)
+    store.finish(key)
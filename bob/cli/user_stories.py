@@ -2,9 +2,16 @@ import click
 import yaml
 import os
 from datetime import datetime
-from .chat import AIProvider
+from ..core.storage import atomic_write, cached_load, file_lock, locked_update
+from .chat import get_ai_provider
 from .objectives import load_objectives
 from .config import load_config, DEFAULT_CONFIG
+from ..core.dedup import find_near_duplicates
+from ..core.patching import patch_refine
+from ..core.speculation import SpeculationStore, design_inputs, speculation_key
+from ..core.story_fanout import (
+    cluster_objectives, generate_cluster_stories, latest_objective_stories, merge_stories, reuse_objective_stories
+)
 
 USERSTORIES_FILE = 'bob_userstories.yaml'
 
@@ -12,8 +19,7 @@ def load_user_stories():
     """Load existing user stories from file"""
     if os.path.exists(USERSTORIES_FILE):
         try:
-            with open(USERSTORIES_FILE, 'r') as f:
-                return yaml.safe_load(f) or {"user_stories": [], "created_at": "", "updated_at": ""}
+            return cached_load(USERSTORIES_FILE, yaml.safe_load) or {"user_stories": [], "created_at": "", "updated_at": ""}
         except yaml.YAMLError:
             return {"user_stories": [], "created_at": "", "updated_at": ""}
     return {"user_stories": [], "created_at": "", "updated_at": ""}
@@ -27,20 +33,83 @@ def represent_str_multiline(dumper, data):
 def save_user_stories(stories_data):
     """Save user stories to file with multiline format"""
     yaml.add_representer(str, represent_str_multiline)
-    with open(USERSTORIES_FILE, 'w') as f:
-        yaml.dump(stories_data, f, default_flow_style=False, sort_keys=False, allow_unicode=True, indent=2)
+    content = yaml.dump(stories_data, default_flow_style=False, sort_keys=False, allow_unicode=True, indent=2)
+    with file_lock(USERSTORIES_FILE):
+        atomic_write(USERSTORIES_FILE, content)
 
-@click.command()
+def update_user_stories(mutate):
+    """Apply mutate to the latest user stories on disk and save it under the file lock"""
+    return locked_update(USERSTORIES_FILE, load_user_stories, save_user_stories, mutate)
+
+def refine_stories(ai_provider, stories, refinement, config):
+    """Refine user stories based on feedback, as edits to apply when refine_mode is 'patch'"""
+    def regenerate():
+        return ai_provider.get_response(
+            f"Previous user stories:\n{stories}\n\nRefine based on this feedback: {refinement}",
+            task='refine'
+        )
+
+    if config.get('refine_mode', DEFAULT_CONFIG['refine_mode']) != 'patch':
+        return regenerate()
+
+    def fallback(reason):
+        click.echo(f"\nCould not apply the edits ({reason}); regenerating the full user stories", err=True)
+
+    response, _ = patch_refine(ai_provider, stories, refinement, regenerate, kind='list of user stories',
+                               on_fallback=fallback)
+    return response
+
+def generate_stories_fan_out(ai_provider, objectives_list, config):
+    """Generate stories per cluster of objectives in parallel and merge them into one list.
+
+    Objectives unchanged since the last fan-out keep their stories. Returns
+    (merged stories, per-objective stories keyed by objective ID).
+    """
+    previous = latest_objective_stories(load_user_stories()['user_stories'])
+    results, stale = reuse_objective_stories(objectives_list, previous)
+    click.echo(f"Generating stories for {len(stale)} of {len(objectives_list)} objectives "
+               f"({len(results)} unchanged since the last run)")
+    clusters = cluster_objectives(stale, config.get('story_cluster_size', DEFAULT_CONFIG['story_cluster_size']))
+    if clusters:
+        workers = config.get('story_workers', DEFAULT_CONFIG['story_workers'])
+        with click.progressbar(length=len(clusters), label='Generating user stories') as bar:
+            results.update(generate_cluster_stories(ai_provider, clusters, workers, on_cluster=lambda cluster: bar.update(1)))
+    missing = sum(1 for obj in stale if obj['id'] not in results)
+    if missing:
+        click.echo(f"Warning: no stories were generated for {missing} objective(s); "
+                   "they will be retried on the next run", err=True)
+    return merge_stories(objectives_list, results), results
+
+def speculate_design(objectives_list, draft_stories, config, ai_provider):
+    """Start generating the design for stories the user is still reviewing, cancelling earlier drafts"""
+    user_stories_list = load_user_stories()['user_stories'] + [draft_stories]
+    key = speculation_key('design', design_inputs(objectives_list, user_stories_list, None, config), ai_provider)
+    store = SpeculationStore()
+    store.start(key, 'design', {"objectives": objectives_list, "user_stories": user_stories_list})
+    store.cancel_except(('design',), [key])
+
+@click.group(invoke_without_command=True)
 @click.option('--interactive/--no-interactive', default=True, help='Enable/disable interactive mode')
-def user_stories(interactive):
+@click.option('--speculative/--no-speculative', default=None,
+              help='Generate the design in the background while you review (default: speculative in bob_config.json)')
+@click.option('--fan-out/--no-fan-out', default=None,
+              help='Generate stories per objective cluster in parallel, reusing those of unchanged objectives '
+                   '(default: when there are more objectives than story_fan_out_threshold)')
+@click.pass_context
+def user_stories(ctx, interactive, speculative, fan_out):
     """Generate user stories based on completed objectives"""
+    if ctx.invoked_subcommand is not None:
+        return
+
     try:
         config = load_config()
     except click.Abort:
         config = DEFAULT_CONFIG
+    if speculative is None:
+        speculative = config.get('speculative', False)
         
-    ai_model = config.get('ai_model', 'chatgpt')
-    ai_provider = AIProvider(ai_model)
+    # Models are chosen per task by the routing profile in llm_config.json
+    ai_provider = get_ai_provider()
     
     try:
         with click.progressbar(length=1, label='Loading objectives') as bar:
@@ -48,42 +117,47 @@ def user_stories(interactive):
             objectives_list = data.get('objectives', [])
             bar.update(1)
         
-        if not objectives_list:
-            click.echo("No objectives found.")
-            return
-            
     except Exception as e:
-        click.echo(f"Error loading objectives: {str(e)}")
-        return
+        raise click.ClickException(f"Error loading objectives: {str(e)}")
 
-    # Create context from objectives
-    objectives_context = "Here are the objectives:\n"
-    for idx, obj in enumerate(objectives_list, 1):
-        title = obj.get('title', 'Untitled')
-        description = obj.get('description', 'No description')
-        objectives_context += f"{idx}. {title}: {description}\n"
-    
-    prompt = (
-        "You are a product manager helping to create user stories from objectives. "
-        "Each user story should follow the format: 'As a [type of user], I want [goal] so that [benefit]'.\n\n"
-        f"{objectives_context}\n"
-        "Please generate user stories based on these objectives. "
-        "Focus on the value delivered to different types of users. "
-        "Return the user stories as a numbered list."
-    )
-    
-    with click.progressbar(length=1, label='Generating user stories') as bar:
-        response = ai_provider.get_response(prompt)
-        bar.update(1)
+    if not objectives_list:
+        raise click.ClickException("No objectives found.")
+
+    if fan_out is None:
+        threshold = config.get('story_fan_out_threshold', DEFAULT_CONFIG['story_fan_out_threshold'])
+        fan_out = bool(threshold) and len(objectives_list) > threshold
+
+    objective_stories = None
+    if fan_out:
+        response, objective_stories = generate_stories_fan_out(ai_provider, objectives_list, config)
+    else:
+        # Create context from objectives
+        objectives_context = "Here are the objectives:\n"
+        for idx, obj in enumerate(objectives_list, 1):
+            title = obj.get('title', 'Untitled')
+            description = obj.get('description', 'No description')
+            objectives_context += f"{idx}. {title}: {description}\n"
+
+        prompt = (
+            "You are a product manager helping to create user stories from objectives. "
+            "Each user story should follow the format: 'As a [type of user], I want [goal] so that [benefit]'.\n\n"
+            f"{objectives_context}\n"
+            "Please generate user stories based on these objectives. "
+            "Focus on the value delivered to different types of users. "
+            "Return the user stories as a numbered list."
+        )
+
+        with click.progressbar(length=1, label='Generating user stories') as bar:
+            response = ai_provider.get_response(prompt, task='stories')
+            bar.update(1)
     
+    if not (response or '').strip():
+        # get_response returns "" when the provider request failed
+        raise click.ClickException("No user stories were generated, so nothing was saved")
+
     click.echo("\nGenerated User Stories:")
     click.echo(response)
     
-    # Load existing user stories or create new structure
-    stories_data = load_user_stories()
-    if not stories_data['created_at']:
-        stories_data['created_at'] = datetime.now().isoformat()
-    
     # Create new user stories entry
     new_stories = {
         "generated_at": datetime.now().isoformat(),
@@ -91,31 +165,48 @@ def user_stories(interactive):
         "stories": response,
         "refined_stories": []
     }
+    if objective_stories is not None:
+        new_stories["objective_stories"] = objective_stories
     
-    if interactive:
-        while click.confirm("\nWould you like to refine these user stories?"):
-            refinement = click.prompt("What would you like to clarify or modify?")
-            with click.progressbar(length=1, label='Refining user stories') as bar:
-                response = ai_provider.get_response(
-                    f"Previous user stories:\n{response}\n\nRefine based on this feedback: {refinement}"
-                )
-                bar.update(1)
-            click.echo("\nUpdated User Stories:")
-            click.echo(response)
-            new_stories["refined_stories"].append({
-                "refinement_prompt": refinement,
-                "refined_result": response,
-                "refined_at": datetime.now().isoformat()
-            })
-    
-    # Add new stories to the data
-    stories_data['user_stories'].append(new_stories)
-    stories_data['updated_at'] = datetime.now().isoformat()
-    
-    # Save to file
-    with click.progressbar(length=1, label='Saving user stories') as bar:
-        save_user_stories(stories_data)
-        bar.update(1)
+    if speculative:
+        speculate_design(objectives_list, new_stories, config, ai_provider)
+
+    try:
+        if interactive:
+            while click.confirm("\nWould you like to refine these user stories?"):
+                if speculative:
+                    # Work started for the current draft will not be used
+                    SpeculationStore().cancel_except(('design',), [])
+                refinement = click.prompt("What would you like to clarify or modify?")
+                with click.progressbar(length=1, label='Refining user stories') as bar:
+                    response = refine_stories(ai_provider, response, refinement, config)
+                    bar.update(1)
+                click.echo("\nUpdated User Stories:")
+                click.echo(response)
+                new_stories["refined_stories"].append({
+                    "refinement_prompt": refinement,
+                    "refined_result": response,
+                    "refined_at": datetime.now().isoformat()
+                })
+                if speculative:
+                    speculate_design(objectives_list, new_stories, config, ai_provider)
+        
+        # Add new stories to the latest data on disk and save
+        def append_stories(stories_data):
+            now = datetime.now().isoformat()
+            if not stories_data['created_at']:
+                stories_data['created_at'] = now
+            stories_data['user_stories'].append(new_stories)
+            stories_data['updated_at'] = now
+
+        with click.progressbar(length=1, label='Saving user stories') as bar:
+            update_user_stories(append_stories)
+            bar.update(1)
+    except BaseException:
+        if speculative:
+            # The draft was abandoned
+            SpeculationStore().cancel_except(('design',), [])
+        raise
     
     click.echo(f"\nUser stories have been saved to {USERSTORIES_FILE}")
     click.echo("\nNote: You can manually edit the user stories in the following ways:")
@@ -126,5 +217,80 @@ def user_stories(interactive):
     click.echo("     - objectives_snapshot: Objectives used for generation")
     click.echo("     - stories: The generated user stories")
     click.echo("     - refined_stories: List of any refinements made")
+    click.echo("     - objective_stories: Stories per objective ID (--fan-out), reused while the objective is unchanged")
     click.echo("3. Feel free to modify the stories or add new ones while maintaining the YAML structure")
-    click.echo("4. You can also use the interactive refinement option to let AI help with modifications") 
\ No newline at end of file
+    click.echo("4. You can also use the interactive refinement option to let AI help with modifications")
+
+def latest_group_text(story_group):
+    """Get the most recent version of a story group's stories"""
+    refinements = story_group.get('refined_stories', [])
+    if refinements:
+        return refinements[-1].get('refined_result', '')
+    return story_group.get('stories', '')
+
+@user_stories.command()
+@click.option('--threshold', type=click.FloatRange(0.0, 1.0), default=None,
+              help='Similarity at or above which stories count as duplicates (default: dedup_threshold from bob_config.json)')
+@click.option('--dry-run', is_flag=True, help='Only report near-duplicates')
+def dedup(threshold, dry_run):
+    """Remove near-duplicate story groups and refinements"""
+    if threshold is None:
+        try:
+            config = load_config()
+        except click.Abort:
+            config = DEFAULT_CONFIG
+        threshold = config.get('dedup_threshold') or DEFAULT_CONFIG['dedup_threshold']
+
+    def find_duplicates(stories_data):
+        groups = stories_data['user_stories']
+        # A group duplicates a later group if their latest versions match
+        drop_groups = {
+            i: (j, score)
+            for i, j, score in find_near_duplicates([latest_group_text(group) for group in groups], threshold)
+        }
+        # A refinement duplicates the next version of its group if it barely changed anything
+        drop_refinements = {}
+        for group_idx, group in enumerate(groups):
+            if group_idx in drop_groups:
+                continue
+            versions = [group.get('stories', '')] + [
+                refinement.get('refined_result', '') for refinement in group.get('refined_stories', [])
+            ]
+            duplicates = sorted(
+                i - 1 for i, j, _ in find_near_duplicates(versions, threshold) if i > 0 and j == i + 1
+            )
+            if duplicates:
+                drop_refinements[group_idx] = duplicates
+        return drop_groups, drop_refinements
+
+    stories_data = load_user_stories()
+    drop_groups, drop_refinements = find_duplicates(stories_data)
+    if not drop_groups and not drop_refinements:
+        click.echo("No near-duplicate user stories found.")
+        return
+
+    groups = stories_data['user_stories']
+    for i, (j, score) in sorted(drop_groups.items()):
+        click.echo(f"Story group {i + 1} ({groups[i].get('generated_at', '')}) "
+                   f"duplicates group {j + 1} ({score:.0%} similar)")
+    for group_idx, refinement_idxs in sorted(drop_refinements.items()):
+        click.echo(f"Story group {group_idx + 1}: {len(refinement_idxs)} refinement(s) duplicate the following version")
+
+    if dry_run or not click.confirm("\nRemove these duplicates?"):
+        return
+
+    def remove_duplicates(stories_data):
+        # Recompute under the lock in case the file changed meanwhile
+        drop_groups, drop_refinements = find_duplicates(stories_data)
+        for group_idx, refinement_idxs in drop_refinements.items():
+            refinements = stories_data['user_stories'][group_idx]['refined_stories']
+            for idx in reversed(refinement_idxs):
+                del refinements[idx]
+        stories_data['user_stories'] = [
+            group for idx, group in enumerate(stories_data['user_stories']) if idx not in drop_groups
+        ]
+        stories_data['updated_at'] = datetime.now().isoformat()
+        return len(drop_groups), sum(len(idxs) for idxs in drop_refinements.values())
+
+    removed_groups, removed_refinements = update_user_stories(remove_duplicates)
+    click.echo(f"Removed {removed_groups} story group(s) and {removed_refinements} refinement(s).")
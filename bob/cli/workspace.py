@@ -0,0 +1,99 @@
+import os
+import sys
+import click
+from ..core.workspace import (
+    WorkspaceRunner, WORKSPACE_STAGES, discover_projects, project_name, load_report, DONE
+)
+
+def format_seconds(seconds):
+    if seconds >= 60:
+        return f"{int(seconds // 60)}m{seconds % 60:04.1f}s"
+    return f"{seconds:.1f}s"
+
+def format_result(result):
+    """Format a project result as a single status line"""
+    stages = '  '.join(
+        f"{entry['stage']}={entry['status']}" + (f" ({format_seconds(entry['seconds'])})" if entry['seconds'] else '')
+        for entry in result['stages']
+    )
+    return f"{result['status']:<10} {format_seconds(result['seconds']):>9}  {result['project']}  {stages}"
+
+def print_report(report):
+    """Print the aggregated summary of a workspace run"""
+    click.echo("----------------------------------------")
+    counts = ', '.join(f"{count} {status}" for status, count in sorted(report['counts'].items()))
+    click.echo(f"{len(report['projects'])} projects: {counts or 'none'}")
+    click.echo(f"Wall time {format_seconds(report['seconds'])}, speedup x{report['speedup']:.1f}")
+    for stage, totals in report['stage_totals'].items():
+        if totals['runs']:
+            average = totals['total_seconds'] / totals['runs']
+            click.echo(
+                f"  {stage:<13} {totals['runs']} runs, avg {format_seconds(average)}, "
+                f"max {format_seconds(totals['max_seconds'])}, total {format_seconds(totals['total_seconds'])}"
+            )
+    failed = [result for result in report['projects'] if result['status'] != DONE]
+    for result in failed:
+        click.echo(f"  {result['status']}: {result['project']} (log: {result['log']})")
+
+@click.group()
+def workspace():
+    """Run pipeline stages across all bob projects under a directory"""
+    pass
+
+@workspace.command()
+@click.option('--root', type=click.Path(exists=True, file_okay=False), default='.', help='Directory to search for projects')
+@click.option('--max-depth', type=int, default=None, help='How many directory levels to search')
+def list(root, max_depth):
+    """List the bob projects found under the root"""
+    projects = discover_projects(root, max_depth)
+    if not projects:
+        click.echo("No bob projects found.")
+        return
+    for project in projects:
+        click.echo(project_name(os.path.abspath(root), project))
+
+@workspace.command()
+@click.argument('stages', nargs=-1, required=True, type=click.Choice(WORKSPACE_STAGES))
+@click.option('--root', type=click.Path(exists=True, file_okay=False), default='.', help='Directory to search for projects')
+@click.option('--max-depth', type=int, default=None, help='How many directory levels to search')
+@click.option('--workers', '-j', type=int, default=4, help='Number of projects to run at once')
+@click.option('--llm-concurrency', type=int, default=None, help='Maximum LLM requests in flight across all projects')
+@click.option('--project', '-p', 'only', multiple=True, help='Only run projects whose path contains this text')
+def run(stages, root, max_depth, workers, llm_concurrency, only):
+    """Run STAGES (user-stories, design, test, docs) in every project"""
+    root = os.path.abspath(root)
+    projects = discover_projects(root, max_depth)
+    if only:
+        projects = [project for project in projects if any(text in project_name(root, project) for text in only)]
+    if not projects:
+        click.echo("No bob projects found.")
+        return
+
+    runner = WorkspaceRunner(
+        root, stages, workers=workers, llm_concurrency=llm_concurrency,
+        on_result=lambda result: click.echo(format_result(result))
+    )
+    cap = f", at most {llm_concurrency} LLM requests at once" if llm_concurrency else ''
+    click.echo(f"Running {' -> '.join(runner.stages)} in {len(projects)} projects with {runner.workers} workers{cap}")
+    try:
+        report = runner.run(projects)
+    except KeyboardInterrupt:
+        click.echo("\nInterrupted; running stages were stopped.")
+        sys.exit(130)
+
+    print_report(report)
+    if any(result['status'] != DONE for result in report['projects']):
+        sys.exit(1)
+
+@workspace.command()
+@click.option('--root', type=click.Path(exists=True, file_okay=False), default='.', help='Workspace root')
+def report(root):
+    """Show the report of the last workspace run"""
+    saved = load_report(root)
+    if saved is None:
+        click.echo("No workspace run found.")
+        return
+    click.echo(f"Run started {saved['started_at']}: {' -> '.join(saved['stages'])}")
+    for result in saved['projects']:
+        click.echo(format_result(result))
+    print_report(saved)
@@ -0,0 +1,190 @@
+import json
+import os
+import platform
+import random
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from .storage import atomic_write
+
+BASELINE_FILE = 'bob_bench_baseline.json'
+
+# Project sizes to benchmark: objectives, story groups, designs and refinements per design
+SCALES = {
+    'small': {"objectives": 1000, "story_groups": 100, "designs": 50, "refinements": 2},
+    'large': {"objectives": 10000, "story_groups": 1000, "designs": 500, "refinements": 2},
+}
+
+# Timings below this are dominated by noise and never count as regressions
+MIN_SECONDS = 0.005
+
+_WORDS = (
+    "account admin api audit backup batch billing cache catalog checkout client config customer dashboard "
+    "data deploy device email event export feed file filter form import invoice job log login message "
+    "metric mobile notification order page payment permission plan profile query queue report request "
+    "role schedule search session setting share signup storage stream subscription sync task team "
+    "template ticket token upload user version webhook workflow"
+).split()
+_ROLES = ["user", "admin", "guest", "developer", "manager", "customer", "support agent", "auditor"]
+
+def _phrase(rng, words):
+    return ' '.join(rng.choice(_WORDS) for _ in range(words))
+
+def _stories_text(rng, count):
+    return '\n'.join(
+        f"{idx}. As a {rng.choice(_ROLES)}, I want to {_phrase(rng, 6)} so that I can {_phrase(rng, 5)}"
+        for idx in range(1, count + 1)
+    )
+
+def _structured_design(rng, classes=5, methods=4):
+    names = [f"{rng.choice(_WORDS).title()}{rng.choice(_WORDS).title()}{idx}" for idx in range(classes)]
+    return {
+        "classes": [{
+            "name": name,
+            "responsibility": _phrase(rng, 10),
+            "methods": [{
+                "name": f"{rng.choice(_WORDS)}_{rng.choice(_WORDS)}",
+                "signature": f"({rng.choice(_WORDS)}: str) -> bool",
+                "description": _phrase(rng, 12),
+                "parameters": [{"name": rng.choice(_WORDS), "type": "str", "description": _phrase(rng, 6)}],
+                "returns": "bool",
+            } for _ in range(methods)],
+        } for name in names],
+        "relationships": [
+            {"source": names[idx], "target": names[idx + 1], "type": "uses", "description": _phrase(rng, 6)}
+            for idx in range(classes - 1)
+        ],
+        "patterns": ["Repository", "Strategy"],
+    }
+
+def synthetic_project(objectives=1000, story_groups=100, designs=50, refinements=2, seed=0):
+    """Generate deterministic objectives, user stories and design data of the given size.
+
+    Returns (objectives_data, stories_data, design_data) shaped like the
+    bob_*.yaml files. Snapshots inside story groups and designs hold a
+    bounded sample of objectives rather than all of them, so the size of
+    the files grows linearly with the counts.
+    """
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1)
+    stamp = lambda minutes: (start + timedelta(minutes=minutes)).isoformat()
+    priorities = ['high', 'medium', 'low']
+
+    objective_list = [{
+        "id": f"O{idx}",
+        "title": _phrase(rng, 4).capitalize(),
+        "description": f"{_phrase(rng, 20).capitalize()}.\n{_phrase(rng, 15).capitalize()}.",
+        "priority": rng.choice(priorities),
+        "added_at": stamp(idx),
+    } for idx in range(1, objectives + 1)]
+    objectives_data = {
+        "objectives": objective_list,
+        "created_at": stamp(0),
+        "updated_at": stamp(objectives),
+        "next_id": objectives + 1,
+    }
+
+    def snapshot(count):
+        return rng.sample(objective_list, min(count, len(objective_list)))
+
+    groups = [{
+        "generated_at": stamp(objectives + idx),
+        "objectives_snapshot": snapshot(10),
+        "stories": _stories_text(rng, 8),
+        "refined_stories": [{
+            "refinement_prompt": _phrase(rng, 8),
+            "refined_result": _stories_text(rng, 8),
+            "refined_at": stamp(objectives + idx),
+        } for _ in range(refinements)],
+    } for idx in range(story_groups)]
+    stories_data = {"user_stories": groups, "created_at": stamp(objectives), "updated_at": stamp(objectives + story_groups)}
+
+    design_list = []
+    for idx in range(designs):
+        structured = _structured_design(rng)
+        design_list.append({
+            "generated_at": stamp(objectives + story_groups + idx),
+            "objectives_snapshot": snapshot(20),
+            "user_stories_snapshot": [group['stories'] for group in rng.sample(groups, min(5, len(groups)))],
+            "design": '\n'.join(f"## {cls['name']}\n{cls['responsibility']}" for cls in structured['classes']),
+            "structured_design": structured,
+            "design_index": None,
+            "refined_designs": [{
+                "refinement_prompt": _phrase(rng, 8),
+                "refined_result": '\n'.join(_phrase(rng, 12) for _ in range(20)),
+                "structured_design": structured,
+                "design_index": None,
+                "refined_at": stamp(objectives + story_groups + idx),
+            } for _ in range(refinements)],
+        })
+    design_data = {"designs": design_list, "created_at": stamp(0), "updated_at": stamp(objectives + story_groups + designs)}
+    return objectives_data, stories_data, design_data
+
+def measure(fn, setup=None, repeat=3, memory=True):
+    """Time fn (best of repeat runs) and measure its peak traced memory in one more run.
+
+    setup, if given, runs untimed before every call. With memory=False
+    the traced run is skipped and peak_kb is None.
+    """
+    best = None
+    for _ in range(max(1, repeat)):
+        if setup:
+            setup()
+        started = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+
+    if not memory:
+        return {"seconds": round(best, 6), "peak_kb": None}
+
+    # Tracing slows Python down a lot, so memory is measured separately
+    if setup:
+        setup()
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"seconds": round(best, 6), "peak_kb": peak // 1024}
+
+def load_baseline(path=BASELINE_FILE):
+    """Load saved benchmark baselines, keyed by scale then case"""
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+def save_baseline(path, scale, results):
+    """Record results as the baseline for scale, keeping baselines for other scales"""
+    baselines = load_baseline(path)
+    baselines[scale] = {
+        "recorded_at": datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cases": results,
+    }
+    atomic_write(path, json.dumps(baselines, indent=2, sort_keys=True))
+
+def compare(results, baseline, time_threshold=1.5, memory_threshold=1.5):
+    """Compare results with baseline cases. Returns a list of regression descriptions.
+
+    A case regresses if it is more than time_threshold times slower (and
+    slower by at least MIN_SECONDS) or uses more than memory_threshold
+    times the peak memory of its baseline.
+    """
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        if (result['seconds'] > base['seconds'] * time_threshold
+                and result['seconds'] - base['seconds'] >= MIN_SECONDS):
+            regressions.append(f"{name}: {result['seconds']:.3f}s vs baseline {base['seconds']:.3f}s")
+        if base.get('peak_kb') and result['peak_kb'] and result['peak_kb'] > base['peak_kb'] * memory_threshold:
+            regressions.append(f"{name}: {result['peak_kb']} KB peak vs baseline {base['peak_kb']} KB")
+    return regressions
@@ -0,0 +1,60 @@
+import threading
+
+class CancelToken:
+    """A flag that cancels an in-flight request from another thread.
+
+    Requests register a close function for their HTTP response or stream
+    with on_cancel, so cancelling aborts a blocked read instead of waiting
+    for the next chunk to arrive.
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._closers = []
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+    def cancel(self):
+        with self._lock:
+            self._event.set()
+            closers, self._closers = self._closers, []
+        for close in closers:
+            try:
+                close()
+            except Exception:
+                pass
+
+    def on_cancel(self, close):
+        """Call close when the token is cancelled (now, if it already is). Returns a function that unregisters it"""
+        with self._lock:
+            if not self._event.is_set():
+                self._closers.append(close)
+                return lambda: self._discard(close)
+        close()
+        return lambda: None
+
+    def _discard(self, close):
+        with self._lock:
+            if close in self._closers:
+                self._closers.remove(close)
+
+def cancellable(chunks, cancel):
+    """Pass a stream of chunks through, failing it with StreamAborted if cancel was cancelled.
+
+    A cancelled stream simply ends early, which would otherwise look like a
+    complete (but short) response to whoever consumes it.
+    """
+    from .streaming import StreamAborted
+    try:
+        for chunk in chunks:
+            yield chunk
+            if cancel is not None and cancel.cancelled:
+                break
+    finally:
+        if hasattr(chunks, 'close'):
+            chunks.close()
+    if cancel is not None and cancel.cancelled:
+        raise StreamAborted("cancelled")
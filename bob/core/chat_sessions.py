@@ -0,0 +1,220 @@
+import json
+import os
+import secrets
+import threading
+from datetime import datetime
+from .storage import atomic_write, file_lock
+from .summarize import estimate_tokens, map_reduce_summarize
+
+# Sessions are per user rather than per project, since chat also works outside one
+SESSIONS_DIR = os.path.join(os.path.expanduser('~'), '.bob', 'chat_sessions')
+SESSION_SUFFIX = '.jsonl'
+SUMMARY_SUFFIX = '.summary.json'
+
+# Bytes read per step when scanning a session log backwards
+TAIL_BLOCK_SIZE = 64 * 1024
+
+def format_turn(turn):
+    speaker = 'User' if turn.get('role') == 'user' else 'Assistant'
+    return f"{speaker}: {turn.get('content', '')}"
+
+def read_tail(path, max_tokens, block_size=TAIL_BLOCK_SIZE):
+    """Read the most recent turns of a session log that fit in max_tokens.
+
+    The file is read backwards block by block, so only the tail is touched
+    however long the session is. Returns [(byte offset, turn)] oldest first.
+    """
+    turns = []
+    tokens = 0
+    with open(path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        pos = f.tell()
+        buffer = b''
+        while pos > 0:
+            read = min(block_size, pos)
+            pos -= read
+            f.seek(pos)
+            buffer = f.read(read) + buffer
+            lines = buffer.split(b'\n')
+            # The first line may continue in the previous block
+            buffer = lines[0] if pos > 0 else b''
+            complete = lines[1:] if pos > 0 else lines
+            offset = pos + len(buffer) + (1 if pos > 0 else 0)
+            offsets = []
+            for line in complete:
+                offsets.append(offset)
+                offset += len(line) + 1
+            for line_offset, line in reversed(list(zip(offsets, complete))):
+                if not line.strip():
+                    continue
+                try:
+                    turn = json.loads(line)
+                except ValueError:
+                    # A line cut short by a crash while writing
+                    continue
+                cost = estimate_tokens(format_turn(turn))
+                if tokens + cost > max_tokens:
+                    return turns[::-1]
+                tokens += cost
+                turns.append((line_offset, turn))
+    return turns[::-1]
+
+def read_range(path, start, end):
+    """Read the turns stored between two byte offsets of a session log"""
+    with open(path, 'rb') as f:
+        f.seek(start)
+        data = f.read(max(0, end - start))
+    turns = []
+    for line in data.split(b'\n'):
+        if line.strip():
+            try:
+                turns.append(json.loads(line))
+            except ValueError:
+                continue
+    return turns
+
+class ChatSession:
+    """A chat conversation persisted as an append-only JSON-lines log.
+
+    Older turns that no longer fit the context budget are folded into a
+    summary cached next to the log with the byte offset it covers, so a
+    resumed session only reads the tail of the log and summarizes just the
+    turns that dropped out of the tail since the summary was written.
+    """
+
+    def __init__(self, session_id, directory=SESSIONS_DIR):
+        self.id = session_id
+        self.directory = directory
+        self.path = os.path.join(directory, f"{session_id}{SESSION_SUFFIX}")
+        self.summary_path = os.path.join(directory, f"{session_id}{SUMMARY_SUFFIX}")
+        self.lock = threading.Lock()
+        self.turns = None
+        self.summary = None
+
+    @classmethod
+    def create(cls, directory=SESSIONS_DIR):
+        session_id = f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{secrets.token_hex(2)}"
+        os.makedirs(directory, exist_ok=True)
+        return cls(session_id, directory)
+
+    @classmethod
+    def find(cls, prefix, directory=SESSIONS_DIR):
+        """Get the session whose ID is prefix or uniquely starts with it. Raises KeyError"""
+        matches = [session_id for session_id in list_session_ids(directory) if session_id.startswith(prefix)]
+        if prefix in matches:
+            return cls(prefix, directory)
+        if len(matches) != 1:
+            problem = "No session matches" if not matches else f"{len(matches)} sessions match"
+            raise KeyError(f"{problem} '{prefix}'")
+        return cls(matches[0], directory)
+
+    def _load_summary(self):
+        if self.summary is None:
+            self.summary = {"offset": 0, "summary": ""}
+            if os.path.exists(self.summary_path):
+                try:
+                    with open(self.summary_path, 'r') as f:
+                        self.summary = json.load(f)
+                except (OSError, ValueError):
+                    pass
+        return self.summary
+
+    def load(self, max_tokens):
+        """Load the tail of the log that fits in max_tokens"""
+        with self.lock:
+            self.turns = read_tail(self.path, max_tokens) if os.path.exists(self.path) else []
+        return [turn for _, turn in self.turns]
+
+    def append(self, role, content, **extra):
+        """Append a turn to the log"""
+        turn = dict({"role": role, "content": content, "at": datetime.now().isoformat()}, **extra)
+        line = json.dumps(turn) + '\n'
+        with self.lock:
+            with file_lock(self.path):
+                with open(self.path, 'ab') as f:
+                    offset = f.tell()
+                    f.write(line.encode('utf-8'))
+            if self.turns is not None:
+                self.turns.append((offset, turn))
+
+    def context(self, ai_provider, max_tokens):
+        """Get (summary of older turns, recent turns) fitting in about max_tokens.
+
+        The summary covers the log up to summary['offset'] and every later
+        turn is sent as is. When that no longer fits, all but the turns
+        filling the most recent half of the budget are folded into the
+        summary in one go, so the next messages do not need another fold.
+        """
+        with self.lock:
+            if self.turns is None:
+                self.turns = read_tail(self.path, max_tokens) if os.path.exists(self.path) else []
+            summary = self._load_summary()
+            turns = [(offset, turn) for offset, turn in self.turns if offset >= summary['offset']]
+            # The loaded tail may start after the summary ends, leaving turns in between unread
+            gap = bool(self.turns) and self.turns[0][0] > summary['offset']
+            size = estimate_tokens(summary['summary']) + sum(estimate_tokens(format_turn(turn)) for _, turn in turns)
+            if not gap and size <= max_tokens:
+                return summary['summary'], [turn for _, turn in turns]
+
+            recent = []
+            budget = max_tokens // 2
+            for offset, turn in reversed(turns):
+                budget -= estimate_tokens(format_turn(turn))
+                if budget < 0:
+                    break
+                recent.append((offset, turn))
+            recent.reverse()
+            fold_to = recent[0][0] if recent else os.path.getsize(self.path)
+
+            texts = [f"Earlier summary: {summary['summary']}"] if summary['summary'] else []
+            texts += [format_turn(turn) for turn in read_range(self.path, summary['offset'], fold_to)]
+            folded = map_reduce_summarize(
+                ai_provider, texts, max(200, max_tokens // 4),
+                "Summarize this conversation between a user and an assistant, keeping facts, decisions and open questions."
+            )
+            self.summary = {"offset": fold_to, "summary": "\n".join(folded)}
+            atomic_write(self.summary_path, json.dumps(self.summary))
+            self.turns = recent
+            return self.summary['summary'], [turn for _, turn in recent]
+
+    def prompt(self, ai_provider, message, max_tokens):
+        """Build the prompt for the next message, with the conversation so far as context"""
+        summary, turns = self.context(ai_provider, max_tokens)
+        if not summary and not turns:
+            return message
+        parts = []
+        if summary:
+            parts.append(f"Summary of the earlier conversation:\n{summary}")
+        if turns:
+            parts.append("Recent conversation:\n" + "\n\n".join(format_turn(turn) for turn in turns))
+        parts.append(f"Continue the conversation. Reply to the user's new message.\n\nUser: {message}")
+        return "\n\n".join(parts)
+
+def list_session_ids(directory=SESSIONS_DIR):
+    if not os.path.isdir(directory):
+        return []
+    return sorted(
+        name[:-len(SESSION_SUFFIX)] for name in os.listdir(directory)
+        if name.endswith(SESSION_SUFFIX)
+    )
+
+def list_sessions(directory=SESSIONS_DIR):
+    """Describe saved sessions, most recently active first, reading only each log's first line"""
+    sessions = []
+    for session_id in list_session_ids(directory):
+        path = os.path.join(directory, f"{session_id}{SESSION_SUFFIX}")
+        first = ''
+        try:
+            with open(path, 'r') as f:
+                first = json.loads(f.readline() or '{}').get('content', '')
+        except (OSError, ValueError):
+            pass
+        stat = os.stat(path)
+        sessions.append({
+            "id": session_id,
+            "updated_at": datetime.fromtimestamp(stat.st_mtime).isoformat(timespec='seconds'),
+            "size": stat.st_size,
+            "first_message": first,
+        })
+    sessions.sort(key=lambda session: session['updated_at'], reverse=True)
+    return sessions
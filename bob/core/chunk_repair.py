@@ -0,0 +1,116 @@
+import re
+from .streaming import TOP_LEVEL_PATTERN
+
+FENCED_CODE_PATTERN = re.compile(r"```[a-zA-Z]*\n(.*?)```", re.DOTALL)
+FIXTURE_PATTERN = re.compile(r"^@(pytest\.)?fixture\b")
+
+class RepairFailed(Exception):
+    """Raised when broken chunks could not be repaired"""
+
+def _compiles(text):
+    try:
+        compile(text, '<chunk>', 'exec')
+    except (SyntaxError, ValueError):
+        return False
+    return True
+
+def _classify(text):
+    first = text.lstrip()
+    if first.startswith(('import ', 'from ')):
+        return 'imports'
+    if FIXTURE_PATTERN.match(first):
+        return 'fixture'
+    if re.match(r"^(@.*\n)*(async )?def test|^(@.*\n)*class Test", first):
+        return 'test'
+    return 'other'
+
+def split_chunks(code):
+    """Split module source into top-level chunks as [{'kind', 'text'}].
+
+    Boundaries are found from line starts, so this works on code that does
+    not parse as a whole. Consecutive import lines form one chunk, and a
+    chunk that only compiles together with the next one (for example a
+    multi-line string with unindented lines) is merged with it.
+    """
+    lines = code.splitlines(keepends=True)
+    pieces = []
+    current = []
+    for line in lines:
+        starts_block = TOP_LEVEL_PATTERN.match(line) and not (current and current[-1].startswith('@'))
+        continues_imports = current and _classify(''.join(current)) == 'imports' and line.startswith(('import ', 'from '))
+        if current and starts_block and not continues_imports:
+            pieces.append(''.join(current))
+            current = []
+        current.append(line)
+    if current:
+        pieces.append(''.join(current))
+
+    merged = []
+    idx = 0
+    while idx < len(pieces):
+        text = pieces[idx]
+        # Grow a failing chunk while doing so makes it compile
+        end = idx + 1
+        if not _compiles(text):
+            for lookahead in range(idx + 1, min(len(pieces), idx + 6)):
+                candidate = ''.join(pieces[idx:lookahead + 1])
+                if _compiles(candidate):
+                    text = candidate
+                    end = lookahead + 1
+                    break
+        merged.append({"kind": _classify(text), "text": text})
+        idx = end
+    return merged
+
+def broken_chunks(chunks):
+    """Get indexes of chunks that fail to compile"""
+    return [idx for idx, chunk in enumerate(chunks) if not _compiles(chunk['text'])]
+
+def extract_code(response):
+    """Get the code from a model response, stripping any code fence"""
+    match = FENCED_CODE_PATTERN.search(response or '')
+    return match.group(1) if match else (response or '')
+
+def repair_chunk(chunk, imports, ai_provider, max_attempts=3):
+    """Ask the model to fix one broken chunk until it compiles. Returns the fixed text"""
+    text = chunk['text']
+    for _ in range(max_attempts):
+        error = ''
+        try:
+            compile(text, '<chunk>', 'exec')
+        except SyntaxError as e:
+            error = f"{e.msg} (line {e.lineno})"
+        response = ai_provider.get_response(
+            "The following top-level chunk of a pytest module has a syntax error"
+            f"{': ' + error if error else ''}. Return only the corrected chunk, with no explanation. "
+            "Do not add imports; the module already has these:\n"
+            f"{imports or '(none)'}\n\nChunk:\n{text}",
+            task='repair'
+        )
+        fixed = extract_code(response)
+        if fixed.strip() and _compiles(fixed):
+            return fixed
+        text = fixed if fixed.strip() else text
+    raise RepairFailed(f"could not repair {chunk['kind']} chunk starting: {chunk['text'].splitlines()[0][:60]}")
+
+def repair_module(code, ai_provider, max_attempts=3):
+    """Repair only the chunks of code that fail to compile and splice them back in.
+
+    Returns (code, number of chunks repaired).
+    """
+    if _compiles(code):
+        return code, 0
+    chunks = split_chunks(code)
+    broken = broken_chunks(chunks)
+    imports = ''.join(chunk['text'] for chunk in chunks if chunk['kind'] == 'imports' and _compiles(chunk['text']))
+    for idx in broken:
+        original = chunks[idx]['text']
+        fixed = repair_chunk(chunks[idx], imports, ai_provider, max_attempts)
+        # Keep the blank lines that separated the chunk from the next one
+        trailing = original[len(original.rstrip()):] or '\n'
+        chunks[idx] = dict(chunks[idx], text=fixed.rstrip() + trailing)
+
+    repaired = ''.join(chunk['text'] for chunk in chunks)
+    if not _compiles(repaired):
+        raise RepairFailed("module still fails to compile after repairing its chunks")
+    return repaired, len(broken)
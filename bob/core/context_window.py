@@ -0,0 +1,37 @@
+from .summarize import estimate_tokens
+
+# Context sizes (num_ctx) requests are rounded up to. Ollama reloads the
+# model whenever num_ctx changes, so only a few distinct sizes are used.
+DEFAULT_CONTEXT_SIZES = [2048, 4096, 8192, 16384, 32768]
+
+# Output room reserved in the context for even the shortest prompts
+DEFAULT_MIN_OUTPUT_TOKENS = 1024
+
+# estimate_tokens counts characters, which undercounts code and non-English text
+ESTIMATE_MARGIN = 1.2
+
+def context_sizes(value):
+    """Parse configured context sizes into a sorted list, falling back to the defaults"""
+    try:
+        sizes = sorted({int(size) for size in value or [] if int(size) > 0})
+    except (TypeError, ValueError):
+        sizes = []
+    return sizes or list(DEFAULT_CONTEXT_SIZES)
+
+def size_context(prompt, max_tokens, sizes=DEFAULT_CONTEXT_SIZES, min_output=DEFAULT_MIN_OUTPUT_TOKENS):
+    """Pick (num_ctx, num_predict, fits) for a prompt.
+
+    The context must hold the prompt plus room for the output: as much as
+    the prompt itself, but at least min_output and at most max_tokens, so
+    short prompts get a small context and long ones room for a long
+    answer. num_ctx is the smallest of sizes that holds both and
+    num_predict is max_tokens limited to what is left of it; a longer
+    answer stops at the limit and is continued. fits is False if the
+    prompt does not fit even the largest size, which makes the server
+    drop the start of it.
+    """
+    prompt_tokens = int(estimate_tokens(prompt) * ESTIMATE_MARGIN)
+    output = min(max_tokens, max(min_output, prompt_tokens))
+    num_ctx = next((size for size in sizes if prompt_tokens + output <= size), sizes[-1])
+    num_predict = min(max_tokens, max(min_output, num_ctx - prompt_tokens))
+    return num_ctx, num_predict, prompt_tokens < num_ctx
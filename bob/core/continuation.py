@@ -0,0 +1,70 @@
+import re
+
+# How much of the end of the previous output to compare against the start of a continuation
+OVERLAP_WINDOW = 400
+
+CONTINUE_INSTRUCTION = (
+    "Your previous response was cut off by the output limit. Continue it exactly where it stopped, "
+    "starting mid-sentence or mid-line if needed. Do not repeat anything already written, "
+    "do not restart code blocks and do not add any introduction."
+)
+
+_FENCE_LINE_PATTERN = re.compile(r"^\s*```")
+_LEADING_FENCE_PATTERN = re.compile(r"^\s*```[A-Za-z0-9_+-]*[ \t]*\n")
+
+def continuation_messages(prompt, partial, prefill=False):
+    """Build the chat messages that ask a model to continue a truncated response.
+
+    With prefill (Anthropic) the partial response is the final assistant turn
+    and the model extends it directly; otherwise a user turn asks it to go on.
+    """
+    if prefill:
+        # The API rejects a final assistant turn that ends in whitespace
+        return [
+            {"role": "user", "content": prompt},
+            {"role": "assistant", "content": partial.rstrip()},
+        ]
+    return [
+        {"role": "user", "content": prompt},
+        {"role": "assistant", "content": partial},
+        {"role": "user", "content": CONTINUE_INSTRUCTION},
+    ]
+
+def continuation_prompt(prompt, partial):
+    """Build a single prompt asking to continue a truncated response, for completion-style APIs"""
+    return (
+        f"{prompt}\n\n"
+        "You already started answering. This is your response so far:\n"
+        f"<partial_response>\n{partial}\n</partial_response>\n\n"
+        f"{CONTINUE_INSTRUCTION}"
+    )
+
+def _in_open_fence(text):
+    return sum(1 for line in text.splitlines() if _FENCE_LINE_PATTERN.match(line)) % 2 == 1
+
+def continuation_delta(previous, continuation):
+    """Get the part of continuation to append to previous.
+
+    Models often re-open the code block they were in or repeat the last
+    few words before carrying on; both are trimmed so the pieces join
+    cleanly.
+    """
+    if _in_open_fence(previous):
+        continuation = _LEADING_FENCE_PATTERN.sub('', continuation, count=1)
+
+    tail = previous[-OVERLAP_WINDOW:]
+    for size in range(min(len(tail), len(continuation)), 0, -1):
+        if tail.endswith(continuation[:size]):
+            overlap = continuation[:size]
+            # Short matches are usually coincidence (a space, a bracket),
+            # unless they are whole repeated lines
+            whole_lines = tail[:-size].endswith('\n') and overlap.endswith('\n') and overlap.strip()
+            if size >= 12 or size == len(continuation) or whole_lines:
+                return continuation[size:]
+
+    # A prefilled response is sent without its trailing whitespace, which
+    # the model then writes again
+    trailing = previous[len(previous.rstrip()):]
+    if trailing and continuation.startswith(trailing):
+        continuation = continuation[len(trailing):]
+    return continuation
@@ -0,0 +1,107 @@
+import hashlib
+import re
+from .retrieval import split_story_items
+
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+SHINGLE_SIZE = 3
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+def _permutations():
+    # Fixed parameters so signatures are stable across runs
+    params = []
+    for seed in range(NUM_PERM):
+        digest = hashlib.sha1(f"bob-minhash-{seed}".encode('utf-8')).digest()
+        a = int.from_bytes(digest[:8], 'big') % (_MERSENNE_PRIME - 1) + 1
+        b = int.from_bytes(digest[8:16], 'big') % _MERSENNE_PRIME
+        params.append((a, b))
+    return params
+
+_PERMUTATIONS = _permutations()
+_WORD_PATTERN = re.compile(r"[a-z0-9]+")
+_LIST_MARKER_PATTERN = re.compile(r"^\s*(?:\d+[.)]|[-*])\s+")
+
+def shingles(text):
+    """Get the set of word shingles of text, ignoring case, punctuation and list numbering"""
+    words = _WORD_PATTERN.findall(_LIST_MARKER_PATTERN.sub('', text).lower())
+    if len(words) < SHINGLE_SIZE:
+        return {' '.join(words)} if words else set()
+    return {' '.join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+
+def minhash(shingle_set):
+    """Compute the MinHash signature of a set of shingles"""
+    if not shingle_set:
+        return None
+    hashes = [
+        int.from_bytes(hashlib.blake2b(shingle.encode('utf-8'), digest_size=4).digest(), 'big')
+        for shingle in shingle_set
+    ]
+    return tuple(
+        min(((a * h + b) % _MERSENNE_PRIME) & _MAX_HASH for h in hashes)
+        for a, b in _PERMUTATIONS
+    )
+
+def similarity(sig_a, sig_b):
+    """Estimate the Jaccard similarity of two signatures"""
+    if sig_a is None or sig_b is None:
+        return 0.0
+    return sum(1 for x, y in zip(sig_a, sig_b) if x == y) / NUM_PERM
+
+def find_near_duplicates(texts, threshold=0.8):
+    """Find pairs of near-duplicate texts as (i, j, similarity) with i < j.
+
+    Candidate pairs come from locality-sensitive hashing over signature
+    bands, so the cost stays close to linear in the number of texts.
+    """
+    signatures = [minhash(shingles(text)) for text in texts]
+    buckets = {}
+    for idx, sig in enumerate(signatures):
+        if sig is None:
+            continue
+        for band in range(BANDS):
+            key = (band, sig[band * ROWS:(band + 1) * ROWS])
+            buckets.setdefault(key, []).append(idx)
+
+    candidates = set()
+    for members in buckets.values():
+        for pos, i in enumerate(members):
+            for j in members[pos + 1:]:
+                candidates.add((i, j))
+
+    pairs = []
+    for i, j in sorted(candidates):
+        score = similarity(signatures[i], signatures[j])
+        if score >= threshold:
+            pairs.append((i, j, score))
+    return pairs
+
+def duplicate_indexes(texts, threshold=0.8):
+    """Get indexes of texts that near-duplicate a later text, keeping the most recent version"""
+    return {i for i, _, _ in find_near_duplicates(texts, threshold)}
+
+def dedup_items(items, threshold=0.8):
+    """Drop items that near-duplicate a later item, keeping order"""
+    drop = duplicate_indexes(items, threshold)
+    return [item for idx, item in enumerate(items) if idx not in drop]
+
+def dedup_story_blocks(blocks, threshold=0.8):
+    """Remove repeated stories across story blocks given in chronological order.
+
+    Each block is split into individual stories; a story that reappears
+    (nearly) verbatim in a later block is dropped from the earlier one.
+    Blocks left with no stories are omitted.
+    """
+    items = []
+    for block_idx, block in enumerate(blocks):
+        for item in split_story_items(block or ''):
+            items.append((block_idx, item))
+    drop = duplicate_indexes([item for _, item in items], threshold)
+
+    kept = [[] for _ in blocks]
+    for idx, (block_idx, item) in enumerate(items):
+        if idx not in drop:
+            kept[block_idx].append(item)
+    return ["\n".join(block_items) for block_items in kept if block_items]
@@ -0,0 +1,190 @@
+import json
+import re
+
+try:
+    import jsonschema
+except ImportError:  # Fall back to the built-in checks below
+    jsonschema = None
+
+DESIGN_SCHEMA = {
+    "type": "object",
+    "required": ["classes"],
+    "properties": {
+        "classes": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "required": ["name", "responsibility", "methods"],
+                "properties": {
+                    "name": {"type": "string", "minLength": 1},
+                    "responsibility": {"type": "string"},
+                    "methods": {
+                        "type": "array",
+                        "items": {
+                            "type": "object",
+                            "required": ["name", "signature"],
+                            "properties": {
+                                "name": {"type": "string", "minLength": 1},
+                                "signature": {"type": "string"},
+                                "description": {"type": "string"},
+                                "parameters": {
+                                    "type": "array",
+                                    "items": {
+                                        "type": "object",
+                                        "required": ["name"],
+                                        "properties": {
+                                            "name": {"type": "string"},
+                                            "type": {"type": "string"},
+                                            "description": {"type": "string"}
+                                        }
+                                    }
+                                },
+                                "returns": {"type": "string"}
+                            }
+                        }
+                    }
+                }
+            }
+        },
+        "relationships": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "required": ["source", "target", "type"],
+                "properties": {
+                    "source": {"type": "string"},
+                    "target": {"type": "string"},
+                    "type": {"type": "string"},
+                    "description": {"type": "string"}
+                }
+            }
+        },
+        "patterns": {"type": "array", "items": {"type": "string"}}
+    }
+}
+
+STRUCTURED_DESIGN_INSTRUCTIONS = (
+    "After the design, append a single ```json fenced block that restates it as JSON "
+    "with this shape: {\"classes\": [{\"name\", \"responsibility\", \"methods\": "
+    "[{\"name\", \"signature\", \"description\", \"parameters\": [{\"name\", \"type\", \"description\"}], "
+    "\"returns\"}]}], \"relationships\": [{\"source\", \"target\", \"type\", \"description\"}], "
+    "\"patterns\": [string]}."
+)
+
+JSON_BLOCK_PATTERN = re.compile(r"```json\s*\n(.*?)```", re.DOTALL)
+
+def split_design_response(response):
+    """Split a model response into (prose, parsed JSON or None)"""
+    matches = list(JSON_BLOCK_PATTERN.finditer(response or ''))
+    if not matches:
+        return response, None
+    match = matches[-1]
+    prose = (response[:match.start()] + response[match.end():]).strip()
+    try:
+        return prose, json.loads(match.group(1))
+    except json.JSONDecodeError:
+        return prose, None
+
+def _check(value, schema, path, errors):
+    expected = schema.get('type')
+    types = {'object': dict, 'array': list, 'string': str}
+    if expected and not isinstance(value, types[expected]):
+        errors.append(f"{path}: expected {expected}")
+        return
+    if expected == 'object':
+        for key in schema.get('required', []):
+            if key not in value:
+                errors.append(f"{path}: missing '{key}'")
+        for key, subschema in schema.get('properties', {}).items():
+            if key in value:
+                _check(value[key], subschema, f"{path}.{key}", errors)
+    elif expected == 'array':
+        for idx, item in enumerate(value):
+            _check(item, schema.get('items', {}), f"{path}[{idx}]", errors)
+    elif expected == 'string' and len(value) < schema.get('minLength', 0):
+        errors.append(f"{path}: must not be empty")
+
+def validate_structured_design(data):
+    """Validate structured design data against DESIGN_SCHEMA, returning a list of errors"""
+    if jsonschema is not None:
+        validator = jsonschema.Draft7Validator(DESIGN_SCHEMA)
+        return [
+            f"$.{'.'.join(str(p) for p in error.absolute_path)}: {error.message}"
+            for error in validator.iter_errors(data)
+        ]
+    errors = []
+    _check(data, DESIGN_SCHEMA, '$', errors)
+    return errors
+
+def build_design_index(structured):
+    """Build a lookup index of class and method positions in structured design data"""
+    index = {"classes": {}, "methods": {}}
+    for class_idx, cls in enumerate(structured.get('classes', [])):
+        index['classes'][cls['name'].lower()] = class_idx
+        for method_idx, method in enumerate(cls.get('methods', [])):
+            qualified = f"{cls['name']}.{method['name']}".lower()
+            index['methods'][qualified] = [class_idx, method_idx]
+    return index
+
+def latest_structure(design_entry):
+    """Get the structured data and index of the most recent version of a design entry"""
+    for refinement in reversed(design_entry.get('refined_designs', [])):
+        if refinement.get('structured_design'):
+            return refinement['structured_design'], refinement.get('design_index') or build_design_index(refinement['structured_design'])
+    if design_entry.get('structured_design'):
+        return design_entry['structured_design'], design_entry.get('design_index') or build_design_index(design_entry['structured_design'])
+    return None, None
+
+def find_class(structured, index, name):
+    """Look up a class by name (case-insensitive), or return None"""
+    class_idx = index['classes'].get(name.lower())
+    if class_idx is None:
+        return None
+    return structured['classes'][class_idx]
+
+def find_methods(structured, index, name):
+    """Look up methods by 'Class.method' or bare method name, as (class, method) pairs"""
+    name = name.lower()
+    if '.' in name:
+        keys = [name] if name in index['methods'] else []
+    else:
+        keys = [key for key in index['methods'] if key.split('.', 1)[1] == name]
+    results = []
+    for key in keys:
+        class_idx, method_idx = index['methods'][key]
+        cls = structured['classes'][class_idx]
+        results.append((cls, cls['methods'][method_idx]))
+    return results
+
+def class_relationships(structured, name):
+    """Get the relationships a class takes part in"""
+    name = name.lower()
+    return [
+        rel for rel in structured.get('relationships', [])
+        if rel.get('source', '').lower() == name or rel.get('target', '').lower() == name
+    ]
+
+def format_method(method):
+    """Render a method as readable text"""
+    lines = [f"  {method.get('signature') or method['name']}"]
+    if method.get('description'):
+        lines.append(f"      {method['description']}")
+    for param in method.get('parameters', []):
+        param_line = f"      - {param['name']}"
+        if param.get('type'):
+            param_line += f" ({param['type']})"
+        if param.get('description'):
+            param_line += f": {param['description']}"
+        lines.append(param_line)
+    if method.get('returns'):
+        lines.append(f"      returns: {method['returns']}")
+    return "\n".join(lines)
+
+def format_class(cls, relationships=None):
+    """Render a class with its methods and relationships as readable text"""
+    lines = [f"class {cls['name']}", f"  {cls.get('responsibility', '')}".rstrip()]
+    for method in cls.get('methods', []):
+        lines.append(format_method(method))
+    for rel in relationships or []:
+        lines.append(f"  [{rel['type']}] {rel['source']} -> {rel['target']}")
+    return "\n".join(lines)
@@ -0,0 +1,145 @@
+import threading
+import time
+from contextlib import suppress
+import requests
+
+DEFAULT_HEALTH_INTERVAL = 10
+HEALTH_CHECK_TIMEOUT = 3
+# Generation can take minutes, so only connecting to a node is timed out
+CONNECT_TIMEOUT = 5
+
+# How long a failing endpoint is left out, doubling with every consecutive failure
+EJECT_SECONDS = 5
+MAX_EJECT_SECONDS = 120
+
+# Outstanding requests an endpoint that would have to load the model first counts as
+COLD_PENALTY = 1
+
+# Errors that mean the node itself is unreachable or broken, rather than the request
+NODE_ERRORS = (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError)
+
+# Statuses from a node (or the proxy in front of it) that is down or overloaded. A plain
+# 500 is left alone: Ollama also returns it for failures of one request, e.g. out of memory
+NODE_STATUS_CODES = (502, 503, 504)
+
+class Endpoint:
+    def __init__(self, url):
+        self.url = url.rstrip('/')
+        self.outstanding = 0
+        self.failures = 0
+        self.ejected_until = 0
+        self.models = set()
+
+    @property
+    def ejected(self):
+        return time.monotonic() < self.ejected_until
+
+    def has_model(self, model):
+        return model in self.models or f"{model}:latest" in self.models
+
+class EndpointPool:
+    """Spreads requests over Ollama endpoints, each to the one with the fewest outstanding requests.
+
+    Endpoints that fail a request or a health check are ejected for a
+    while, longer after each consecutive failure, and come back once a
+    request or health check succeeds. The models each endpoint has loaded
+    (reported by /api/ps and learned from successful requests) are
+    tracked, and an endpoint that would have to load the model first
+    counts as COLD_PENALTY requests busier.
+    """
+
+    def __init__(self, urls, health_interval=DEFAULT_HEALTH_INTERVAL):
+        self.endpoints = [Endpoint(url) for url in urls]
+        self.health_interval = health_interval
+        self.lock = threading.Lock()
+        self._health_thread = None
+
+    def __len__(self):
+        return len(self.endpoints)
+
+    def acquire(self, model, exclude=()):
+        """Pick the endpoint for a request and count it as outstanding until release"""
+        self._start_health_checks()
+        with self.lock:
+            candidates = [endpoint for endpoint in self.endpoints if endpoint not in exclude] or self.endpoints
+            live = [endpoint for endpoint in candidates if not endpoint.ejected]
+            if live:
+                endpoint = min(live, key=lambda endpoint: (
+                    endpoint.outstanding + (0 if endpoint.has_model(model) else COLD_PENALTY),
+                    endpoint.outstanding,
+                ))
+            else:
+                # Every endpoint is failing: try the one due back first rather than give up
+                endpoint = min(candidates, key=lambda endpoint: endpoint.ejected_until)
+            endpoint.outstanding += 1
+            return endpoint
+
+    def release(self, endpoint, model=None, failed=False):
+        """Finish a request, ejecting the endpoint if it failed"""
+        with self.lock:
+            endpoint.outstanding -= 1
+            if failed:
+                self._eject(endpoint)
+            else:
+                self._restore(endpoint)
+                if model:
+                    endpoint.models.add(model)
+
+    def _eject(self, endpoint):
+        endpoint.failures += 1
+        seconds = min(MAX_EJECT_SECONDS, EJECT_SECONDS * 2 ** (endpoint.failures - 1))
+        endpoint.ejected_until = time.monotonic() + seconds
+
+    def _restore(self, endpoint):
+        endpoint.failures = 0
+        endpoint.ejected_until = 0
+
+    def check(self, endpoint, session):
+        """Check an endpoint's health and refresh the models it has loaded"""
+        try:
+            response = session.get(f"{endpoint.url}/api/ps", timeout=HEALTH_CHECK_TIMEOUT)
+            healthy = response.status_code not in NODE_STATUS_CODES
+            # Servers too old for /api/ps still answer, just without the loaded models
+            models = None
+            if response.ok:
+                with suppress(ValueError, AttributeError, TypeError):
+                    models = {model['name'] for model in response.json().get('models') or []}
+        except requests.RequestException:
+            healthy, models = False, None
+        with self.lock:
+            if not healthy:
+                self._eject(endpoint)
+                return False
+            self._restore(endpoint)
+            if models is not None:
+                endpoint.models = models
+            return True
+
+    def _start_health_checks(self):
+        # A single endpoint gets nothing from health checks: there is nowhere else to send requests
+        if len(self.endpoints) < 2 or not self.health_interval or self._health_thread:
+            return
+        with self.lock:
+            if self._health_thread:
+                return
+            self._health_thread = threading.Thread(target=self._health_loop, daemon=True)
+            self._health_thread.start()
+
+    def _health_loop(self):
+        session = requests.Session()
+        while True:
+            for endpoint in self.endpoints:
+                self.check(endpoint, session)
+            time.sleep(self.health_interval)
+
+# Pools are shared by all providers in a process so outstanding counts cover every request
+_pools = {}
+_pools_lock = threading.Lock()
+
+def endpoint_pool(urls, health_interval=DEFAULT_HEALTH_INTERVAL):
+    """Get the shared pool for a list of endpoint URLs"""
+    key = (tuple(url.rstrip('/') for url in urls), health_interval)
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = EndpointPool(urls, health_interval)
+        return _pools[key]
@@ -0,0 +1,322 @@
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime
+
+JOBS_DB = 'bob_jobs.db'
+JOBS_LOG_DIR = 'bob_jobs'
+
+# Generation tasks that can be queued, mapped to the bob command that runs them.
+# Commands run non-interactively and write to the usual project files.
+JOB_COMMANDS = {
+    'user-stories': ['user-stories', '--no-interactive'],
+    'design': ['design', '--no-interactive'],
+    'test': ['build', 'test'],
+    'docs': ['build', 'docs'],
+}
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+FINISHED_STATES = (DONE, FAILED, CANCELLED)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    args TEXT NOT NULL,
+    cwd TEXT NOT NULL,
+    priority INTEGER NOT NULL DEFAULT 0,
+    status TEXT NOT NULL,
+    cancel_requested INTEGER NOT NULL DEFAULT 0,
+    worker_pid INTEGER,
+    exit_code INTEGER,
+    error TEXT,
+    created_at TEXT NOT NULL,
+    started_at TEXT,
+    finished_at TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_queue ON jobs (status, priority DESC, id);
+CREATE TABLE IF NOT EXISTS workers (
+    pid INTEGER PRIMARY KEY,
+    concurrency INTEGER NOT NULL,
+    started_at TEXT NOT NULL,
+    heartbeat REAL NOT NULL
+);
+"""
+
+def _pid_alive(pid):
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+class JobQueue:
+    """Persistent SQLite-backed queue of generation jobs for one bob project"""
+
+    def __init__(self, project_dir='.'):
+        self.project_dir = os.path.abspath(project_dir)
+        self.db_path = os.path.join(self.project_dir, JOBS_DB)
+        self.log_dir = os.path.join(self.project_dir, JOBS_LOG_DIR)
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute('PRAGMA journal_mode=WAL')
+        return _Connection(conn)
+
+    def log_path(self, job_id):
+        """Get the path of a job's output log"""
+        return os.path.join(self.log_dir, f"{job_id}.log")
+
+    def submit(self, kind, args=None, priority=0):
+        """Queue a job and return its id"""
+        if kind not in JOB_COMMANDS:
+            raise ValueError(f"Unknown job type: {kind}")
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "INSERT INTO jobs (kind, args, cwd, priority, status, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (kind, json.dumps(args or []), self.project_dir, priority, QUEUED, datetime.now().isoformat())
+            )
+            return cursor.lastrowid
+
+    def get(self, job_id):
+        """Get a job as a dict, or None if it does not exist"""
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return dict(row) if row else None
+
+    def list(self, status=None, limit=None):
+        """List jobs, most recent first"""
+        query = "SELECT * FROM jobs"
+        params = []
+        if status:
+            query += " WHERE status = ?"
+            params.append(status)
+        query += " ORDER BY id DESC"
+        if limit:
+            query += " LIMIT ?"
+            params.append(limit)
+        with self._connect() as conn:
+            return [dict(row) for row in conn.execute(query, params)]
+
+    def cancel(self, job_id):
+        """Cancel a queued job or ask the worker to stop a running one.
+
+        Returns the job's status after the request, or None if it does not exist.
+        """
+        with self._connect() as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            row = conn.execute("SELECT status FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is None:
+                conn.execute('COMMIT')
+                return None
+            if row['status'] == QUEUED:
+                conn.execute(
+                    "UPDATE jobs SET status = ?, finished_at = ? WHERE id = ?",
+                    (CANCELLED, datetime.now().isoformat(), job_id)
+                )
+                status = CANCELLED
+            else:
+                if row['status'] == RUNNING:
+                    conn.execute("UPDATE jobs SET cancel_requested = 1 WHERE id = ?", (job_id,))
+                status = row['status']
+            conn.execute('COMMIT')
+            return status
+
+    def wait(self, job_ids, timeout=None, poll_interval=1.0):
+        """Block until all jobs have finished. Returns the jobs, or None on timeout"""
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        while True:
+            jobs = [self.get(job_id) for job_id in job_ids]
+            if all(job is None or job['status'] in FINISHED_STATES for job in jobs):
+                return jobs
+            if deadline is not None and time.monotonic() >= deadline:
+                return None
+            time.sleep(poll_interval)
+
+    def claim(self, worker_pid):
+        """Atomically take the highest-priority queued job, or return None"""
+        with self._connect() as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            row = conn.execute(
+                "SELECT * FROM jobs WHERE status = ? ORDER BY priority DESC, id LIMIT 1", (QUEUED,)
+            ).fetchone()
+            if row is None:
+                conn.execute('COMMIT')
+                return None
+            conn.execute(
+                "UPDATE jobs SET status = ?, worker_pid = ?, started_at = ? WHERE id = ?",
+                (RUNNING, worker_pid, datetime.now().isoformat(), row['id'])
+            )
+            conn.execute('COMMIT')
+            return dict(row)
+
+    def finish(self, job_id, status, exit_code=None, error=None):
+        """Record the outcome of a job"""
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, exit_code = ?, error = ?, finished_at = ? WHERE id = ?",
+                (status, exit_code, error, datetime.now().isoformat(), job_id)
+            )
+
+    def cancel_requested(self, job_id):
+        with self._connect() as conn:
+            row = conn.execute("SELECT cancel_requested FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return bool(row and row['cancel_requested'])
+
+    def requeue(self, job_id):
+        """Put a running job back in the queue"""
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, worker_pid = NULL, started_at = NULL WHERE id = ? AND status = ?",
+                (QUEUED, job_id, RUNNING)
+            )
+
+    def requeue_orphans(self):
+        """Put running jobs whose worker process has died back in the queue"""
+        with self._connect() as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            rows = conn.execute("SELECT id, worker_pid FROM jobs WHERE status = ?", (RUNNING,)).fetchall()
+            orphans = [row['id'] for row in rows if not _pid_alive(row['worker_pid'])]
+            for job_id in orphans:
+                conn.execute(
+                    "UPDATE jobs SET status = ?, worker_pid = NULL, started_at = NULL WHERE id = ?",
+                    (QUEUED, job_id)
+                )
+            conn.execute('COMMIT')
+        return orphans
+
+    def register_worker(self, pid, concurrency):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO workers (pid, concurrency, started_at, heartbeat) VALUES (?, ?, ?, ?)",
+                (pid, concurrency, datetime.now().isoformat(), time.time())
+            )
+
+    def heartbeat(self, pid):
+        with self._connect() as conn:
+            conn.execute("UPDATE workers SET heartbeat = ? WHERE pid = ?", (time.time(), pid))
+
+    def unregister_worker(self, pid):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM workers WHERE pid = ?", (pid,))
+
+    def active_workers(self):
+        """List registered workers whose process is still alive"""
+        with self._connect() as conn:
+            rows = [dict(row) for row in conn.execute("SELECT * FROM workers")]
+        return [row for row in rows if _pid_alive(row['pid'])]
+
+class _Connection:
+    """Context manager that closes the sqlite connection on exit"""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None and self.conn.in_transaction:
+            self.conn.execute('ROLLBACK')
+        self.conn.close()
+
+class JobWorker:
+    """Runs queued jobs as bob subprocesses, up to `concurrency` at a time"""
+
+    def __init__(self, queue, concurrency=2, exit_when_idle=False, poll_interval=1.0):
+        self.queue = queue
+        self.concurrency = max(1, concurrency)
+        self.exit_when_idle = exit_when_idle
+        self.poll_interval = poll_interval
+        self.pid = os.getpid()
+        self._stopping = threading.Event()
+
+    def stop(self):
+        self._stopping.set()
+
+    def run(self):
+        """Run until stopped, or until the queue is empty if exit_when_idle is set"""
+        self.queue.requeue_orphans()
+        self.queue.register_worker(self.pid, self.concurrency)
+        threads = [
+            threading.Thread(target=self._work_loop, daemon=True)
+            for _ in range(self.concurrency)
+        ]
+        try:
+            for thread in threads:
+                thread.start()
+            while any(thread.is_alive() for thread in threads):
+                self.queue.heartbeat(self.pid)
+                for thread in threads:
+                    thread.join(self.poll_interval)
+        except KeyboardInterrupt:
+            self.stop()
+            for thread in threads:
+                thread.join()
+        finally:
+            self.queue.unregister_worker(self.pid)
+
+    def _work_loop(self):
+        while not self._stopping.is_set():
+            job = self.queue.claim(self.pid)
+            if job is None:
+                if self.exit_when_idle:
+                    return
+                self._stopping.wait(self.poll_interval)
+                continue
+            self._run_job(job)
+
+    def _run_job(self, job):
+        command = [sys.executable, '-m', 'bob.cli.main'] + JOB_COMMANDS[job['kind']] + json.loads(job['args'])
+        env = dict(os.environ, BOB_NO_DAEMON='1')
+        os.makedirs(self.queue.log_dir, exist_ok=True)
+
+        with open(self.queue.log_path(job['id']), 'a') as log:
+            try:
+                process = subprocess.Popen(
+                    command, cwd=job['cwd'], env=env,
+                    stdin=subprocess.DEVNULL, stdout=log, stderr=subprocess.STDOUT
+                )
+            except OSError as e:
+                self.queue.finish(job['id'], FAILED, error=str(e))
+                return
+
+            while True:
+                try:
+                    exit_code = process.wait(timeout=self.poll_interval)
+                    break
+                except subprocess.TimeoutExpired:
+                    pass
+                if self._stopping.is_set() or self.queue.cancel_requested(job['id']):
+                    process.terminate()
+                    try:
+                        process.wait(timeout=10)
+                    except subprocess.TimeoutExpired:
+                        process.kill()
+                        process.wait()
+                    if self._stopping.is_set() and not self.queue.cancel_requested(job['id']):
+                        # Interrupted worker: leave the job for the next one
+                        self.queue.requeue(job['id'])
+                    else:
+                        self.queue.finish(job['id'], CANCELLED)
+                    return
+
+        if exit_code == 0:
+            self.queue.finish(job['id'], DONE, exit_code=exit_code)
+        else:
+            self.queue.finish(job['id'], FAILED, exit_code=exit_code, error=f"Exited with status {exit_code}")
@@ -0,0 +1,225 @@
+import csv
+import hashlib
+import json
+import os
+import re
+from datetime import datetime
+import yaml
+
+PRIORITIES = ('high', 'medium', 'low')
+REQUIRED_FIELDS = ('title', 'description', 'priority')
+FORMATS = ('yaml', 'jsonl', 'csv')
+FORMAT_EXTENSIONS = {
+    '.yaml': 'yaml', '.yml': 'yaml',
+    '.jsonl': 'jsonl', '.ndjson': 'jsonl',
+    '.csv': 'csv',
+}
+
+# libyaml is much faster on large files; fall back to the pure Python implementation
+YAML_LOADER = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+YAML_DUMPER = getattr(yaml, 'CSafeDumper', yaml.SafeDumper)
+
+# Plain YAML scalars that mean null
+_NULL_PATTERN = re.compile(r"^(~|null|Null|NULL|)$")
+_WHITESPACE_PATTERN = re.compile(r"\s+")
+
+class ImportAborted(Exception):
+    """Raised to discard an import that was partly written"""
+
+def detect_format(path):
+    """Guess the import format from a file extension"""
+    fmt = FORMAT_EXTENSIONS.get(os.path.splitext(path)[1].lower())
+    if fmt is None:
+        raise ValueError(f"Cannot tell the format of {path}; use one of: {', '.join(FORMATS)}")
+    return fmt
+
+def _iter_jsonl(f):
+    for line_no, line in enumerate(f, 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield line_no, None, f"invalid JSON: {e.msg}"
+            continue
+        if not isinstance(record, dict):
+            yield line_no, None, "record must be an object"
+            continue
+        yield line_no, record, None
+
+def _iter_csv(f):
+    reader = csv.DictReader(f)
+    start = 1
+    try:
+        missing = [field for field in REQUIRED_FIELDS if field not in (reader.fieldnames or [])]
+        if missing:
+            yield 1, None, f"missing column(s): {', '.join(missing)}"
+            return
+        start = reader.line_num + 1
+        for row in reader:
+            # Rows may span several lines when fields contain quoted newlines
+            yield start, row, None
+            start = reader.line_num + 1
+    except csv.Error as e:
+        yield start, None, f"invalid CSV: {e}"
+
+def _skip_node(events, event):
+    """Consume the rest of the node that starts with event"""
+    if isinstance(event, (yaml.SequenceStartEvent, yaml.MappingStartEvent)):
+        depth = 1
+        while depth:
+            event = next(events)
+            if isinstance(event, (yaml.SequenceStartEvent, yaml.MappingStartEvent)):
+                depth += 1
+            elif isinstance(event, (yaml.SequenceEndEvent, yaml.MappingEndEvent)):
+                depth -= 1
+
+def _scalar(event):
+    if event.implicit[0] and _NULL_PATTERN.match(event.value):
+        return None
+    return event.value
+
+def _read_mapping(events):
+    """Read a mapping of scalars, marking nested values with NotImplemented"""
+    record = {}
+    for event in events:
+        if isinstance(event, yaml.MappingEndEvent):
+            return record
+        key = _scalar(event) if isinstance(event, yaml.ScalarEvent) else None
+        if not isinstance(event, yaml.ScalarEvent):
+            _skip_node(events, event)
+        value_event = next(events)
+        if isinstance(value_event, yaml.ScalarEvent):
+            value = _scalar(value_event)
+        else:
+            _skip_node(events, value_event)
+            value = NotImplemented
+        if key is not None:
+            record[key] = value
+    return record
+
+def _find_list(events):
+    """Advance to the start of the objectives list: the document itself or its 'objectives' key"""
+    for event in events:
+        if isinstance(event, yaml.SequenceStartEvent):
+            return True
+        if isinstance(event, yaml.MappingStartEvent):
+            for key_event in events:
+                if isinstance(key_event, yaml.MappingEndEvent):
+                    return False
+                value_event = next(events)
+                if (isinstance(key_event, yaml.ScalarEvent) and key_event.value == 'objectives'
+                        and isinstance(value_event, yaml.SequenceStartEvent)):
+                    return True
+                _skip_node(events, key_event)
+                _skip_node(events, value_event)
+            return False
+        if isinstance(event, (yaml.ScalarEvent, yaml.AliasEvent)):
+            return False
+    return False
+
+def _iter_yaml(f):
+    # Walk parser events so only one record is held in memory at a time
+    events = iter(yaml.parse(f, Loader=YAML_LOADER))
+    try:
+        if not _find_list(events):
+            yield 1, None, "file must contain a list of objectives"
+            return
+        for event in events:
+            if isinstance(event, yaml.SequenceEndEvent):
+                return
+            line_no = event.start_mark.line + 1
+            if isinstance(event, yaml.MappingStartEvent):
+                yield line_no, _read_mapping(events), None
+            else:
+                _skip_node(events, event)
+                yield line_no, None, "record must be a mapping"
+    except yaml.YAMLError as e:
+        mark = getattr(e, 'problem_mark', None)
+        yield (mark.line + 1 if mark else 0), None, f"invalid YAML: {getattr(e, 'problem', None) or e}"
+
+def _undecodable_line(path):
+    """Find the first line of a file that is not valid UTF-8"""
+    with open(path, 'rb') as f:
+        for line_no, line in enumerate(f, 1):
+            try:
+                line.decode('utf-8')
+            except UnicodeDecodeError:
+                return line_no
+    return 0
+
+def iter_records(path, fmt=None):
+    """Stream (line number, record, error) from an objectives file, one record at a time"""
+    fmt = fmt or detect_format(path)
+    readers = {'yaml': _iter_yaml, 'jsonl': _iter_jsonl, 'csv': _iter_csv}
+    with open(path, 'r', newline='' if fmt == 'csv' else None, encoding='utf-8') as f:
+        try:
+            yield from readers[fmt](f)
+        except UnicodeDecodeError:
+            # Reading stops at text that cannot be decoded, like at a YAML syntax error
+            yield _undecodable_line(path), None, "not valid UTF-8 text"
+
+def validate_record(record):
+    """Check a raw record and normalize it. Returns (objective, list of problems)"""
+    problems = []
+    objective = {}
+    for field in REQUIRED_FIELDS:
+        value = record.get(field)
+        if value is NotImplemented or (value is not None and not isinstance(value, str)):
+            problems.append(f"{field} must be a string")
+        elif value is None or not value.strip():
+            problems.append(f"missing {field}")
+        else:
+            objective[field] = value.strip()
+    priority = objective.get('priority')
+    if priority is not None:
+        objective['priority'] = priority.lower()
+        if objective['priority'] not in PRIORITIES:
+            problems.append(f"priority must be high, medium, or low (got '{priority}')")
+    return objective, problems
+
+def objective_key(title, description):
+    """Hash an objective's title and description, ignoring case and spacing"""
+    text = _WHITESPACE_PATTERN.sub(' ', f"{title}\0{description}").strip().casefold()
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=12).digest()
+
+def import_objectives(path, existing, emit=None, fmt=None, skip_invalid=False, batch_size=1000):
+    """Validate and dedup the objectives in path, passing accepted ones to emit in batches.
+
+    Records are read one at a time. Duplicates of an existing objective or
+    of an earlier record are dropped. Every invalid record is reported as
+    (line, message); once one is found, nothing more is emitted unless
+    skip_invalid is set. Returns a summary dict.
+    """
+    seen = {objective_key(obj.get('title', ''), obj.get('description', '')) for obj in existing}
+    summary = {"read": 0, "added": 0, "duplicates": 0, "errors": []}
+    added_at = datetime.now().isoformat()
+    batch = []
+
+    for line_no, record, error in iter_records(path, fmt):
+        if record is None:
+            summary['errors'].append((line_no, error))
+            continue
+        summary['read'] += 1
+        objective, problems = validate_record(record)
+        if problems:
+            summary['errors'].append((line_no, '; '.join(problems)))
+            continue
+        key = objective_key(objective['title'], objective['description'])
+        if key in seen:
+            summary['duplicates'] += 1
+            continue
+        seen.add(key)
+        summary['added'] += 1
+
+        if emit is None or (summary['errors'] and not skip_invalid):
+            continue
+        objective['added_at'] = added_at
+        batch.append(objective)
+        if len(batch) >= batch_size:
+            emit(batch)
+            batch = []
+
+    if batch and emit is not None and (skip_invalid or not summary['errors']):
+        emit(batch)
+    return summary
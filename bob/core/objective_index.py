@@ -0,0 +1,106 @@
+import heapq
+import re
+from bisect import bisect_left, bisect_right
+
+ID_PREFIX = 'O'
+ID_PATTERN = re.compile(r"^(?:O|o)?(\d+)$")
+PRIORITY_ORDER = {'high': 0, 'medium': 1, 'low': 2}
+SORT_KEYS = ('added', 'priority', 'title', 'id')
+
+def format_id(number):
+    return f"{ID_PREFIX}{number}"
+
+def id_number(objective_id):
+    """Get the number of an ID such as 'O12' (or plain '12'), or None if it is not one"""
+    match = ID_PATTERN.match(str(objective_id).strip())
+    return int(match.group(1)) if match else None
+
+def normalize_id(objective_id):
+    """Get the canonical form of a user-supplied ID, or None if it is not valid"""
+    number = id_number(objective_id)
+    return format_id(number) if number is not None else None
+
+def assign_missing_ids(data):
+    """Give every objective without an ID the next free one, in file order.
+
+    IDs are never reused: data['next_id'] only ever grows. Returns the
+    number of IDs assigned. Because assignment is deterministic, files
+    written before IDs existed get the same IDs on every load.
+    """
+    objectives = data.setdefault('objectives', [])
+    used = [id_number(obj.get('id')) for obj in objectives if obj.get('id') is not None]
+    next_id = max([data.get('next_id') or 1] + [number + 1 for number in used if number is not None])
+    assigned = 0
+    for position, obj in enumerate(objectives):
+        if obj.get('id') is None:
+            objectives[position] = {"id": format_id(next_id), **obj}
+            next_id += 1
+            assigned += 1
+    data['next_id'] = next_id
+    return assigned
+
+def allocate_id(data):
+    """Reserve and return a new objective ID"""
+    next_id = data.get('next_id') or 1
+    data['next_id'] = next_id + 1
+    return format_id(next_id)
+
+class ObjectiveIndex:
+    """Lookup tables over a list of objectives: by ID, by priority and by date added"""
+
+    def __init__(self, objectives):
+        self.objectives = objectives
+        self.by_id = {}
+        self.by_priority = {}
+        for position, obj in enumerate(objectives):
+            self.by_id[obj.get('id')] = position
+            self.by_priority.setdefault(obj.get('priority'), []).append(position)
+        # ISO timestamps sort chronologically as strings
+        self.by_date = sorted(range(len(objectives)), key=lambda position: objectives[position].get('added_at') or '')
+        self.dates = [objectives[position].get('added_at') or '' for position in self.by_date]
+
+    def get(self, objective_id):
+        """Get the position of an objective by ID, or None"""
+        return self.by_id.get(normalize_id(objective_id))
+
+    def _sort_key(self, sort):
+        objectives = self.objectives
+        if sort == 'priority':
+            return lambda p: (PRIORITY_ORDER.get(objectives[p].get('priority'), 3), objectives[p].get('added_at') or '')
+        if sort == 'title':
+            return lambda p: (objectives[p].get('title') or '').casefold()
+        if sort == 'id':
+            return lambda p: id_number(objectives[p].get('id')) or 0
+        return lambda p: objectives[p].get('added_at') or ''
+
+    def query(self, priorities=None, since=None, until=None, sort='added', reverse=False, offset=0, limit=None):
+        """Filter, sort and paginate objectives.
+
+        since and until are ISO timestamps (inclusive, compared by prefix).
+        Returns (number of matches, list of matching objectives on the page).
+        """
+        # Narrow by date with a binary search over the date order
+        start = bisect_left(self.dates, since) if since else 0
+        end = bisect_right(self.dates, until + '\uffff') if until else len(self.dates)
+        in_range = self.by_date[start:end]
+
+        if sort == 'added' and not priorities:
+            # Already in date order, so only the page itself is touched
+            ordered = in_range[::-1] if reverse else in_range
+            return len(in_range), [self.objectives[p] for p in ordered[offset:offset + limit if limit else None]]
+
+        if priorities:
+            matches = set()
+            for priority in priorities:
+                matches.update(self.by_priority.get(priority, []))
+            if since or until:
+                matches.intersection_update(in_range)
+        else:
+            matches = in_range
+
+        if limit:
+            pick = heapq.nlargest if reverse else heapq.nsmallest
+            page = pick(offset + limit, matches, key=self._sort_key(sort))[offset:]
+        else:
+            page = sorted(matches, key=self._sort_key(sort), reverse=reverse)[offset:]
+        return len(matches), [self.objectives[p] for p in page]
@@ -0,0 +1,99 @@
+import re
+
+EDIT_BLOCK_PATTERN = re.compile(
+    r"^<{5,9} ?SEARCH[ \t]*\n(.*?)^={5,9}[ \t]*\n(.*?)^>{5,9} ?REPLACE[ \t]*$",
+    re.DOTALL | re.MULTILINE
+)
+
+class PatchFailed(Exception):
+    """Raised when edits returned by a model cannot be applied to the document"""
+
+def edit_prompt(document, feedback, kind='document', context='', notes=''):
+    """Build a prompt asking for edits to document instead of a full rewrite"""
+    return (
+        f"Here is the current {kind}:\n<document>\n{document}\n</document>\n\n"
+        f"{context}"
+        f"Revise it based on this feedback: {feedback}\n\n"
+        f"Do not rewrite the whole {kind}. Return only the changes, as one or more edit blocks:\n"
+        "<<<<<<< SEARCH\n(lines copied exactly from the current text)\n=======\n(the lines to put in their place)\n"
+        ">>>>>>> REPLACE\n"
+        "Each SEARCH section must match the current text exactly and contain enough lines to be unique. "
+        "Leave the replacement empty to delete lines. To add text, put a neighbouring line in SEARCH "
+        "and repeat it in the replacement next to the new text. Return nothing but edit blocks."
+        f"{' ' + notes if notes else ''}"
+    )
+
+def parse_edits(response):
+    """Get the (search, replace) pairs from a model response"""
+    edits = []
+    for match in EDIT_BLOCK_PATTERN.finditer(response or ''):
+        search, replace = match.group(1), match.group(2)
+        edits.append((search[:-1] if search.endswith('\n') else search,
+                      replace[:-1] if replace.endswith('\n') else replace))
+    if not edits:
+        raise PatchFailed("the response contains no edit blocks")
+    return edits
+
+def _locate(document, search):
+    """Find the one span of document that search refers to, as (start, end)"""
+    count = document.count(search)
+    if count == 1:
+        start = document.index(search)
+        return start, start + len(search)
+    if count > 1:
+        raise PatchFailed(f"edit matches {count} places: {search.splitlines()[0][:60]!r}")
+
+    # Models often get indentation or trailing spaces slightly wrong; retry
+    # matching whole lines with surrounding whitespace ignored
+    lines = document.splitlines(keepends=True)
+    wanted = [line.strip() for line in search.splitlines()]
+    stripped = [line.strip() for line in lines]
+    spans = [
+        idx for idx in range(len(lines) - len(wanted) + 1)
+        if stripped[idx:idx + len(wanted)] == wanted
+    ]
+    if len(spans) != 1:
+        problem = "does not match" if not spans else f"matches {len(spans)} places"
+        raise PatchFailed(f"edit {problem}: {search.splitlines()[0][:60]!r}")
+    start = sum(len(line) for line in lines[:spans[0]])
+    end = start + sum(len(line) for line in lines[spans[0]:spans[0] + len(wanted)])
+    # Keep the line break after the last matched line
+    if document[start:end].endswith('\n'):
+        end -= 1
+    return start, end
+
+def apply_edits(document, edits):
+    """Apply (search, replace) pairs to document in order. Raises PatchFailed"""
+    for search, replace in edits:
+        if not search.strip():
+            # Nothing to anchor to: the model wants to add text at the end
+            document = document.rstrip('\n') + '\n' + replace
+            continue
+        start, end = _locate(document, search)
+        if not replace and (start == 0 or document[start - 1] == '\n') and document[end:end + 1] == '\n':
+            # Deleting whole lines: take their line break too
+            end += 1
+        document = document[:start] + replace + document[end:]
+    return document
+
+def patch_refine(ai_provider, document, feedback, regenerate, kind='document', context='', notes='',
+                 validate=None, on_fallback=None, task='refine'):
+    """Refine document by asking the model for edits and applying them locally.
+
+    Output tokens then scale with the size of the change rather than the
+    document. validate(text) may raise PatchFailed to reject a result. If
+    the edits do not apply or are rejected, regenerate() is called to get
+    the full document the usual way. Returns (text, whether it was patched).
+    """
+    response = ai_provider.get_response(edit_prompt(document, feedback, kind, context, notes), task=task)
+    try:
+        revised = apply_edits(document, parse_edits(response))
+        if not revised.strip():
+            raise PatchFailed(f"the edits left the {kind} empty")
+        if validate:
+            validate(revised)
+        return revised, True
+    except PatchFailed as e:
+        if on_fallback:
+            on_fallback(str(e))
+        return regenerate(), False
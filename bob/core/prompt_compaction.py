@@ -0,0 +1,69 @@
+import logging
+import re
+import textwrap
+from .summarize import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+# Fields that only matter to bob itself, never to the model
+METADATA_FIELDS = frozenset({
+    'added_at', 'generated_at', 'refined_at', 'created_at', 'updated_at',
+    'fingerprint', 'design_index', 'next_id', 'objectives_snapshot', 'user_stories_snapshot',
+})
+
+_TRAILING_SPACE_PATTERN = re.compile(r"[ \t]+$", re.MULTILINE)
+_BLANK_LINES_PATTERN = re.compile(r"\n{3,}")
+_WHITESPACE_PATTERN = re.compile(r"\s+")
+
+def compact_text(text):
+    """Strip trailing whitespace and collapse runs of blank lines"""
+    text = _TRAILING_SPACE_PATTERN.sub('', str(text or ''))
+    return _BLANK_LINES_PATTERN.sub('\n\n', text).strip()
+
+def _inline(value):
+    return _WHITESPACE_PATTERN.sub(' ', str(value)).strip()
+
+def render_record(record):
+    """Render a dict on one line without metadata, e.g. 'O3 Title: description (priority: high)'"""
+    fields = {
+        key: value for key, value in record.items()
+        if key not in METADATA_FIELDS and value not in (None, '', [], {})
+    }
+    if 'title' in fields:
+        head = ' '.join(_inline(fields.pop(key)) for key in ('id', 'title') if key in fields)
+        if 'description' in fields:
+            head += f": {_inline(fields.pop('description'))}"
+        extra = ', '.join(f"{key}: {_inline(value)}" for key, value in fields.items())
+        return f"{head} ({extra})" if extra else head
+    return '; '.join(f"{key}: {_inline(value)}" for key, value in fields.items())
+
+def render_value(value):
+    """Render prompt data compactly: records one per line, text with its whitespace tidied"""
+    if isinstance(value, dict):
+        return render_record(value)
+    if isinstance(value, (list, tuple)):
+        if all(isinstance(item, dict) for item in value):
+            return '\n'.join(f"- {render_record(item)}" for item in value)
+        return '\n\n'.join(compact_text(render_value(item)) for item in value if item)
+    return compact_text(value)
+
+def report_savings(label, before_tokens, after_tokens):
+    """Log how many tokens compaction saved on a prompt"""
+    saved = before_tokens - after_tokens
+    if before_tokens > 0:
+        logger.info(f"Compacted {label} prompt: {after_tokens} tokens, "
+                    f"{saved} saved ({saved * 100 // before_tokens}%)")
+    return saved
+
+def compact_prompt(template, label, **fields):
+    """Fill a str.format template with compactly rendered fields.
+
+    template may be indented as it is written in the source; it is
+    dedented before filling. The tokens saved compared with filling the
+    template as is with the fields' plain str() (the repr of a list) are
+    logged.
+    """
+    prompt = compact_text(textwrap.dedent(template).format(**{key: render_value(value) for key, value in fields.items()}))
+    before = template.format(**{key: str(value) for key, value in fields.items()})
+    report_savings(label, estimate_tokens(before), estimate_tokens(prompt))
+    return prompt
@@ -0,0 +1,184 @@
+import json
+import os
+import time
+from contextlib import contextmanager
+from .storage import atomic_write, file_lock, try_file_lock
+
+RATE_LIMIT_DIR = os.path.join(os.path.expanduser('~'), '.bob', 'ratelimit')
+
+# Waiters that have not polled for this long are assumed gone and lose their place
+STALE_WAITER_SECONDS = 30
+POLL_INTERVAL = 0.25
+
+# Set by `bob workspace run` to cap LLM requests in flight across all its subprocesses
+LLM_CONCURRENCY_ENV = 'BOB_LLM_CONCURRENCY'
+LLM_SLOT_DIR_ENV = 'BOB_LLM_SLOT_DIR'
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except (PermissionError, OSError):
+        return True
+    return True
+
+def _limit(value):
+    try:
+        return max(0, int(value or 0))
+    except (TypeError, ValueError):
+        return 0
+
+class RateLimiter:
+    """Token-bucket limiter for one provider, shared by all bob processes on this machine.
+
+    Two buckets refill continuously: one for requests per minute and one
+    for tokens per minute. Bucket levels and a FIFO queue of waiting
+    requests live in a small JSON state file guarded by a file lock, so
+    concurrent processes take turns in arrival order instead of racing.
+    """
+
+    def __init__(self, provider, requests_per_minute=0, tokens_per_minute=0, state_dir=RATE_LIMIT_DIR):
+        self.provider = provider
+        self.requests_per_minute = _limit(requests_per_minute)
+        self.tokens_per_minute = _limit(tokens_per_minute)
+        self.state_path = os.path.join(state_dir, f"{provider}.json")
+
+    @classmethod
+    def from_config(cls, provider, provider_config):
+        """Create a limiter from a provider's llm_config.json settings, or None if unlimited"""
+        limiter = cls(
+            provider,
+            provider_config.get('requests_per_minute'),
+            provider_config.get('tokens_per_minute')
+        )
+        if not limiter.requests_per_minute and not limiter.tokens_per_minute:
+            return None
+        return limiter
+
+    def _load(self, now):
+        state = {}
+        if os.path.exists(self.state_path):
+            try:
+                with open(self.state_path, 'r') as f:
+                    state = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                state = {}
+        state.setdefault('requests', self.requests_per_minute)
+        state.setdefault('tokens', self.tokens_per_minute)
+        state.setdefault('updated', now)
+        state.setdefault('blocked_until', 0)
+        state.setdefault('next_ticket', 0)
+        state.setdefault('queue', [])
+
+        # Refill both buckets for the time elapsed, up to one minute's worth
+        elapsed = max(0.0, now - state['updated'])
+        state['requests'] = min(self.requests_per_minute, state['requests'] + elapsed * self.requests_per_minute / 60)
+        state['tokens'] = min(self.tokens_per_minute, state['tokens'] + elapsed * self.tokens_per_minute / 60)
+        state['updated'] = now
+
+        # Drop waiters whose process died or stopped polling
+        state['queue'] = [
+            entry for entry in state['queue']
+            if now - entry[2] < STALE_WAITER_SECONDS and _pid_alive(entry[1])
+        ]
+        return state
+
+    def _save(self, state):
+        atomic_write(self.state_path, json.dumps(state))
+
+    def _wait_time(self, state, tokens, now):
+        wait = max(0.0, state['blocked_until'] - now)
+        if self.requests_per_minute and state['requests'] < 1:
+            wait = max(wait, (1 - state['requests']) * 60 / self.requests_per_minute)
+        if self.tokens_per_minute and state['tokens'] < tokens:
+            wait = max(wait, (tokens - state['tokens']) * 60 / self.tokens_per_minute)
+        return wait
+
+    def acquire(self, tokens):
+        """Block until a request of about `tokens` tokens may be sent, then take it from the buckets"""
+        if self.tokens_per_minute:
+            # A request larger than the bucket would never fit; let it through when the bucket is full
+            tokens = min(tokens, self.tokens_per_minute)
+        ticket = None
+        while True:
+            now = time.time()
+            with file_lock(self.state_path):
+                state = self._load(now)
+                if ticket is None:
+                    ticket = state['next_ticket']
+                    state['next_ticket'] += 1
+                    state['queue'].append([ticket, os.getpid(), now])
+                else:
+                    for entry in state['queue']:
+                        if entry[0] == ticket:
+                            entry[2] = now
+                            break
+                    else:
+                        # We were pruned as stale; rejoin at the back
+                        state['queue'].append([ticket, os.getpid(), now])
+
+                wait = self._wait_time(state, tokens, now)
+                at_head = state['queue'][0][0] == ticket
+                if at_head and wait <= 0:
+                    state['queue'].pop(0)
+                    if self.requests_per_minute:
+                        state['requests'] -= 1
+                    if self.tokens_per_minute:
+                        state['tokens'] -= tokens
+                    self._save(state)
+                    return
+                self._save(state)
+            time.sleep(min(max(wait, POLL_INTERVAL), 5) if at_head else POLL_INTERVAL)
+
+    def settle(self, extra_tokens):
+        """Charge tokens that were not known before sending, such as the response"""
+        if not self.tokens_per_minute or extra_tokens <= 0:
+            return
+        with file_lock(self.state_path):
+            state = self._load(time.time())
+            state['tokens'] -= extra_tokens
+            self._save(state)
+
+    def penalize(self, seconds):
+        """Hold all requests for this provider, e.g. after the API reported a rate limit"""
+        with file_lock(self.state_path):
+            now = time.time()
+            state = self._load(now)
+            state['blocked_until'] = max(state['blocked_until'], now + seconds)
+            self._save(state)
+
+class ConcurrencyLimiter:
+    """Caps how many LLM requests are in flight at once across processes.
+
+    Each request holds one of `slots` lock files in slot_dir while it runs.
+    The locks are released by the OS if a process dies, so a crashed
+    command never leaks a slot.
+    """
+
+    def __init__(self, slot_dir, slots):
+        self.slot_dir = slot_dir
+        self.slots = max(1, slots)
+
+    @classmethod
+    def from_env(cls):
+        """Create a limiter from the environment, or None if no cap is set"""
+        slot_dir = os.environ.get(LLM_SLOT_DIR_ENV)
+        slots = _limit(os.environ.get(LLM_CONCURRENCY_ENV))
+        if not slot_dir or not slots:
+            return None
+        return cls(slot_dir, slots)
+
+    @contextmanager
+    def hold(self):
+        """Block until a slot is free and hold it for the duration of the block"""
+        # Start at a different slot per process to avoid everyone probing slot 0 first
+        start = os.getpid() % self.slots
+        while True:
+            for offset in range(self.slots):
+                path = os.path.join(self.slot_dir, f"slot-{(start + offset) % self.slots}")
+                with try_file_lock(path) as acquired:
+                    if acquired:
+                        yield
+                        return
+            time.sleep(POLL_INTERVAL)
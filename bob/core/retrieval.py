@@ -0,0 +1,192 @@
+import hashlib
+import json
+import math
+import os
+import re
+from collections import Counter
+from .storage import atomic_write, file_lock
+
+RETRIEVAL_INDEX_FILE = 'bob_retrieval_index.json'
+INDEX_VERSION = 1
+
+# BM25 parameters
+K1 = 1.5
+B = 0.75
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset(
+    "a an and are as at be by can for from has have i in is it its of on or so that the their "
+    "them they this to was we were will with want wants".split()
+)
+
+# Numbered or bulleted list items inside generated story text
+STORY_ITEM_PATTERN = re.compile(r"^\s*(?:\d+[.)]|[-*])\s+", re.MULTILINE)
+
+def tokenize(text):
+    """Split text into lowercase terms, dropping stopwords"""
+    return [term for term in TOKEN_PATTERN.findall(text.lower()) if term not in STOPWORDS and len(term) > 1]
+
+def _doc_id(kind, text):
+    return f"{kind}:{hashlib.sha1(text.encode('utf-8')).hexdigest()[:16]}"
+
+def split_story_items(stories):
+    """Split a generated story list into individual stories"""
+    starts = [match.start() for match in STORY_ITEM_PATTERN.finditer(stories)]
+    if not starts:
+        return [stories.strip()] if stories.strip() else []
+    bounds = starts + [len(stories)]
+    return [stories[bounds[i]:bounds[i + 1]].strip() for i in range(len(starts))]
+
+def objective_documents(objectives_list):
+    """Make one retrieval document per objective"""
+    documents = {}
+    for obj in objectives_list:
+        text = f"{obj.get('title', 'Untitled')}: {obj.get('description', 'No description')}"
+        documents[_doc_id('objective', text)] = {"kind": "objective", "text": text}
+    return documents
+
+def story_documents(story_texts):
+    """Make one retrieval document per individual user story"""
+    documents = {}
+    for stories in story_texts:
+        for item in split_story_items(stories or ''):
+            documents[_doc_id('story', item)] = {"kind": "story", "text": item}
+    return documents
+
+def latest_story_texts(user_stories_list):
+    """Get the most recent version of each story group, preferring its last refinement"""
+    texts = []
+    for story_group in user_stories_list:
+        refinements = story_group.get('refined_stories', [])
+        texts.append(refinements[-1].get('refined_result', '') if refinements else story_group.get('stories', ''))
+    return texts
+
+class RetrievalIndex:
+    """BM25 index over project objectives and stories, persisted to disk.
+
+    Documents are keyed by a hash of their text, so syncing with the current
+    project only tokenizes documents that are new or changed.
+    """
+
+    def __init__(self, path=RETRIEVAL_INDEX_FILE):
+        self.path = path
+        self.documents = {}
+        self.postings = {}
+        self.total_length = 0
+        self.dirty = False
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return
+        if data.get('version') != INDEX_VERSION:
+            return
+        for doc_id, doc in data.get('documents', {}).items():
+            self._index(doc_id, doc)
+
+    def _index(self, doc_id, doc):
+        self.documents[doc_id] = doc
+        self.total_length += doc['length']
+        for term, tf in doc['terms'].items():
+            self.postings.setdefault(term, {})[doc_id] = tf
+
+    def add(self, doc_id, kind, text):
+        if doc_id in self.documents:
+            return
+        terms = Counter(tokenize(text))
+        self._index(doc_id, {"kind": kind, "text": text, "length": sum(terms.values()), "terms": dict(terms)})
+        self.dirty = True
+
+    def remove(self, doc_id):
+        doc = self.documents.pop(doc_id, None)
+        if doc is None:
+            return
+        self.total_length -= doc['length']
+        for term in doc['terms']:
+            postings = self.postings.get(term)
+            if postings is not None:
+                postings.pop(doc_id, None)
+                if not postings:
+                    del self.postings[term]
+        self.dirty = True
+
+    def sync(self, documents):
+        """Make the index hold exactly documents ({doc_id: {kind, text}}). Returns (added, removed)"""
+        stale = [doc_id for doc_id in self.documents if doc_id not in documents]
+        for doc_id in stale:
+            self.remove(doc_id)
+        added = 0
+        for doc_id, doc in documents.items():
+            if doc_id not in self.documents:
+                self.add(doc_id, doc['kind'], doc['text'])
+                added += 1
+        return added, len(stale)
+
+    def search(self, query, k=8, kind=None):
+        """Return the texts of the top-k documents for query, best first"""
+        terms = set(tokenize(query))
+        if not terms or not self.documents:
+            return []
+        n = len(self.documents)
+        avg_length = self.total_length / n if n else 0
+        scores = Counter()
+        for term in terms:
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+            for doc_id, tf in postings.items():
+                doc = self.documents[doc_id]
+                if kind is not None and doc['kind'] != kind:
+                    continue
+                norm = K1 * (1 - B + B * doc['length'] / avg_length) if avg_length else K1
+                scores[doc_id] += idf * tf * (K1 + 1) / (tf + norm)
+        return [self.documents[doc_id]['text'] for doc_id, _ in scores.most_common(k)]
+
+    def save(self):
+        if not self.dirty:
+            return
+        data = {
+            "version": INDEX_VERSION,
+            "documents": self.documents,
+        }
+        with file_lock(self.path):
+            atomic_write(self.path, json.dumps(data, separators=(',', ':')))
+        self.dirty = False
+
+def sync_project_index(objectives_list, story_texts, path=RETRIEVAL_INDEX_FILE):
+    """Load the index at path, bring it up to date with the given project data and save it"""
+    index = RetrievalIndex(path)
+    documents = objective_documents(objectives_list)
+    documents.update(story_documents(story_texts))
+    index.sync(documents)
+    index.save()
+    return index
+
+def select_relevant(index, query, items, kind, k):
+    """Pick the top-k items of a kind for query, or all items if there are no more than k.
+
+    Falls back to the first k items if nothing in the index matches.
+    """
+    if len(items) <= k:
+        return items
+    results = index.search(query, k=k, kind=kind)
+    return results or items[:k]
+
+def select_covering(index, queries, items, kind, k):
+    """Pick the items of a kind among the top-k for any of queries, keeping their order.
+
+    Returns all items if there are no more than k, or if none of the
+    queries match anything.
+    """
+    if len(items) <= k:
+        return items
+    relevant = set()
+    for query in queries:
+        relevant.update(index.search(query, k=k, kind=kind))
+    return [item for item in items if item in relevant] or items
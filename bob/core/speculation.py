@@ -0,0 +1,213 @@
+import hashlib
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta
+from .storage import atomic_write, file_lock, locked_update
+
+SPECULATION_DIR = 'bob_speculative'
+MANIFEST_FILE = 'manifest.json'
+
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+# Results nobody picked up are dropped after this long
+MAX_AGE = timedelta(hours=24)
+
+def _pid_alive(pid):
+    if os.name == 'posix':
+        # Reap the process if it is our own finished child, so it does not linger as a zombie
+        try:
+            if os.waitpid(pid, os.WNOHANG)[0] == pid:
+                return False
+        except ChildProcessError:
+            pass
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except (PermissionError, OSError):
+        return True
+    return True
+
+# Task type that generates each kind of speculative result
+KIND_TASKS = {'design': 'design', 'test': 'test-gen', 'docs': 'docs'}
+
+def speculation_key(kind, content, ai_provider):
+    """Key a speculative result by what would be generated and by which model"""
+    routed = ai_provider.for_task(KIND_TASKS.get(kind, kind))
+    text = f"{kind}\0{routed.provider}\0{routed.model_name}\0{content}"
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()[:32]
+
+def design_inputs(objectives_list, user_stories_list, map_reduce, config):
+    """Serialize the parts of the project data that a generated design depends on"""
+    return json.dumps({
+        "objectives": [[obj.get('title'), obj.get('description')] for obj in objectives_list],
+        "stories": [
+            [group.get('stories')] + [r.get('refined_result') for r in group.get('refined_stories', [])]
+            for group in user_stories_list
+        ],
+        "map_reduce": map_reduce,
+        "config": config,
+    }, sort_keys=True)
+
+class SpeculationStore:
+    """Background generations started ahead of the command that will need them.
+
+    Each speculation runs as a detached `bob speculate KEY` process that
+    writes its result to <dir>/<key>.out. A manifest records which keys are
+    running or done. Commands look their inputs up by key: a hit is used
+    instantly, while a key that no longer matches (e.g. after the user
+    refined the design) is cancelled and its output discarded.
+    """
+
+    def __init__(self, directory=SPECULATION_DIR):
+        self.directory = os.path.abspath(directory)
+        self.manifest_path = os.path.join(self.directory, MANIFEST_FILE)
+
+    def payload_path(self, key):
+        return os.path.join(self.directory, f"{key}.json")
+
+    def output_path(self, key):
+        return os.path.join(self.directory, f"{key}.out")
+
+    def log_path(self, key):
+        return os.path.join(self.directory, f"{key}.log")
+
+    def _load(self):
+        if not os.path.exists(self.manifest_path):
+            return {}
+        try:
+            with open(self.manifest_path, 'r') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return {}
+
+    def _save(self, manifest):
+        atomic_write(self.manifest_path, json.dumps(manifest, indent=2))
+
+    def _update(self, mutate):
+        os.makedirs(self.directory, exist_ok=True)
+        return locked_update(self.manifest_path, self._load, self._save, mutate)
+
+    def _remove_files(self, key):
+        for path in (self.payload_path(key), self.output_path(key), self.log_path(key)):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def _stop(self, entry):
+        if entry.get('status') == RUNNING and entry.get('pid') and _pid_alive(entry['pid']):
+            try:
+                os.kill(entry['pid'], signal.SIGTERM)
+            except OSError:
+                pass
+
+    def _prune(self, manifest):
+        cutoff = (datetime.now() - MAX_AGE).isoformat()
+        for key, entry in list(manifest.items()):
+            dead = entry['status'] == RUNNING and not _pid_alive(entry['pid'])
+            if dead or entry['status'] == FAILED or entry['started_at'] < cutoff:
+                self._stop(entry)
+                del manifest[key]
+                self._remove_files(key)
+
+    def start(self, key, kind, payload):
+        """Start generating key in the background unless it is already running or done"""
+        def register(manifest):
+            self._prune(manifest)
+            if key in manifest:
+                return False
+            atomic_write(self.payload_path(key), json.dumps(dict(payload, kind=kind)))
+            kwargs = {}
+            if os.name == 'posix':
+                kwargs['start_new_session'] = True
+            with open(self.log_path(key), 'w') as log:
+                process = subprocess.Popen(
+                    [sys.executable, '-m', 'bob.cli.main', 'speculate', key],
+                    stdin=subprocess.DEVNULL, stdout=log, stderr=subprocess.STDOUT,
+                    env=dict(os.environ, BOB_NO_DAEMON='1'), **kwargs
+                )
+            manifest[key] = {
+                "kind": kind,
+                "status": RUNNING,
+                "pid": process.pid,
+                "started_at": datetime.now().isoformat(),
+            }
+            return True
+
+        return self._update(register)
+
+    def load_payload(self, key):
+        """Get the inputs a speculative process was started with, or None"""
+        try:
+            with open(self.payload_path(key), 'r') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+
+    def finish(self, key, error=None):
+        """Record that the speculative process for key has finished"""
+        def mark(manifest):
+            if key in manifest:
+                manifest[key]['status'] = FAILED if error else DONE
+                manifest[key]['error'] = error
+        self._update(mark)
+
+    def cancel(self, key):
+        """Stop a speculation and discard anything it produced"""
+        def remove(manifest):
+            entry = manifest.pop(key, None)
+            if entry is not None:
+                self._stop(entry)
+                self._remove_files(key)
+        self._update(remove)
+
+    def cancel_except(self, kinds, keep):
+        """Cancel all speculations of the given kinds whose key is not in keep"""
+        def remove(manifest):
+            for key, entry in list(manifest.items()):
+                if entry['kind'] in kinds and key not in keep:
+                    self._stop(entry)
+                    del manifest[key]
+                    self._remove_files(key)
+        if os.path.exists(self.manifest_path):
+            self._update(remove)
+
+    def take(self, key, wait=True, on_wait=None, poll_interval=0.5):
+        """Claim the result for key, waiting for it if it is still being generated.
+
+        Returns the path of the output file, which the caller should move
+        into place, or None if there is no usable result.
+        """
+        if not os.path.exists(self.manifest_path):
+            return None
+        waited = False
+        while True:
+            with file_lock(self.manifest_path):
+                entry = self._load().get(key)
+            if entry is None:
+                return None
+            if entry['status'] == RUNNING and _pid_alive(entry['pid']):
+                if not wait:
+                    return None
+                if on_wait and not waited:
+                    on_wait()
+                waited = True
+                time.sleep(poll_interval)
+                continue
+            break
+
+        def claim(manifest):
+            entry = manifest.pop(key, None)
+            usable = entry is not None and entry['status'] == DONE and os.path.exists(self.output_path(key))
+            for path in (self.payload_path(key), self.log_path(key)):
+                if os.path.exists(path):
+                    os.remove(path)
+            if not usable and os.path.exists(self.output_path(key)):
+                os.remove(self.output_path(key))
+            return self.output_path(key) if usable else None
+        return self._update(claim)
@@ -0,0 +1,194 @@
+import copy
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+LOCK_SUFFIX = '.lock'
+
+# Locks are re-entrant within a process so that an update (load, modify, save)
+# can call the regular save function while already holding the lock.
+_held_locks = {}
+_held_guard = threading.RLock()
+
+# Parsed file contents keyed by path, valid while the file's stat signature
+# is unchanged. Lets long-lived processes skip re-parsing unchanged files.
+_parse_cache = {}
+_parse_guard = threading.Lock()
+
+def lock_path_for(path):
+    """Get the path of the advisory lock file guarding a data file"""
+    return os.path.abspath(path) + LOCK_SUFFIX
+
+def _acquire(handle):
+    if fcntl is not None:
+        fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+    else:
+        handle.seek(0)
+        msvcrt.locking(handle.fileno(), msvcrt.LK_LOCK, 1)
+
+def _try_acquire(handle):
+    try:
+        if fcntl is not None:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            handle.seek(0)
+            msvcrt.locking(handle.fileno(), msvcrt.LK_NBLCK, 1)
+    except OSError:
+        return False
+    return True
+
+def _release(handle):
+    if fcntl is not None:
+        fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+    else:
+        handle.seek(0)
+        msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+
+@contextmanager
+def file_lock(path):
+    """Hold an exclusive cross-process lock on path for the duration of the block.
+
+    The lock is taken on a sidecar ``<path>.lock`` file rather than on path
+    itself, because atomic writes replace the data file's inode.
+    """
+    key = lock_path_for(path)
+    with _held_guard:
+        entry = _held_locks.get(key)
+        if entry is not None and entry['owner'] == threading.get_ident():
+            entry['depth'] += 1
+            reentered = True
+        else:
+            reentered = False
+
+    if reentered:
+        try:
+            yield
+        finally:
+            with _held_guard:
+                _held_locks[key]['depth'] -= 1
+        return
+
+    directory = os.path.dirname(key)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    handle = open(key, 'a+')
+    try:
+        _acquire(handle)
+        with _held_guard:
+            _held_locks[key] = {'owner': threading.get_ident(), 'depth': 1}
+        try:
+            yield
+        finally:
+            with _held_guard:
+                del _held_locks[key]
+            _release(handle)
+    finally:
+        handle.close()
+
+@contextmanager
+def try_file_lock(path):
+    """Try to take the cross-process lock on path without waiting.
+
+    Yields True if the lock is held for the duration of the block, False if
+    another process holds it. Unlike file_lock this is not re-entrant.
+    """
+    directory = os.path.dirname(lock_path_for(path))
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    handle = open(lock_path_for(path), 'a+')
+    try:
+        acquired = _try_acquire(handle)
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                _release(handle)
+    finally:
+        handle.close()
+
+def replace_file(tmp_path, path):
+    """Atomically move a finished temp file over path, keeping path's permissions"""
+    if os.path.exists(path):
+        os.chmod(tmp_path, os.stat(path).st_mode & 0o777)
+    else:
+        # mkstemp creates files as 0600; use the mode open() would have used
+        umask = os.umask(0)
+        os.umask(umask)
+        os.chmod(tmp_path, 0o666 & ~umask)
+    os.replace(tmp_path, path)
+
+@contextmanager
+def atomic_writer(path):
+    """Open a temp file for writing that replaces path when the block exits normally.
+
+    If the block raises, the temp file is removed and path is left untouched,
+    so large files can be written incrementally and still appear atomically.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(
+        prefix='.' + os.path.basename(path) + '.', suffix='.tmp', dir=directory
+    )
+    try:
+        with os.fdopen(fd, 'w') as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        replace_file(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def atomic_write(path, content):
+    """Write content to path by writing a temp file and renaming it into place"""
+    with atomic_writer(path) as f:
+        f.write(content)
+
+def locked_update(path, load, save, mutate):
+    """Read-modify-write path under its lock.
+
+    load() must return the current on-disk data, mutate(data) changes it in
+    place (its return value is passed back to the caller) and save(data)
+    writes it. Because the data is re-read while the lock is held, changes
+    made by other bob processes since this one started are preserved.
+    """
+    with file_lock(path):
+        data = load()
+        result = mutate(data)
+        save(data)
+        return result
+
+def _stat_signature(path):
+    st = os.stat(path)
+    return (st.st_ino, st.st_size, st.st_mtime_ns)
+
+def cached_load(path, parse):
+    """Load path with parse(file), reusing the last result while the file is unchanged.
+
+    Returns a deep copy so callers may mutate the data freely.
+    """
+    key = os.path.abspath(path)
+    signature = _stat_signature(path)
+    with _parse_guard:
+        cached = _parse_cache.get(key)
+    if cached is not None and cached[0] == signature:
+        return copy.deepcopy(cached[1])
+
+    with open(path, 'r') as f:
+        data = parse(f)
+    with _parse_guard:
+        _parse_cache[key] = (signature, data)
+    return copy.deepcopy(data)
+
+def clear_load_cache():
+    """Forget everything cached by cached_load, so the next loads parse the files again"""
+    with _parse_guard:
+        _parse_cache.clear()
@@ -0,0 +1,101 @@
+import hashlib
+import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from .retrieval import STORY_ITEM_PATTERN, split_story_items
+
+TAG_PATTERN = re.compile(r"^\[([Oo]\d+)\]\s*")
+
+def objective_fingerprint(obj):
+    """Hash the parts of an objective that its stories are generated from"""
+    text = f"{obj.get('title', '')}\0{obj.get('description', '')}"
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=12).hexdigest()
+
+def latest_objective_stories(user_stories_list):
+    """Get the per-objective stories of the most recent fan-out story group, or {}"""
+    for story_group in reversed(user_stories_list):
+        if story_group.get('objective_stories'):
+            return story_group['objective_stories']
+    return {}
+
+def reuse_objective_stories(objectives_list, previous):
+    """Split objectives into those whose earlier stories still apply and those to regenerate.
+
+    Returns (results for the unchanged objectives keyed by ID, list of objectives to regenerate).
+    """
+    results = {}
+    stale = []
+    for obj in objectives_list:
+        cached = previous.get(obj.get('id'))
+        if cached and cached.get('stories') and cached.get('fingerprint') == objective_fingerprint(obj):
+            results[obj['id']] = cached
+        else:
+            stale.append(obj)
+    return results, stale
+
+def cluster_objectives(objectives_list, size):
+    """Group objectives into clusters of at most size, keeping order"""
+    size = max(1, size)
+    return [objectives_list[i:i + size] for i in range(0, len(objectives_list), size)]
+
+def cluster_prompt(cluster):
+    """Build the user story prompt for one cluster of objectives"""
+    objectives_context = "".join(
+        f"[{obj['id']}] {obj.get('title', 'Untitled')}: {obj.get('description', 'No description')}\n"
+        for obj in cluster
+    )
+    return (
+        "You are a product manager helping to create user stories from objectives. "
+        "Each user story should follow the format: 'As a [type of user], I want [goal] so that [benefit]'.\n\n"
+        f"Here are the objectives:\n{objectives_context}\n"
+        "Please generate user stories based on these objectives. "
+        "Focus on the value delivered to different types of users. "
+        "Return the user stories as a numbered list, starting each story with the ID of the objective "
+        "it comes from in brackets, for example: 1. [O1] As a ..."
+    )
+
+def split_by_objective(response, cluster):
+    """Assign each story in a cluster's response to the objective it is tagged with.
+
+    Untagged stories belong to the objective of the story before them (or
+    the first objective of the cluster). Returns {objective ID: [stories]}.
+    """
+    stories = {obj['id']: [] for obj in cluster}
+    current = cluster[0]['id']
+    for item in split_story_items(response or ''):
+        text = STORY_ITEM_PATTERN.sub('', item, count=1)
+        match = TAG_PATTERN.match(text)
+        if match and match.group(1).upper() in stories:
+            current = match.group(1).upper()
+            text = text[match.end():]
+        if text.strip():
+            stories[current].append(text.strip())
+    return stories
+
+def generate_cluster_stories(ai_provider, clusters, workers=4, on_cluster=None):
+    """Generate stories for clusters of objectives concurrently.
+
+    Returns {objective ID: {"fingerprint", "stories"}}. Objectives that got
+    no stories (e.g. the request failed) are left out, so they are
+    regenerated on the next run.
+    """
+    def generate(cluster):
+        return cluster, split_by_objective(ai_provider.get_response(cluster_prompt(cluster), task='stories'), cluster)
+
+    results = {}
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        for future in as_completed([executor.submit(generate, cluster) for cluster in clusters]):
+            cluster, stories = future.result()
+            for obj in cluster:
+                if stories[obj['id']]:
+                    results[obj['id']] = {"fingerprint": objective_fingerprint(obj), "stories": stories[obj['id']]}
+            if on_cluster:
+                on_cluster(cluster)
+    return results
+
+def merge_stories(objectives_list, results):
+    """Join per-objective stories into one numbered list, each tagged with its objective ID"""
+    lines = []
+    for obj in objectives_list:
+        for story in results.get(obj.get('id'), {}).get('stories', []):
+            lines.append(f"{len(lines) + 1}. [{obj['id']}] {story}")
+    return "\n".join(lines)
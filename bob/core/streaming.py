@@ -0,0 +1,170 @@
+import ast
+import os
+import re
+import tempfile
+from .storage import replace_file
+
+# Lines that can start a Python module, used to tell code from prose
+CODE_START_PATTERN = re.compile(
+    r"^(import |from |def |async def |class |@|#|\"\"\"|'''|if __name__|[A-Za-z_][A-Za-z0-9_]* *=)"
+)
+# Top-level lines that start a new statement, used to find complete blocks
+TOP_LEVEL_PATTERN = re.compile(r"^(?!(else|elif|except|finally)\b)(import |from |def |async def |class |@|[A-Za-z_])")
+
+class StreamAborted(Exception):
+    """Raised when streamed output is rejected before it has finished"""
+
+class StreamingFileWriter:
+    """Write a streamed model response to a temporary file as it arrives.
+
+    With language='python' only the code is written: code fences are
+    stripped and leading or trailing prose is dropped. Complete top-level
+    blocks are parsed with ast as soon as a following top-level line shows
+    they have ended, so output that is prose or badly broken is rejected
+    early. On success the temporary file is renamed over path.
+
+    If repair is given, syntax errors do not abort the stream; instead
+    repair(code) is called on the finished code and must return code that
+    parses, or raise StreamAborted.
+    """
+
+    def __init__(self, path, language=None, max_prose_chars=600, max_unparsed_lines=150, repair=None):
+        self.path = path
+        self.language = language
+        self.repair = repair
+        self.max_prose_chars = max_prose_chars
+        self.max_unparsed_lines = max_unparsed_lines
+        self.state = 'start'
+        self.prose_chars = 0
+        self.buffer = ''
+        self.code_lines = []
+        self.validated_lines = 0
+        self.error = None
+        self._tmp_path = None
+        self._file = None
+
+    def _open(self):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        fd, self._tmp_path = tempfile.mkstemp(
+            prefix='.' + os.path.basename(self.path) + '.', suffix='.partial', dir=directory
+        )
+        self._file = os.fdopen(fd, 'w')
+
+    def _write(self, text):
+        if self._file is None:
+            self._open()
+        self._file.write(text)
+
+    def feed(self, chunk):
+        """Add a chunk of the response, raising StreamAborted if it is rejected"""
+        if self.language != 'python':
+            self._write(chunk)
+            return
+        self.buffer += chunk
+        while '\n' in self.buffer:
+            line, self.buffer = self.buffer.split('\n', 1)
+            self._process_line(line + '\n')
+
+    def _process_line(self, line):
+        stripped = line.strip()
+        is_fence = stripped.startswith('```')
+
+        if self.state in ('start', 'preamble', 'after'):
+            if is_fence:
+                self.state = 'fenced'
+            elif not stripped:
+                pass
+            elif self.state == 'start' and CODE_START_PATTERN.match(line):
+                self.state = 'bare'
+                self._add_code(line)
+            elif self.state != 'after':
+                self.state = 'preamble'
+                self.prose_chars += len(stripped)
+                if self.prose_chars > self.max_prose_chars:
+                    raise StreamAborted("response is prose, not code")
+        elif is_fence:
+            # Closing fence, or a bare block followed by fenced text
+            self.state = 'after'
+        else:
+            self._add_code(line)
+
+    def _add_code(self, line):
+        if self.code_lines and TOP_LEVEL_PATTERN.match(line) and not self.code_lines[-1].startswith('@'):
+            self._validate_pending(len(self.code_lines))
+        self.code_lines.append(line)
+        self._write(line)
+
+    def _validate_pending(self, end):
+        """Parse lines validated_lines..end, which should be complete top-level blocks"""
+        segment = ''.join(self.code_lines[self.validated_lines:end])
+        try:
+            ast.parse(segment)
+        except SyntaxError as e:
+            # A boundary inside a multi-line string or bracket looks like a new
+            # statement; keep extending the segment and only give up when it
+            # has grown well beyond any plausible single block.
+            if self.repair is None and end - self.validated_lines > self.max_unparsed_lines:
+                raise StreamAborted(f"syntax error near line {self.validated_lines + (e.lineno or 1)}: {e.msg}")
+            return
+        self.validated_lines = end
+
+    def finish(self):
+        """Validate the complete output and move it into place"""
+        if self.buffer:
+            self._process_line(self.buffer)
+            self.buffer = ''
+
+        if self.language == 'python':
+            if not self.code_lines:
+                raise StreamAborted("response contains no code")
+            code = ''.join(self.code_lines)
+            try:
+                ast.parse(code)
+            except SyntaxError as e:
+                if self.repair is None:
+                    raise StreamAborted(f"syntax error on line {e.lineno}: {e.msg}")
+                # Replace what was streamed with the repaired code
+                code = self.repair(code)
+                self._file.seek(0)
+                self._file.truncate()
+                self._file.write(code)
+                self.code_lines = code.splitlines(keepends=True)
+        elif self._file is None:
+            raise StreamAborted("response is empty")
+
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+        self._file = None
+        replace_file(self._tmp_path, self.path)
+        self._tmp_path = None
+
+    def discard(self):
+        """Remove the temporary file"""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if self._tmp_path and os.path.exists(self._tmp_path):
+            os.remove(self._tmp_path)
+        self._tmp_path = None
+
+    def consume(self, chunks):
+        """Write a whole stream of chunks. Returns True on success, False if rejected (see error)"""
+        try:
+            try:
+                for chunk in chunks:
+                    self.feed(chunk)
+            finally:
+                # Stop the underlying request if we bailed out early
+                if hasattr(chunks, 'close'):
+                    chunks.close()
+            self.finish()
+            return True
+        except StreamAborted as e:
+            self.error = str(e)
+            self.discard()
+            return False
+        except BaseException:
+            self.discard()
+            raise
@@ -0,0 +1,149 @@
+import hashlib
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from .storage import atomic_write, file_lock
+
+SUMMARY_CACHE_FILE = 'bob_summaries.json'
+
+# Rough characters-per-token ratio used to budget prompts without a tokenizer
+CHARS_PER_TOKEN = 4
+
+# Safety limit on reduce levels in case summaries stop shrinking
+MAX_LEVELS = 6
+
+def estimate_tokens(text):
+    """Estimate the number of tokens in text"""
+    return len(text) // CHARS_PER_TOKEN + 1
+
+def split_text(text, max_tokens):
+    """Split a text larger than max_tokens at line breaks, and very long lines anywhere"""
+    if estimate_tokens(text) <= max_tokens:
+        return [text]
+    max_chars = max(1, (max_tokens - 1) * CHARS_PER_TOKEN)
+    pieces = []
+    current = ''
+    for line in text.splitlines(keepends=True):
+        if current and len(current) + len(line) > max_chars:
+            pieces.append(current)
+            current = ''
+        while len(line) > max_chars:
+            pieces.append(line[:max_chars])
+            line = line[max_chars:]
+        current += line
+    if current:
+        pieces.append(current)
+    return pieces
+
+def chunk_texts(texts, chunk_tokens):
+    """Group texts into chunks of roughly chunk_tokens each, keeping order.
+
+    Texts larger than chunk_tokens are split first, so no chunk is oversized.
+    """
+    chunks = []
+    current = []
+    current_tokens = 0
+    for text in (piece for text in texts for piece in split_text(text, chunk_tokens)):
+        tokens = estimate_tokens(text)
+        if current and current_tokens + tokens > chunk_tokens:
+            chunks.append(current)
+            current = []
+            current_tokens = 0
+        current.append(text)
+        current_tokens += tokens
+    if current:
+        chunks.append(current)
+    return chunks
+
+class SummaryCache:
+    """Chunk summaries persisted to disk, keyed by a hash of the chunk content"""
+
+    def __init__(self, path=SUMMARY_CACHE_FILE):
+        self.path = path
+        self.entries = {}
+        self.pending = {}
+        if os.path.exists(path):
+            try:
+                with open(path, 'r') as f:
+                    self.entries = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                self.entries = {}
+
+    @staticmethod
+    def key(instruction, text):
+        return hashlib.sha256(f"{instruction}\0{text}".encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        return self.entries.get(key)
+
+    def put(self, key, summary):
+        self.entries[key] = summary
+        self.pending[key] = summary
+
+    def save(self):
+        """Merge new summaries into the cache file"""
+        if not self.pending:
+            return
+        with file_lock(self.path):
+            entries = {}
+            if os.path.exists(self.path):
+                try:
+                    with open(self.path, 'r') as f:
+                        entries = json.load(f)
+                except (OSError, json.JSONDecodeError):
+                    entries = {}
+            entries.update(self.pending)
+            atomic_write(self.path, json.dumps(entries, indent=1))
+        self.pending = {}
+
+def _summarize_chunk(ai_provider, instruction, chunk, target_tokens, cache):
+    text = "\n\n".join(chunk)
+    key = SummaryCache.key(f"{instruction}|{target_tokens}", text)
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+    summary = ai_provider.get_response(
+        f"{instruction} Keep every distinct requirement, actor and constraint; drop repetition. "
+        f"Use at most about {target_tokens * CHARS_PER_TOKEN // 6} words.\n\n{text}",
+        task='summarize'
+    )
+    if summary:
+        cache.put(key, summary)
+        return summary
+    # Keep the start of the chunk rather than losing it if the request failed
+    return text[:target_tokens * CHARS_PER_TOKEN]
+
+def map_reduce_summarize(ai_provider, texts, max_tokens, instruction, chunk_tokens=2000,
+                         workers=4, cache=None, on_level=None, force=False):
+    """Summarize texts hierarchically until they fit in max_tokens.
+
+    Each level splits the current texts into chunks of about chunk_tokens,
+    summarizes the chunks in parallel and replaces them with the summaries.
+    Chunk summaries are cached by content hash, so unchanged parts of a
+    project are not summarized again on later runs. With force, texts
+    already within max_tokens are still summarized once.
+    """
+    cache = cache if cache is not None else SummaryCache()
+    level = list(texts)
+    for depth in range(MAX_LEVELS):
+        if not (force and depth == 0) and sum(estimate_tokens(text) for text in level) <= max_tokens:
+            break
+        chunks = chunk_texts(level, chunk_tokens)
+        # Aim for each level to shrink to the budget, but never ask for less than a short paragraph
+        target_tokens = max(100, min(chunk_tokens // 2, max_tokens // len(chunks)))
+        if on_level:
+            on_level(depth + 1, len(chunks))
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            level = list(executor.map(
+                lambda chunk: _summarize_chunk(ai_provider, instruction, chunk, target_tokens, cache),
+                chunks
+            ))
+        cache.save()
+        if len(level) == 1:
+            break
+
+    budget = max_tokens * CHARS_PER_TOKEN
+    if sum(len(text) for text in level) > budget:
+        # Hard cap so the caller's prompt stays bounded even if summaries did not shrink enough
+        level = ["\n".join(level)[:budget]]
+    return level
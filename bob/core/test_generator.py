@@ -1,12 +1,34 @@
 import os
 import yaml
 from pathlib import Path
+from .design_structure import latest_structure, find_class, class_relationships, format_class
+from .dedup import dedup_items
+from .storage import atomic_write
+from .streaming import StreamingFileWriter, StreamAborted
+from .chunk_repair import repair_module, RepairFailed
+from .speculation import speculation_key
+from .prompt_compaction import compact_prompt
+from .cancellation import cancellable
+from .retrieval import (
+    RETRIEVAL_INDEX_FILE, objective_documents, split_story_items, sync_project_index, select_relevant
+)
+
+DESIGN_FILE = 'bob_design.yaml'
+TEST_FILE = os.path.join('tests', 'test_function_builder.py')
+DOCS_FILE = os.path.join('docs', 'function_builder.md')
 
 class TestGenerator:
-    def __init__(self, config):
+    def __init__(self, config, design=None):
         self.config = config
-        self.design_file = os.path.join(os.path.dirname(__file__), '..', '..', 'bob_design.yaml')
-        self.load_design()
+        # Relative to the project directory (the cwd), like the other bob_*.yaml files
+        self.design_file = DESIGN_FILE
+        self.test_file = TEST_FILE
+        self.docs_file = DOCS_FILE
+        if design is None:
+            self.load_design()
+        else:
+            # A design that has not been saved yet, e.g. for speculative generation
+            self.design = design
 
     def load_design(self):
         """Load design from YAML file"""
@@ -16,19 +38,84 @@ class TestGenerator:
         except Exception as e:
             raise Exception(f"Failed to load design file: {str(e)}")
 
-    def generate_test_code(self, target, ai_provider):
-        """Generate test code based on design"""
+    def design_spec_for(self, design_entry, target):
+        """Get the design text for a target class, falling back to the whole (latest refined) design"""
+        refinements = design_entry.get('refined_designs', [])
+        design_spec = refinements[-1].get('refined_result', '') if refinements else design_entry.get('design', '')
+        if not target:
+            return design_spec
+        structured, index = latest_structure(design_entry)
+        if structured is None:
+            return design_spec
+        cls = find_class(structured, index, target)
+        if cls is None:
+            return design_spec
+        return format_class(cls, class_relationships(structured, cls['name']))
+
+    def relevant_context(self, design_entry, design_spec, target):
+        """Get the objectives and user stories relevant to design_spec.
+
+        Near-duplicate stories are dropped when dedup_threshold is set, and
+        the local retrieval index keeps only the top retrieval_top_k
+        objectives and stories when the design has more than that.
+        """
+        objectives = design_entry.get('objectives_snapshot', [])
+        story_groups = design_entry.get('user_stories_snapshot', [])
+        user_stories = story_groups
+        threshold = self.config.get('dedup_threshold')
+        if threshold:
+            story_items = [item for stories in story_groups for item in split_story_items(stories or '')]
+            user_stories = story_items = dedup_items(story_items, threshold)
+        k = self.config.get('retrieval_top_k')
+        if not k:
+            return objectives, user_stories
+
+        if not threshold:
+            story_items = [item for stories in story_groups for item in split_story_items(stories or '')]
+        if len(objectives) <= k and len(story_items) <= k:
+            return objectives, user_stories
+
+        index_path = os.path.join(os.path.dirname(self.design_file), RETRIEVAL_INDEX_FILE)
+        index = sync_project_index(objectives, story_groups, index_path)
+
+        query = f"{target or ''} {design_spec}"
+        objective_texts = [doc['text'] for doc in objective_documents(objectives).values()]
+        if len(objectives) > k:
+            objectives = select_relevant(index, query, objective_texts, 'objective', k)
+        if len(story_items) > k:
+            user_stories = select_relevant(index, query, story_items, 'story', k)
+        return objectives, user_stories
+
+    def repair_test_code(self, code, ai_provider):
+        """Repair only the top-level chunks of generated test code that fail to compile"""
         try:
-            # Get the latest design
-            latest_design = self.design['designs'][-1]
-            
-            # Extract design details
-            objectives = latest_design.get('objectives_snapshot', [])
-            user_stories = latest_design.get('user_stories_snapshot', [])
-            design_spec = latest_design.get('design', '')
-            
-            # Prepare prompt for test generation
-            prompt = f"""
+            repaired, _ = repair_module(code, ai_provider, self.config.get('max_test_retries', 3))
+        except RepairFailed as e:
+            raise StreamAborted(str(e))
+        return repaired
+
+    def repair_test_file(self, test_file, ai_provider):
+        """Repair an existing test file in place. Returns the number of chunks repaired"""
+        with open(test_file, 'r') as f:
+            code = f.read()
+        try:
+            repaired, count = repair_module(code, ai_provider, self.config.get('max_test_retries', 3))
+        except RepairFailed as e:
+            raise Exception(f"Failed to repair test code: {str(e)}")
+        if count:
+            atomic_write(test_file, repaired)
+        return count
+
+    def test_prompt(self, target):
+        """Build the test generation prompt from the latest design"""
+        # Get the latest design
+        latest_design = self.design['designs'][-1]
+        
+        # Extract design details
+        design_spec = self.design_spec_for(latest_design, target)
+        objectives, user_stories = self.relevant_context(latest_design, design_spec, target)
+        
+        return compact_prompt("""
             Based on the following design information, generate Python test code:
 
             Objectives:
@@ -47,40 +134,48 @@ class TestGenerator:
             4. Basic functionality tests
 
             Use pytest framework and follow best practices.
-            """
-            
-            # Get AI response
-            test_code = ai_provider.get_response(prompt)
+            """, 'test-gen', objectives=objectives, user_stories=user_stories, design_spec=design_spec)
+
+    def speculation_key(self, kind, target, ai_provider):
+        """Key under which a speculative run of this generation is stored"""
+        prompt = self.test_prompt(target) if kind == 'test' else self.docs_prompt(target)
+        return speculation_key(kind, prompt, ai_provider)
+
+    def generate_test_code(self, target, ai_provider, output_file=None, cancel=None):
+        """Generate test code based on design.
+
+        Returns False without touching the output file if cancel (a
+        CancelToken) is cancelled before generation finishes.
+        """
+        try:
+            prompt = self.test_prompt(target)
             
-            # Save the generated test code
-            if test_code:
-                tests_dir = os.path.join(os.path.dirname(__file__), '..', '..', 'tests')
-                os.makedirs(tests_dir, exist_ok=True)
-                
-                test_file = os.path.join(tests_dir, 'test_function_builder.py')
-                with open(test_file, 'w') as f:
-                    f.write(test_code)
-                
-                return True
+            # Stream the AI response straight into the test file, validating as it arrives
+            writer = StreamingFileWriter(
+                output_file or self.test_file, language='python',
+                repair=lambda code: self.repair_test_code(code, ai_provider)
+            )
+            chunks = ai_provider.stream_response(prompt, task='test-gen', cancel=cancel)
+            if not writer.consume(cancellable(chunks, cancel)):
+                if cancel is not None and cancel.cancelled:
+                    return False
+                raise Exception(f"Generation aborted: {writer.error}")
             
-            return False
+            return True
             
         except Exception as e:
             raise Exception(f"Failed to generate test code: {str(e)}")
 
-    def generate_docs(self, target, ai_provider):
-        """Generate documentation based on design"""
-        try:
-            # Get the latest design
-            latest_design = self.design['designs'][-1]
-            
-            # Extract design details
-            objectives = latest_design.get('objectives_snapshot', [])
-            user_stories = latest_design.get('user_stories_snapshot', [])
-            design_spec = latest_design.get('design', '')
-            
-            # Prepare prompt for documentation generation
-            prompt = f"""
+    def docs_prompt(self, target):
+        """Build the documentation prompt from the latest design"""
+        # Get the latest design
+        latest_design = self.design['designs'][-1]
+        
+        # Extract design details
+        design_spec = self.design_spec_for(latest_design, target)
+        objectives, user_stories = self.relevant_context(latest_design, design_spec, target)
+        
+        return compact_prompt("""
             Based on the following design information, generate comprehensive documentation:
 
             Objectives:
@@ -100,23 +195,22 @@ class TestGenerator:
             5. Troubleshooting guide
 
             Use Markdown format.
-            """
-            
-            # Get AI response
-            docs = ai_provider.get_response(prompt)
+            """, 'docs', objectives=objectives, user_stories=user_stories, design_spec=design_spec)
+
+    def generate_docs(self, target, ai_provider, output_file=None, cancel=None):
+        """Generate documentation based on design (see generate_test_code for cancel)"""
+        try:
+            prompt = self.docs_prompt(target)
             
-            # Save the generated documentation
-            if docs:
-                docs_dir = os.path.join(os.path.dirname(__file__), '..', '..', 'docs')
-                os.makedirs(docs_dir, exist_ok=True)
-                
-                doc_file = os.path.join(docs_dir, 'function_builder.md')
-                with open(doc_file, 'w') as f:
-                    f.write(docs)
-                
-                return True
+            # Stream the AI response straight into the documentation file
+            writer = StreamingFileWriter(output_file or self.docs_file)
+            chunks = ai_provider.stream_response(prompt, task='docs', cancel=cancel)
+            if not writer.consume(cancellable(chunks, cancel)):
+                if cancel is not None and cancel.cancelled:
+                    return False
+                raise Exception(f"Generation aborted: {writer.error}")
             
-            return False
+            return True
             
         except Exception as e:
             raise Exception(f"Failed to generate documentation: {str(e)}")
\ No newline at end of file
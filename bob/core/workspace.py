@@ -0,0 +1,207 @@
+import json
+import os
+import re
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from .jobs import JOB_COMMANDS
+from .rate_limit import LLM_CONCURRENCY_ENV, LLM_SLOT_DIR_ENV
+from .storage import atomic_write
+
+PROJECT_MARKER = 'bob_config.json'
+WORKSPACE_DIR = '.bob_workspace'
+REPORT_FILE = 'report.json'
+
+# Directories never searched for projects
+SKIP_DIRS = frozenset(['node_modules', 'venv', 'env', '__pycache__', 'build', 'dist', WORKSPACE_DIR])
+
+# Pipeline stages in the order they are run when several are requested
+WORKSPACE_STAGES = ['user-stories', 'design', 'test', 'docs']
+
+DONE = 'done'
+FAILED = 'failed'
+SKIPPED = 'skipped'
+CANCELLED = 'cancelled'
+
+def discover_projects(root, max_depth=None):
+    """Find bob projects (directories holding bob_config.json) under root, sorted by path"""
+    root = os.path.abspath(root)
+    projects = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        depth = 0 if dirpath == root else os.path.relpath(dirpath, root).count(os.sep) + 1
+        if PROJECT_MARKER in filenames:
+            projects.append(dirpath)
+        if max_depth is not None and depth >= max_depth:
+            dirnames[:] = []
+        else:
+            dirnames[:] = [d for d in dirnames if not d.startswith('.') and d not in SKIP_DIRS]
+    return sorted(projects)
+
+def order_stages(stages):
+    """Put the requested stages in pipeline order, dropping repeats"""
+    unknown = [stage for stage in stages if stage not in JOB_COMMANDS]
+    if unknown:
+        raise ValueError(f"Unknown stage: {', '.join(unknown)}")
+    return [stage for stage in WORKSPACE_STAGES if stage in stages]
+
+def project_name(root, project):
+    """Get a project's path relative to the workspace root"""
+    name = os.path.relpath(project, root)
+    return '.' if name == os.curdir else name
+
+def log_file_name(name):
+    return re.sub(r"[^A-Za-z0-9_.-]+", '__', name).strip('_') or 'root'
+
+class WorkspaceRunner:
+    """Runs pipeline stages across many bob projects in parallel.
+
+    Every stage runs as a `python -m bob.cli.main` subprocess with the
+    project as its working directory, up to `workers` projects at a time.
+    Stages of one project run in order, and a failed stage skips the rest.
+    All subprocesses share one cap on LLM requests in flight through a
+    directory of slot locks (see ConcurrencyLimiter).
+    """
+
+    def __init__(self, root, stages, workers=4, llm_concurrency=None, stage_args=None, on_result=None):
+        self.root = os.path.abspath(root)
+        self.stages = order_stages(stages)
+        self.workers = max(1, workers)
+        self.llm_concurrency = llm_concurrency
+        self.stage_args = stage_args or {}
+        self.on_result = on_result
+        self.state_dir = os.path.join(self.root, WORKSPACE_DIR)
+        self.log_dir = os.path.join(self.state_dir, 'logs')
+        self._stopping = threading.Event()
+        self._processes = set()
+        self._processes_guard = threading.Lock()
+        self._report_guard = threading.Lock()
+
+    def stop(self):
+        """Stop starting new stages and terminate the running ones"""
+        self._stopping.set()
+        with self._processes_guard:
+            for process in self._processes:
+                process.terminate()
+
+    def _env(self):
+        env = dict(os.environ, BOB_NO_DAEMON='1')
+        if self.llm_concurrency:
+            env[LLM_CONCURRENCY_ENV] = str(self.llm_concurrency)
+            env[LLM_SLOT_DIR_ENV] = os.path.join(self.state_dir, 'llm_slots')
+        return env
+
+    def _run_stage(self, project, stage, log):
+        command = [sys.executable, '-m', 'bob.cli.main'] + JOB_COMMANDS[stage] + self.stage_args.get(stage, [])
+        log.write(f"==> {stage}: {' '.join(command[3:])}\n")
+        log.flush()
+        process = subprocess.Popen(
+            command, cwd=project, env=self._env(),
+            stdin=subprocess.DEVNULL, stdout=log, stderr=subprocess.STDOUT
+        )
+        with self._processes_guard:
+            self._processes.add(process)
+        # stop() may have run before the process was registered
+        if self._stopping.is_set():
+            process.terminate()
+        try:
+            return process.wait()
+        finally:
+            with self._processes_guard:
+                self._processes.discard(process)
+
+    def run_project(self, project):
+        """Run all stages for one project and return its result"""
+        name = project_name(self.root, project)
+        log_path = os.path.join(self.log_dir, log_file_name(name) + '.log')
+        result = {"project": name, "status": DONE, "stages": [], "seconds": 0.0, "log": log_path}
+        started = time.monotonic()
+
+        with open(log_path, 'w') as log:
+            for stage in self.stages:
+                if self._stopping.is_set():
+                    status, exit_code, seconds = CANCELLED, None, 0.0
+                elif result['status'] != DONE:
+                    status, exit_code, seconds = SKIPPED, None, 0.0
+                else:
+                    stage_started = time.monotonic()
+                    try:
+                        exit_code = self._run_stage(project, stage, log)
+                    except OSError as e:
+                        log.write(f"Failed to start: {e}\n")
+                        exit_code = None
+                    seconds = time.monotonic() - stage_started
+                    if self._stopping.is_set():
+                        status = CANCELLED
+                    else:
+                        status = DONE if exit_code == 0 else FAILED
+                result['stages'].append({"stage": stage, "status": status, "exit_code": exit_code, "seconds": seconds})
+                if status in (FAILED, CANCELLED) and result['status'] == DONE:
+                    result['status'] = status
+
+        result['seconds'] = time.monotonic() - started
+        if self.on_result:
+            with self._report_guard:
+                self.on_result(result)
+        return result
+
+    def run(self, projects):
+        """Run the stages over projects. Returns the report as a dict and saves it"""
+        os.makedirs(self.log_dir, exist_ok=True)
+        started_at = datetime.now().isoformat()
+        started = time.monotonic()
+
+        executor = ThreadPoolExecutor(max_workers=self.workers)
+        try:
+            results = list(executor.map(self.run_project, projects))
+        except KeyboardInterrupt:
+            self.stop()
+            executor.shutdown(wait=True)
+            raise
+        executor.shutdown(wait=True)
+
+        report = build_report(results, self.stages, started_at, time.monotonic() - started)
+        report['workers'] = self.workers
+        report['llm_concurrency'] = self.llm_concurrency
+        atomic_write(os.path.join(self.state_dir, REPORT_FILE), json.dumps(report, indent=2))
+        return report
+
+def build_report(results, stages, started_at, seconds):
+    """Aggregate per-project results into counts and per-stage timings"""
+    counts = {}
+    for result in results:
+        counts[result['status']] = counts.get(result['status'], 0) + 1
+
+    stage_totals = {}
+    for stage in stages:
+        timings = [
+            entry['seconds'] for result in results for entry in result['stages']
+            if entry['stage'] == stage and entry['status'] in (DONE, FAILED)
+        ]
+        stage_totals[stage] = {
+            "runs": len(timings),
+            "total_seconds": sum(timings),
+            "max_seconds": max(timings) if timings else 0.0,
+        }
+
+    busy = sum(result['seconds'] for result in results)
+    return {
+        "started_at": started_at,
+        "stages": stages,
+        "seconds": seconds,
+        # Total project time over wall time: how much the pool overlapped work
+        "speedup": busy / seconds if seconds else 0.0,
+        "counts": counts,
+        "stage_totals": stage_totals,
+        "projects": results,
+    }
+
+def load_report(root):
+    """Load the last saved report for the workspace at root, or None"""
+    path = os.path.join(os.path.abspath(root), WORKSPACE_DIR, REPORT_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r') as f:
+        return json.load(f)
@@ -24,7 +24,7 @@ setup(
     },
     entry_points={
         'console_scripts': [
-            'bob=bob.cli.main:cli',
+            'bob=bob.cli.client:main',
         ],
     },
     author="Minkyu Shim", 
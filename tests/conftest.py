@@ -0,0 +1,39 @@
+import pytest
+
+STUB_DESIGN = """Greeter greets users by name.
+
+```json
+{"classes": [{"name": "Greeter", "responsibility": "Greets users",
+  "methods": [{"name": "greet", "signature": "greet(name: str) -> str", "description": "Greet a user"}]}],
+ "relationships": [], "patterns": []}
+```"""
+
+class StubProvider:
+    """An AI provider that answers every prompt with a fixed reply and records the prompts"""
+
+    provider = 'stub'
+    model_name = 'stub-model'
+
+    def __init__(self, reply=STUB_DESIGN):
+        self.reply = reply
+        self.prompts = []
+
+    def for_task(self, task):
+        return self
+
+    def get_response(self, prompt, task=None):
+        self.prompts.append(prompt)
+        return self.reply(prompt) if callable(self.reply) else self.reply
+
+    def stream_response(self, prompt, task=None, cancel=None):
+        yield self.get_response(prompt, task)
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    """Run the test inside an empty project directory"""
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+@pytest.fixture
+def stub_provider():
+    return StubProvider()
@@ -0,0 +1,46 @@
+from bob.core.bench import compare, load_baseline, measure, save_baseline, synthetic_project
+
+def test_synthetic_project_is_deterministic_and_sized():
+    objectives, stories, designs = synthetic_project(objectives=20, story_groups=3, designs=2, refinements=1)
+
+    assert (objectives, stories, designs) == synthetic_project(objectives=20, story_groups=3, designs=2, refinements=1)
+    assert len(objectives['objectives']) == 20 and objectives['next_id'] == 21
+    assert len(stories['user_stories']) == 3
+    assert len(designs['designs']) == 2
+    assert len(designs['designs'][0]['refined_designs']) == 1
+    assert synthetic_project(objectives=20, seed=1)[0] != objectives
+
+def test_measure_runs_setup_before_every_call():
+    calls = []
+
+    result = measure(lambda: calls.append('run'), setup=lambda: calls.append('setup'), repeat=2)
+
+    assert calls == ['setup', 'run'] * 3
+    assert result['seconds'] >= 0 and result['peak_kb'] is not None
+    assert measure(lambda: None, memory=False)['peak_kb'] is None
+
+def test_baselines_are_kept_per_scale(project):
+    save_baseline('baseline.json', 'small', {"load": {"seconds": 0.1, "peak_kb": 10}})
+    save_baseline('baseline.json', 'large', {"load": {"seconds": 1.0, "peak_kb": 100}})
+
+    baselines = load_baseline('baseline.json')
+    assert sorted(baselines) == ['large', 'small']
+    assert baselines['small']['cases']['load']['seconds'] == 0.1
+    assert load_baseline('missing.json') == {}
+
+def test_compare_reports_time_and_memory_regressions():
+    baseline = {
+        "load": {"seconds": 0.1, "peak_kb": 100},
+        "tiny": {"seconds": 0.001, "peak_kb": 10},
+    }
+    results = {
+        "load": {"seconds": 0.2, "peak_kb": 200},
+        "tiny": {"seconds": 0.003, "peak_kb": 10},
+        "new": {"seconds": 5.0, "peak_kb": 1},
+    }
+
+    regressions = compare(results, baseline)
+
+    assert len(regressions) == 2
+    assert all(regression.startswith("load: ") for regression in regressions)
+    assert compare(results, baseline, time_threshold=3, memory_threshold=3) == []
@@ -0,0 +1,55 @@
+import pytest
+
+from bob.core.cancellation import CancelToken, cancellable
+from bob.core.streaming import StreamAborted
+
+def test_cancel_calls_registered_closers_once():
+    token = CancelToken()
+    closed = []
+    token.on_cancel(lambda: closed.append('a'))
+    unregister = token.on_cancel(lambda: closed.append('b'))
+    unregister()
+
+    token.cancel()
+    token.cancel()
+
+    assert token.cancelled
+    assert closed == ['a']
+
+def test_closer_registered_after_cancel_runs_immediately():
+    token = CancelToken()
+    token.cancel()
+    closed = []
+
+    token.on_cancel(lambda: closed.append(True))
+
+    assert closed == [True]
+
+def test_failing_closer_does_not_stop_the_others():
+    token = CancelToken()
+    closed = []
+    token.on_cancel(lambda: 1 / 0)
+    token.on_cancel(lambda: closed.append(True))
+
+    token.cancel()
+
+    assert closed == [True]
+
+def test_cancellable_passes_chunks_through():
+    assert list(cancellable(iter(['a', 'b']), CancelToken())) == ['a', 'b']
+    assert list(cancellable(iter(['a']), None)) == ['a']
+
+def test_cancelled_stream_fails_instead_of_ending_short():
+    token = CancelToken()
+    seen = []
+
+    def chunks():
+        yield 'a'
+        token.cancel()
+        yield 'b'
+        yield 'c'
+
+    with pytest.raises(StreamAborted):
+        for chunk in cancellable(chunks(), token):
+            seen.append(chunk)
+    assert seen == ['a', 'b']
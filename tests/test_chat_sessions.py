@@ -0,0 +1,71 @@
+import json
+
+import pytest
+
+from bob.core.chat_sessions import ChatSession, format_turn, list_sessions, read_range, read_tail
+from bob.core.summarize import estimate_tokens
+
+from .conftest import StubProvider
+
+def make_turns(count):
+    return [{"role": 'user' if n % 2 == 0 else 'assistant', "content": f"message {n}"} for n in range(count)]
+
+def test_read_tail_reads_backwards_within_budget(tmp_path):
+    path = str(tmp_path / 'session.jsonl')
+    turns = make_turns(50)
+    with open(path, 'w') as f:
+        f.writelines(json.dumps(turn) + '\n' for turn in turns)
+        # A turn cut short by a crash
+        f.write('{"role": "user", "cont')
+    budget = sum(estimate_tokens(format_turn(turn)) for turn in turns[-5:])
+
+    turns = read_tail(path, budget, block_size=64)
+
+    assert [turn['content'] for _, turn in turns] == [f"message {n}" for n in range(45, 50)]
+    offset = turns[0][0]
+    assert read_range(path, offset, turns[1][0]) == [turns[0][1]]
+    assert len(read_range(path, 0, offset)) == 45
+
+def test_find_by_unique_prefix(tmp_path):
+    for session_id in ('20240101-a', '20240102-b'):
+        (tmp_path / f"{session_id}.jsonl").write_text('{"role": "user", "content": "hi"}\n')
+
+    assert ChatSession.find('20240102', str(tmp_path)).id == '20240102-b'
+    with pytest.raises(KeyError, match="2 sessions match"):
+        ChatSession.find('2024', str(tmp_path))
+    with pytest.raises(KeyError, match="No session matches"):
+        ChatSession.find('2025', str(tmp_path))
+
+def test_append_and_list_sessions(tmp_path):
+    session = ChatSession.create(str(tmp_path))
+    session.append('user', "Hello there")
+    session.append('assistant', "Hi!")
+
+    turns = ChatSession(session.id, str(tmp_path)).load(1000)
+    assert [(turn['role'], turn['content']) for turn in turns] == [('user', "Hello there"), ('assistant', "Hi!")]
+    sessions = list_sessions(str(tmp_path))
+    assert [(s['id'], s['first_message']) for s in sessions] == [(session.id, "Hello there")]
+
+def test_prompt_without_history_is_the_message(tmp_path):
+    session = ChatSession.create(str(tmp_path))
+
+    assert session.prompt(StubProvider(), "Hello", 1000) == "Hello"
+
+def test_old_turns_are_folded_into_a_cached_summary(project, tmp_path):
+    session = ChatSession.create(str(tmp_path))
+    for n in range(40):
+        session.append('user' if n % 2 == 0 else 'assistant', f"message {n} " + "word " * 20)
+    provider = StubProvider(reply="They talked about words.")
+
+    summary, turns = session.context(provider, 300)
+
+    assert summary == "They talked about words."
+    assert len(provider.prompts) == 1
+    assert 0 < len(turns) < 40 and turns[-1]['content'].startswith("message 39")
+    # A resumed session reuses the summary instead of summarizing again
+    resumed = ChatSession(session.id, str(tmp_path))
+    resumed.load(300)
+    prompt = resumed.prompt(provider, "And then?", 300)
+    assert len(provider.prompts) == 1
+    assert "Summary of the earlier conversation:\nThey talked about words." in prompt
+    assert prompt.endswith("User: And then?")
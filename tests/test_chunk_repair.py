@@ -0,0 +1,60 @@
+import pytest
+
+from bob.core.chunk_repair import RepairFailed, broken_chunks, extract_code, repair_module, split_chunks
+
+from .conftest import StubProvider
+
+MODULE = '''import os
+import pytest
+
+@pytest.fixture
+def path():
+    return os.getcwd()
+
+def test_ok(path):
+    assert path
+
+def test_broken(path:
+    assert path
+'''
+
+def test_split_chunks_classifies_top_level_blocks():
+    chunks = split_chunks(MODULE)
+
+    assert [chunk['kind'] for chunk in chunks] == ['imports', 'fixture', 'test', 'test']
+    assert ''.join(chunk['text'] for chunk in chunks) == MODULE
+    assert broken_chunks(chunks) == [3]
+
+def test_split_chunks_merges_multiline_strings():
+    code = 'TEXT = """\nfirst\nsecond = 1\n"""\n\ndef test_a():\n    assert TEXT\n'
+
+    assert [chunk['kind'] for chunk in split_chunks(code)] == ['other', 'test']
+
+def test_extract_code():
+    assert extract_code("Fixed:\n```python\nx = 1\n```") == "x = 1\n"
+    assert extract_code("x = 1") == "x = 1"
+    assert extract_code(None) == ""
+
+def test_repair_module_only_sends_the_broken_chunk():
+    provider = StubProvider(reply="```python\ndef test_broken(path):\n    assert path\n```")
+
+    code, repaired = repair_module(MODULE, provider)
+
+    assert repaired == 1
+    assert code == MODULE.replace("test_broken(path:", "test_broken(path):")
+    assert len(provider.prompts) == 1
+    assert "def test_ok" not in provider.prompts[0]
+    assert "import os" in provider.prompts[0]
+
+def test_repair_module_leaves_valid_code_alone():
+    provider = StubProvider()
+
+    assert repair_module("x = 1\n", provider) == ("x = 1\n", 0)
+    assert provider.prompts == []
+
+def test_repair_gives_up_after_max_attempts():
+    provider = StubProvider(reply="def still(:\n")
+
+    with pytest.raises(RepairFailed):
+        repair_module(MODULE, provider, max_attempts=2)
+    assert len(provider.prompts) == 2
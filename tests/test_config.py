@@ -0,0 +1,42 @@
+import copy
+import json
+
+from click.testing import CliRunner
+
+from bob.cli.config import DEFAULT_CONFIG, DEFAULT_CONFIG_PATH
+from bob.cli.llm_config import DEFAULT_LLM_CONFIG, resolve_route
+from bob.cli.main import cli
+
+def test_default_routing_uses_one_model_for_every_task():
+    config = copy.deepcopy(DEFAULT_LLM_CONFIG)
+
+    assert {resolve_route(config, task) for task in ('design', 'summarize', 'repair')} == {('openai', 'gpt-4')}
+
+def test_fast_profile_routes_summaries_to_fast_model():
+    config = dict(copy.deepcopy(DEFAULT_LLM_CONFIG), routing_profile='fast')
+
+    assert resolve_route(config, 'summarize') == ('openai', 'gpt-3.5-turbo')
+    assert resolve_route(config, 'design') == ('openai', 'gpt-4')
+
+def test_ai_model_is_deprecated(project):
+    with open(DEFAULT_CONFIG_PATH, 'w') as f:
+        json.dump(DEFAULT_CONFIG, f)
+
+    result = CliRunner().invoke(cli, ['config', 'set', '--ai-model', 'gpt-4'])
+
+    assert result.exit_code == 0
+    assert "deprecated" in result.output and "bob llm route" in result.output
+    with open(DEFAULT_CONFIG_PATH) as f:
+        assert 'ai_model' not in json.load(f)
+    assert '--ai-model' not in CliRunner().invoke(cli, ['config', 'set', '--help']).output
+
+def test_config_set_saves_values(project):
+    with open(DEFAULT_CONFIG_PATH, 'w') as f:
+        json.dump(DEFAULT_CONFIG, f)
+
+    result = CliRunner().invoke(cli, ['config', 'set', '--refine-mode', 'full', '--job-concurrency', '3'])
+
+    assert result.exit_code == 0, result.output
+    with open(DEFAULT_CONFIG_PATH) as f:
+        saved = json.load(f)
+    assert saved['refine_mode'] == 'full' and saved['job_concurrency'] == 3
@@ -0,0 +1,30 @@
+from bob.core.context_window import DEFAULT_CONTEXT_SIZES, context_sizes, size_context
+
+def test_context_sizes_are_parsed_and_sorted():
+    assert context_sizes([8192, "2048", 2048]) == [2048, 8192]
+    assert context_sizes(None) == DEFAULT_CONTEXT_SIZES
+    assert context_sizes(["big"]) == DEFAULT_CONTEXT_SIZES
+    assert context_sizes([0, -1]) == DEFAULT_CONTEXT_SIZES
+
+def test_short_prompt_gets_the_smallest_context():
+    num_ctx, num_predict, fits = size_context("hello", max_tokens=4096)
+
+    assert num_ctx == 2048
+    assert 1024 <= num_predict <= 4096
+    assert fits
+
+def test_long_prompt_gets_room_for_a_long_answer():
+    prompt = "word " * 4000
+
+    num_ctx, num_predict, fits = size_context(prompt, max_tokens=8192)
+
+    assert num_ctx > 2048
+    assert num_predict <= num_ctx and num_predict >= 1024
+    assert fits
+
+def test_prompt_larger_than_every_size_does_not_fit():
+    num_ctx, num_predict, fits = size_context("x" * 1_000_000, max_tokens=4096, sizes=[2048, 4096])
+
+    assert num_ctx == 4096
+    assert num_predict == 1024
+    assert not fits
@@ -0,0 +1,33 @@
+from bob.core.continuation import (
+    CONTINUE_INSTRUCTION, continuation_delta, continuation_messages, continuation_prompt
+)
+
+def test_messages_ask_to_continue_or_prefill():
+    messages = continuation_messages("Write code", "def f():\n    ")
+
+    assert [message['role'] for message in messages] == ['user', 'assistant', 'user']
+    assert messages[-1]['content'] == CONTINUE_INSTRUCTION
+    prefilled = continuation_messages("Write code", "def f():\n    ", prefill=True)
+    assert prefilled[-1] == {"role": "assistant", "content": "def f():"}
+
+def test_prompt_includes_partial_response():
+    prompt = continuation_prompt("Write code", "def f():")
+    assert "<partial_response>\ndef f():\n</partial_response>" in prompt
+
+def test_plain_continuation_is_appended_as_is():
+    assert continuation_delta("The quick brown", " fox jumps") == " fox jumps"
+
+def test_repeated_words_are_trimmed():
+    previous = "The quick brown fox jumps over"
+    assert continuation_delta(previous, "brown fox jumps over the lazy dog") == " the lazy dog"
+
+def test_short_coincidental_overlap_is_kept():
+    assert continuation_delta("call(a", "a, b)") == "a, b)"
+
+def test_reopened_code_fence_is_dropped():
+    previous = "Here:\n```python\ndef f():\n"
+    assert continuation_delta(previous, "```python\n    return 1\n```") == "    return 1\n```"
+
+def test_trailing_whitespace_of_prefill_is_not_doubled():
+    # The prefill was sent as "def f():", so the model writes the line break and indent again
+    assert continuation_delta("def f():\n    ", "\n    return 1") == "return 1"
@@ -0,0 +1,43 @@
+from bob.core.dedup import (
+    dedup_items, dedup_story_blocks, find_near_duplicates, minhash, shingles, similarity
+)
+
+STORY = "As a user, I want to reset my password by email so that I can get back into my account"
+
+def test_shingles_ignore_case_punctuation_and_numbering():
+    assert shingles("1. As a User!") == shingles("- as a user")
+    assert shingles("") == set()
+    assert shingles("Hi there") == {"hi there"}
+
+def test_similar_texts_have_similar_signatures():
+    same = similarity(minhash(shingles(STORY)), minhash(shingles(STORY.upper() + ".")))
+    different = similarity(minhash(shingles(STORY)), minhash(shingles("As an admin, I want to export reports")))
+
+    assert same == 1.0
+    assert different < 0.3
+    assert similarity(None, minhash(shingles(STORY))) == 0.0
+
+def test_near_duplicates_are_found():
+    texts = [STORY, "As an admin, I want to export monthly reports as CSV", "2. " + STORY + "."]
+
+    assert [(i, j) for i, j, _ in find_near_duplicates(texts)] == [(0, 2)]
+
+def test_dedup_keeps_the_latest_version_in_order():
+    items = [STORY, "As an admin, I want to export monthly reports as CSV", STORY + "!"]
+
+    assert dedup_items(items) == items[1:]
+    assert dedup_items(items, threshold=1.01) == items
+
+def test_dedup_story_blocks_drops_repeats_from_earlier_blocks():
+    blocks = [
+        f"1. {STORY}\n2. As an admin, I want to export monthly reports as CSV",
+        f"1. {STORY}",
+        "1. As a guest, I want to browse the catalogue without signing in",
+    ]
+
+    assert dedup_story_blocks(blocks) == [
+        "2. As an admin, I want to export monthly reports as CSV",
+        f"1. {STORY}",
+        "1. As a guest, I want to browse the catalogue without signing in",
+    ]
+    assert dedup_story_blocks([f"1. {STORY}", f"1. {STORY}"]) == [f"1. {STORY}"]
@@ -0,0 +1,42 @@
+"""Smoke tests running `bob design` end to end against a stub provider"""
+import yaml
+from click.testing import CliRunner
+
+from bob.cli import design as design_module
+from bob.cli.main import cli
+from bob.cli.objectives import save_objectives
+from bob.cli.user_stories import save_user_stories
+
+from .conftest import StubProvider
+
+def write_project_data():
+    save_objectives({"objectives": [
+        {"id": 1, "title": "Greet users", "description": "Say hello to users by name", "priority": "high"},
+    ]})
+    save_user_stories({"user_stories": [
+        {"stories": "As a user, I want to be greeted by name.", "refined_stories": []},
+    ]})
+
+def test_design_saves_generated_design(project, stub_provider, monkeypatch):
+    write_project_data()
+    monkeypatch.setattr(design_module, 'get_ai_provider', lambda: stub_provider)
+
+    result = CliRunner().invoke(cli, ['design', '--no-interactive'])
+
+    assert result.exit_code == 0, result.output
+    with open(design_module.DESIGN_FILE) as f:
+        saved = yaml.safe_load(f)
+    design = saved['designs'][-1]
+    assert design['design'] == "Greeter greets users by name."
+    assert design['structured_design']['classes'][0]['name'] == 'Greeter'
+    assert "Greet users" in stub_provider.prompts[0]
+
+def test_design_fails_without_a_response(project, monkeypatch):
+    write_project_data()
+    monkeypatch.setattr(design_module, 'get_ai_provider', lambda: StubProvider(reply=""))
+
+    result = CliRunner().invoke(cli, ['design', '--no-interactive'])
+
+    assert result.exit_code == 1
+    assert "No design was generated" in result.output
+    assert not (project / design_module.DESIGN_FILE).exists()
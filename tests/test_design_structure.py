@@ -0,0 +1,71 @@
+from bob.core import design_structure
+from bob.core.design_structure import (
+    build_design_index, class_relationships, find_class, find_methods, format_class, latest_structure,
+    split_design_response, validate_structured_design
+)
+
+from .conftest import STUB_DESIGN
+
+STRUCTURED = {
+    "classes": [
+        {"name": "Greeter", "responsibility": "Greets users", "methods": [
+            {"name": "greet", "signature": "greet(name: str) -> str",
+             "parameters": [{"name": "name", "type": "str", "description": "Who to greet"}], "returns": "str"},
+        ]},
+        {"name": "Farewell", "responsibility": "Says goodbye", "methods": [
+            {"name": "greet", "signature": "greet() -> None"},
+        ]},
+    ],
+    "relationships": [{"source": "Greeter", "target": "Farewell", "type": "uses"}],
+}
+
+def test_split_design_response():
+    prose, data = split_design_response(STUB_DESIGN)
+
+    assert prose == "Greeter greets users by name."
+    assert data['classes'][0]['name'] == 'Greeter'
+    assert split_design_response("No JSON here") == ("No JSON here", None)
+    assert split_design_response("Text\n```json\n{broken\n```")[1] is None
+
+def test_validation_reports_errors():
+    assert validate_structured_design(STRUCTURED) == []
+    assert len(validate_structured_design({"classes": [{"name": "Greeter", "methods": "none"}]})) == 2
+
+def test_validation_without_jsonschema(monkeypatch):
+    monkeypatch.setattr(design_structure, 'jsonschema', None)
+
+    assert validate_structured_design(STRUCTURED) == []
+    assert validate_structured_design({"classes": [{"name": "", "responsibility": "x", "methods": "none"}]}) == [
+        "$.classes[0].name: must not be empty",
+        "$.classes[0].methods: expected array",
+    ]
+
+def test_lookups_are_case_insensitive():
+    index = build_design_index(STRUCTURED)
+
+    assert find_class(STRUCTURED, index, "greeter")['name'] == "Greeter"
+    assert find_class(STRUCTURED, index, "Missing") is None
+    assert [cls['name'] for cls, _ in find_methods(STRUCTURED, index, "GREET")] == ["Greeter", "Farewell"]
+    assert [method['signature'] for _, method in find_methods(STRUCTURED, index, "farewell.greet")] == ["greet() -> None"]
+    assert class_relationships(STRUCTURED, "farewell") == STRUCTURED['relationships']
+
+def test_latest_structure_prefers_newest_refinement():
+    refined = {"classes": [{"name": "Host", "responsibility": "", "methods": []}]}
+    entry = {"structured_design": STRUCTURED, "refined_designs": [{"structured_design": refined}, {"refined_result": "text only"}]}
+
+    structured, index = latest_structure(entry)
+
+    assert structured is refined and index == {"classes": {"host": 0}, "methods": {}}
+    assert latest_structure({"design": "prose only"}) == (None, None)
+
+def test_format_class():
+    text = format_class(STRUCTURED['classes'][0], STRUCTURED['relationships'])
+
+    assert text.splitlines() == [
+        "class Greeter",
+        "  Greets users",
+        "  greet(name: str) -> str",
+        "      - name (str): Who to greet",
+        "      returns: str",
+        "  [uses] Greeter -> Farewell",
+    ]
@@ -0,0 +1,157 @@
+"""Ollama load balancing against local stand-in servers (no Ollama needed)"""
+import copy
+import json
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from bob.cli import chat
+from bob.cli.llm_config import DEFAULT_LLM_CONFIG
+from bob.core.endpoints import EndpointPool
+
+GENERATE_SECONDS = 0.3
+
+class StandIn:
+    """A stand-in Ollama server that generates one response at a time, like a CPU inference box"""
+
+    def __init__(self, status=200):
+        self.status = status
+        self.served = 0
+        self.loaded = []
+        self._busy = threading.Lock()
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                self._reply(200, {"models": [{"name": name} for name in stand_in.loaded]})
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+                if stand_in.status != 200:
+                    self._reply(stand_in.status, {"error": "stand-in failure"})
+                    return
+                with stand_in._busy:
+                    time.sleep(GENERATE_SECONDS)
+                    stand_in.served += 1
+                    stand_in.loaded = [f"{body['model']}:latest"]
+                self._reply(200, {"response": stand_in.url, "done": True, "done_reason": "stop"})
+
+            def _reply(self, status, payload):
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+def unused_url():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return f"http://127.0.0.1:{sock.getsockname()[1]}"
+
+@pytest.fixture
+def stand_ins():
+    servers = []
+
+    def start(count, status=200):
+        new = [StandIn(status) for _ in range(count)]
+        servers.extend(new)
+        return new
+
+    yield start
+    for server in servers:
+        server.close()
+
+@pytest.fixture
+def provider(monkeypatch):
+    def build(urls):
+        config = copy.deepcopy(DEFAULT_LLM_CONFIG)
+        config['ai_provider'] = 'ollama'
+        config['routing_profile'] = 'quality'
+        config['providers']['ollama'].update(ollama_endpoints=urls, health_check_interval=0)
+        monkeypatch.setattr(chat, 'load_llm_config', lambda: config)
+        provider = chat.AIProvider()
+        # A fresh pool per test, not the process-wide one for these URLs
+        provider.endpoints = EndpointPool(urls, health_interval=0)
+        return provider
+    return build
+
+def ask_concurrently(provider, count):
+    with ThreadPoolExecutor(count) as executor:
+        return list(executor.map(lambda idx: provider.get_response(f"question {idx}", task='chat'), range(count)))
+
+def test_throughput_scales_with_endpoints(stand_ins, provider):
+    single = provider([server.url for server in stand_ins(1)])
+    started = time.monotonic()
+    ask_concurrently(single, 6)
+    single_seconds = time.monotonic() - started
+
+    servers = stand_ins(3)
+    pooled = provider([server.url for server in servers])
+    started = time.monotonic()
+    replies = ask_concurrently(pooled, 6)
+    pooled_seconds = time.monotonic() - started
+
+    assert sorted(replies) == sorted(server.url for server in servers for _ in range(2))
+    assert pooled_seconds < single_seconds / 2
+
+def test_unreachable_endpoint_is_ejected(stand_ins, provider):
+    server, = stand_ins(1)
+    dead = unused_url()
+    pooled = provider([dead, server.url])
+
+    assert ask_concurrently(pooled, 4) == [server.url] * 4
+    dead_endpoint = pooled.endpoints.endpoints[0]
+    assert dead_endpoint.ejected and dead_endpoint.failures >= 1
+
+def test_unavailable_endpoint_fails_over(stand_ins, provider):
+    unavailable, = stand_ins(1, status=503)
+    server, = stand_ins(1)
+    pooled = provider([unavailable.url, server.url])
+
+    assert pooled.get_response("hello", task='chat') == server.url
+    assert pooled.endpoints.endpoints[0].ejected
+
+def test_request_error_does_not_eject(stand_ins, provider):
+    # Ollama answers 500 for failures of a single request, e.g. running out of memory
+    failing, = stand_ins(1, status=500)
+    pooled = provider([failing.url])
+
+    assert pooled.get_response("hello", task='chat') == ""
+    assert not pooled.endpoints.endpoints[0].ejected
+
+def test_warm_endpoint_is_preferred():
+    pool = EndpointPool(["http://cold", "http://warm"], health_interval=0)
+    pool.endpoints[1].models.add("llama2:latest")
+
+    endpoint = pool.acquire("llama2")
+    assert endpoint.url == "http://warm"
+    # Once the warm node is busy, an idle cold one is as good
+    assert pool.acquire("llama2").url == "http://cold"
+
+def test_health_check_restores_endpoint_and_reads_loaded_models(stand_ins):
+    server, = stand_ins(1)
+    server.loaded = ["llama2:latest"]
+    pool = EndpointPool([server.url], health_interval=0)
+    endpoint = pool.endpoints[0]
+    pool.release(pool.acquire("llama2"), failed=True)
+    assert endpoint.ejected
+
+    assert pool.check(endpoint, requests.Session())
+    assert not endpoint.ejected
+    assert endpoint.has_model("llama2")
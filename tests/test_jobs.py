@@ -0,0 +1,71 @@
+import os
+
+import pytest
+
+from bob.cli.objectives import save_objectives
+from bob.core import jobs
+from bob.core.jobs import CANCELLED, DONE, FAILED, QUEUED, JobQueue, JobWorker
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+@pytest.fixture
+def queue(project, monkeypatch):
+    # Commands that need no AI provider, so jobs run end to end as real bob subprocesses
+    monkeypatch.setitem(jobs.JOB_COMMANDS, 'objectives', ['objectives', 'list'])
+    monkeypatch.setitem(jobs.JOB_COMMANDS, 'import', ['objectives', 'import'])
+    monkeypatch.setenv('PYTHONPATH', ROOT)
+    return JobQueue()
+
+def run_worker(queue):
+    JobWorker(queue, concurrency=2, exit_when_idle=True, poll_interval=0.1).run()
+
+def read_log(queue, job_id):
+    with open(queue.log_path(job_id)) as f:
+        return f.read()
+
+def test_worker_runs_jobs_and_stores_exit_code_and_log(queue):
+    save_objectives({"objectives": [
+        {"id": 1, "title": "Greet users", "description": "Say hello", "priority": "high",
+         "added_at": "2024-01-01T00:00:00"},
+    ]})
+    ok = queue.submit('objectives')
+    failing = queue.submit('import', ['missing.yaml'])
+
+    run_worker(queue)
+
+    job = queue.get(ok)
+    assert (job['status'], job['exit_code'], job['error']) == (DONE, 0, None)
+    assert "Greet users" in read_log(queue, ok)
+    job = queue.get(failing)
+    assert (job['status'], job['exit_code']) == (FAILED, 2)
+    assert "does not exist" in read_log(queue, failing)
+    assert queue.active_workers() == []
+
+def test_jobs_are_claimed_by_priority_then_age(queue):
+    low = queue.submit('objectives')
+    high = queue.submit('objectives', priority=5)
+    later = queue.submit('objectives')
+
+    assert [queue.claim(os.getpid())['id'] for _ in range(3)] == [high, low, later]
+    assert queue.claim(os.getpid()) is None
+
+def test_cancelling_a_queued_job_keeps_it_from_running(queue):
+    job_id = queue.submit('objectives')
+    queue.cancel(job_id)
+
+    run_worker(queue)
+
+    assert queue.get(job_id)['status'] == CANCELLED
+    assert not os.path.exists(queue.log_path(job_id))
+
+def test_orphaned_jobs_are_requeued(queue):
+    job_id = queue.submit('objectives')
+    queue.claim(worker_pid=2 ** 22 + 1)
+
+    queue.requeue_orphans()
+
+    assert queue.get(job_id)['status'] == QUEUED
+
+def test_unknown_job_kind_is_rejected(queue):
+    with pytest.raises(ValueError):
+        queue.submit('deploy')
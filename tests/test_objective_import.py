@@ -0,0 +1,93 @@
+import pytest
+
+from bob.core.objective_import import detect_format, import_objectives, iter_records, validate_record
+
+YAML = """\
+objectives:
+  - title: Login
+    description: Users sign in
+    priority: High
+  - title: Export
+    description: Export reports
+    priority: low
+    tags: [csv, reports]
+"""
+
+def write(tmp_path, name, text):
+    path = tmp_path / name
+    path.write_text(text, encoding='utf-8')
+    return str(path)
+
+def test_detect_format():
+    assert detect_format('data.YML') == 'yaml'
+    assert detect_format('data.ndjson') == 'jsonl'
+    with pytest.raises(ValueError):
+        detect_format('data.txt')
+
+def test_yaml_records_are_streamed_with_line_numbers(tmp_path):
+    records = list(iter_records(write(tmp_path, 'objectives.yaml', YAML)))
+
+    assert [(line_no, record['title']) for line_no, record, _ in records] == [(2, 'Login'), (5, 'Export')]
+    assert records[1][1]['tags'] is NotImplemented
+    top_level = write(tmp_path, 'list.yaml', "- title: A\n  description: B\n  priority: ~\n- just text\n")
+    assert [(record, error) for _, record, error in iter_records(top_level)] == [
+        ({"title": 'A', "description": 'B', "priority": None}, None),
+        (None, "record must be a mapping"),
+    ]
+
+def test_validate_record():
+    assert validate_record({"title": " Login ", "description": "Sign in", "priority": "HIGH"}) == (
+        {"title": "Login", "description": "Sign in", "priority": "high"}, []
+    )
+    assert validate_record({"title": NotImplemented, "description": " ", "priority": "urgent"})[1] == [
+        "title must be a string", "missing description", "priority must be high, medium, or low (got 'urgent')"
+    ]
+
+def test_import_skips_duplicates_and_emits_in_batches(tmp_path):
+    path = write(tmp_path, 'objectives.jsonl', "\n".join([
+        '{"title": "Login", "description": "Users sign in", "priority": "high"}',
+        '{"title": "login", "description": "Users  sign in", "priority": "low"}',
+        '{"title": "Export", "description": "Export reports", "priority": "low"}',
+        '{"title": "Search", "description": "Find reports", "priority": "medium"}',
+        '',
+    ]))
+    existing = [{"title": "Search", "description": "Find reports"}]
+    batches = []
+
+    summary = import_objectives(path, existing, emit=batches.append, batch_size=1)
+
+    assert summary == {"read": 4, "added": 2, "duplicates": 2, "errors": []}
+    assert [[obj['title'] for obj in batch] for batch in batches] == [['Login'], ['Export']]
+    assert all('added_at' in batch[0] for batch in batches)
+
+def test_invalid_records_stop_emitting_unless_skipped(tmp_path):
+    path = write(tmp_path, 'objectives.csv', (
+        "title,description,priority\n"
+        "Login,Users sign in,high\n"
+        "Export,,low\n"
+        "Search,\"Find\nreports\",medium\n"
+    ))
+    emitted = []
+
+    summary = import_objectives(path, [], emit=emitted.extend)
+
+    assert summary['errors'] == [(3, "missing description")]
+    assert emitted == []
+    import_objectives(path, [], emit=emitted.extend, skip_invalid=True)
+    assert [obj['title'] for obj in emitted] == ['Login', 'Search']
+
+def test_format_errors_are_reported_with_lines(tmp_path):
+    jsonl = write(tmp_path, 'bad.jsonl', '{"title": "A"}\n[1]\n{oops\n')
+    assert [(line_no, error) for line_no, _, error in iter_records(jsonl)][1:] == [
+        (2, "record must be an object"), (3, "invalid JSON: Expecting property name enclosed in double quotes")
+    ]
+    csv_path = write(tmp_path, 'bad.csv', "title,description\nA,B\n")
+    assert list(iter_records(csv_path)) == [(1, None, "missing column(s): priority")]
+    yaml_path = write(tmp_path, 'bad.yaml', "objectives:\n  - title: [unclosed\n")
+    assert list(iter_records(yaml_path))[-1][2].startswith("invalid YAML")
+
+def test_undecodable_text_is_reported(tmp_path):
+    path = tmp_path / 'latin1.jsonl'
+    path.write_bytes(b'{"title": "A", "description": "B", "priority": "low"}\n{"title": "caf\xe9"}\n')
+
+    assert list(iter_records(str(path)))[-1] == (2, None, "not valid UTF-8 text")
@@ -0,0 +1,48 @@
+from bob.core.objective_index import ObjectiveIndex, allocate_id, assign_missing_ids, normalize_id
+
+OBJECTIVES = [
+    {"id": "O1", "title": "beta", "priority": "low", "added_at": "2024-01-03T09:00:00"},
+    {"id": "O2", "title": "Alpha", "priority": "high", "added_at": "2024-01-01T09:00:00"},
+    {"id": "O3", "title": "gamma", "priority": "high", "added_at": "2024-01-02T09:00:00"},
+    {"id": "O4", "title": "delta", "priority": "medium", "added_at": "2024-01-02T18:00:00"},
+]
+
+def ids(objectives):
+    return [obj['id'] for obj in objectives]
+
+def test_normalize_id():
+    assert normalize_id("o12") == "O12"
+    assert normalize_id(" 7 ") == "O7"
+    assert normalize_id("X1") is None
+
+def test_assign_missing_ids_never_reuses_ids():
+    data = {"objectives": [{"id": "O2"}, {"title": "new"}, {"title": "newer"}], "next_id": 2}
+
+    assert assign_missing_ids(data) == 2
+    assert ids(data['objectives']) == ["O2", "O3", "O4"]
+    assert allocate_id(data) == "O5"
+    data['objectives'] = []
+    assert allocate_id(data) == "O6"
+
+def test_get_by_id():
+    index = ObjectiveIndex(OBJECTIVES)
+
+    assert index.get("3") == 2
+    assert index.get("O9") is None
+
+def test_query_by_date_range_in_added_order():
+    index = ObjectiveIndex(OBJECTIVES)
+
+    assert index.query(since="2024-01-02", until="2024-01-02") == (2, [OBJECTIVES[2], OBJECTIVES[3]])
+    total, page = index.query(reverse=True, offset=1, limit=2)
+    assert total == 4 and ids(page) == ["O4", "O3"]
+
+def test_query_filters_priority_and_sorts():
+    index = ObjectiveIndex(OBJECTIVES)
+
+    total, page = index.query(priorities=["high"], sort='title')
+    assert total == 2 and ids(page) == ["O2", "O3"]
+    total, page = index.query(sort='priority', limit=3)
+    assert total == 4 and ids(page) == ["O2", "O3", "O4"]
+    total, page = index.query(priorities=["high", "low"], since="2024-01-02", sort='id', reverse=True)
+    assert total == 2 and ids(page) == ["O3", "O1"]
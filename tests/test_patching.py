@@ -0,0 +1,62 @@
+import pytest
+
+from bob.core.patching import PatchFailed, apply_edits, parse_edits, patch_refine
+
+from .conftest import StubProvider
+
+DOCUMENT = "class Greeter:\n    def greet(self):\n        return 'hi'\n\nclass Farewell:\n    pass\n"
+
+def edit(search, replace):
+    return f"<<<<<<< SEARCH\n{search}\n=======\n{replace}\n>>>>>>> REPLACE\n"
+
+def test_parse_edits():
+    assert parse_edits("noise\n" + edit("a", "b") + edit("c", "")) == [("a", "b"), ("c", "")]
+    with pytest.raises(PatchFailed):
+        parse_edits("I rewrote it for you")
+
+def test_apply_exact_edit():
+    revised = apply_edits(DOCUMENT, [("        return 'hi'", "        return 'hello'")])
+    assert "return 'hello'" in revised and "return 'hi'" not in revised
+
+def test_apply_edit_with_wrong_indentation():
+    revised = apply_edits(DOCUMENT, [("class Farewell:\n  pass", "class Farewell:\n    def bye(self): pass")])
+    assert revised.endswith("class Farewell:\n    def bye(self): pass\n")
+
+def test_deleting_lines_removes_their_line_breaks():
+    assert apply_edits("a\nb\nc\n", [("b", "")]) == "a\nc\n"
+
+def test_empty_search_appends():
+    assert apply_edits("a\n", [("", "b")]) == "a\nb"
+
+def test_ambiguous_or_missing_edits_fail():
+    with pytest.raises(PatchFailed, match="2 places"):
+        apply_edits("x\nx\n", [("x", "y")])
+    with pytest.raises(PatchFailed, match="does not match"):
+        apply_edits(DOCUMENT, [("class Missing:", "")])
+
+def test_patch_refine_applies_edits():
+    provider = StubProvider(edit("        return 'hi'", "        return 'hello'"))
+
+    text, patched = patch_refine(provider, DOCUMENT, "say hello", regenerate=lambda: "regenerated")
+
+    assert patched and "return 'hello'" in text
+    assert "say hello" in provider.prompts[0]
+
+def test_patch_refine_falls_back_to_regenerating():
+    reasons = []
+    text, patched = patch_refine(
+        StubProvider("Sure! Here is the new design."), DOCUMENT, "say hello",
+        regenerate=lambda: "regenerated", on_fallback=reasons.append
+    )
+    assert (text, patched) == ("regenerated", False)
+    assert reasons == ["the response contains no edit blocks"]
+
+def test_patch_refine_rejects_invalid_results():
+    def validate(text):
+        raise PatchFailed("invalid")
+
+    text, patched = patch_refine(
+        StubProvider(edit("        return 'hi'", "        return 'hello'")), DOCUMENT, "say hello",
+        regenerate=lambda: "regenerated", validate=validate
+    )
+    assert (text, patched) == ("regenerated", False)
@@ -0,0 +1,32 @@
+from bob.core.prompt_compaction import compact_prompt, compact_text, render_record, render_value
+
+def test_compact_text_tidies_whitespace():
+    assert compact_text("  one  \n\n\n\ntwo\t\n") == "one\n\ntwo"
+    assert compact_text(None) == ""
+
+def test_render_record_drops_metadata_and_empty_fields():
+    record = {"id": "O3", "title": "Login", "description": "Users  sign\nin", "priority": "high",
+              "added_at": "2024-01-01", "notes": ""}
+
+    assert render_record(record) == "O3 Login: Users sign in (priority: high)"
+    assert render_record({"name": "x", "fingerprint": "abc"}) == "name: x"
+
+def test_render_value_lists():
+    assert render_value([{"title": "A"}, {"title": "B", "priority": "low"}]) == "- A\n- B (priority: low)"
+    assert render_value(["one  \n", "", "two"]) == "one\n\ntwo"
+
+def test_compact_prompt_is_smaller_than_plain_formatting():
+    objectives = [{"title": "Login", "description": "Sign in", "added_at": "2024-01-01T00:00:00"}] * 5
+    template = """
+        Objectives:
+        {objectives}
+
+        Write tests.
+    """
+
+    prompt = compact_prompt(template, 'test', objectives=objectives)
+
+    assert prompt.startswith("Objectives:\n- Login: Sign in")
+    assert prompt.endswith("Write tests.")
+    assert "added_at" not in prompt
+    assert len(prompt) < len(template.format(objectives=objectives))
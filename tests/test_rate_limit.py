@@ -0,0 +1,82 @@
+import json
+import os
+import threading
+import time
+
+from bob.core import rate_limit
+from bob.core.rate_limit import LLM_CONCURRENCY_ENV, LLM_SLOT_DIR_ENV, ConcurrencyLimiter, RateLimiter
+
+def test_from_config_is_none_without_limits():
+    assert RateLimiter.from_config('openai', {}) is None
+    limiter = RateLimiter.from_config('openai', {'requests_per_minute': '60', 'tokens_per_minute': 'lots'})
+    assert (limiter.requests_per_minute, limiter.tokens_per_minute) == (60, 0)
+
+def test_acquire_takes_from_both_buckets(tmp_path):
+    limiter = RateLimiter('openai', 60, 1000, state_dir=str(tmp_path))
+
+    limiter.acquire(300)
+    limiter.settle(200)
+
+    with open(limiter.state_path) as f:
+        state = json.load(f)
+    assert round(state['requests']) == 59
+    assert round(state['tokens'], -1) == 500
+    assert state['queue'] == []
+
+def test_acquire_waits_for_the_bucket_to_refill(tmp_path, monkeypatch):
+    monkeypatch.setattr(rate_limit, 'POLL_INTERVAL', 0.05)
+    # One request per 0.3 seconds
+    limiter = RateLimiter('openai', 200, state_dir=str(tmp_path))
+    limiter.acquire(1)
+    with open(limiter.state_path) as f:
+        state = json.load(f)
+    state['requests'] = 0
+    with open(limiter.state_path, 'w') as f:
+        json.dump(state, f)
+
+    started = time.monotonic()
+    limiter.acquire(1)
+
+    assert 0.2 < time.monotonic() - started < 2
+
+def test_penalize_blocks_requests(tmp_path, monkeypatch):
+    monkeypatch.setattr(rate_limit, 'POLL_INTERVAL', 0.05)
+    limiter = RateLimiter('openai', 1000, state_dir=str(tmp_path))
+
+    limiter.penalize(0.3)
+    started = time.monotonic()
+    limiter.acquire(1)
+
+    assert time.monotonic() - started > 0.2
+
+def test_concurrency_limiter_from_env(tmp_path, monkeypatch):
+    monkeypatch.delenv(LLM_CONCURRENCY_ENV, raising=False)
+    assert ConcurrencyLimiter.from_env() is None
+    monkeypatch.setenv(LLM_CONCURRENCY_ENV, '2')
+    monkeypatch.setenv(LLM_SLOT_DIR_ENV, str(tmp_path))
+    assert ConcurrencyLimiter.from_env().slots == 2
+
+def test_concurrency_limiter_caps_requests_in_flight(tmp_path, monkeypatch):
+    monkeypatch.setattr(rate_limit, 'POLL_INTERVAL', 0.01)
+    limiter = ConcurrencyLimiter(str(tmp_path), 2)
+    lock = threading.Lock()
+    in_flight = []
+    peak = []
+
+    def request():
+        with limiter.hold():
+            with lock:
+                in_flight.append(1)
+                peak.append(len(in_flight))
+            time.sleep(0.05)
+            with lock:
+                in_flight.pop()
+
+    threads = [threading.Thread(target=request) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(peak) == 6 and max(peak) <= 2
+    assert os.listdir(str(tmp_path))
@@ -0,0 +1,81 @@
+from bob.cli.config import DEFAULT_CONFIG
+from bob.cli.design import build_design_context
+from bob.core.retrieval import (
+    RetrievalIndex, objective_documents, select_covering, select_relevant, split_story_items,
+    story_documents, sync_project_index, tokenize
+)
+
+OBJECTIVES = [
+    {"title": "Login", "description": "Users sign in with a password"},
+    {"title": "Export", "description": "Export reports as CSV files"},
+]
+STORIES = (
+    "1. As a user, I want to sign in with my password.\n"
+    "2. As an admin, I want to reset a user's password.\n"
+    "3. As a user, I want to export a CSV report.\n"
+    "4. As a cat, I want to chase laser pointers."
+)
+
+def build_index(tmp_path):
+    index = RetrievalIndex(str(tmp_path / 'index.json'))
+    documents = objective_documents(OBJECTIVES)
+    documents.update(story_documents([STORIES]))
+    index.sync(documents)
+    return index
+
+def test_tokenize_drops_stopwords_and_case():
+    assert tokenize("As a User, I want THE export") == ["user", "export"]
+
+def test_split_story_items():
+    assert split_story_items(STORIES)[1] == "2. As an admin, I want to reset a user's password."
+    assert split_story_items("Just one story") == ["Just one story"]
+    assert split_story_items("  ") == []
+
+def test_search_ranks_matching_documents_first(tmp_path):
+    index = build_index(tmp_path)
+
+    assert index.search("CSV export", k=1, kind='story') == ["3. As a user, I want to export a CSV report."]
+    assert index.search("password", k=2, kind='objective') == ["Login: Users sign in with a password"]
+    assert index.search("nothing matches", k=3) == []
+
+def test_sync_is_incremental_and_persisted(tmp_path):
+    index = build_index(tmp_path)
+    index.save()
+
+    reloaded = RetrievalIndex(index.path)
+    assert reloaded.documents == index.documents
+    documents = objective_documents(OBJECTIVES[:1])
+    assert reloaded.sync(documents) == (0, len(index.documents) - 1)
+    assert reloaded.search("CSV") == []
+
+def test_sync_project_index_writes_index(project):
+    index = sync_project_index(OBJECTIVES, [STORIES])
+    assert (project / index.path).exists()
+    assert len(index.documents) == 6
+
+def test_select_relevant_returns_top_k_or_everything(tmp_path):
+    index = build_index(tmp_path)
+    items = split_story_items(STORIES)
+
+    assert select_relevant(index, "laser", items[:2], 'story', 2) == items[:2]
+    assert select_relevant(index, "laser", items, 'story', 1) == [items[3]]
+    # Nothing matches: the first k items rather than none
+    assert select_relevant(index, "quantum", items, 'story', 2) == items[:2]
+
+def test_select_covering_keeps_top_items_for_each_query_in_order(tmp_path):
+    index = build_index(tmp_path)
+    items = split_story_items(STORIES)
+
+    assert select_covering(index, ["export CSV", "sign in"], items, 'story', 1) == [items[0], items[2]]
+    assert select_covering(index, ["quantum"], items, 'story', 1) == items
+
+def test_design_context_keeps_objectives_and_relevant_stories(project):
+    config = dict(DEFAULT_CONFIG, retrieval_top_k=1)
+
+    context = build_design_context(OBJECTIVES, [{"stories": STORIES}], config, ai_provider=None)
+
+    assert "Login: Users sign in with a password" in context
+    assert "Export: Export reports as CSV files" in context
+    assert "sign in with my password" in context
+    assert "export a CSV report" in context
+    assert "laser" not in context
@@ -0,0 +1,64 @@
+"""Forwarding commands to a `bob serve` daemon"""
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+from bob.cli.client import is_forwarded_env
+from bob.cli.objectives import save_objectives
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+pytestmark = pytest.mark.skipif(not hasattr(os, 'fork'), reason="bob serve needs fork()")
+
+def bob(*args, **kwargs):
+    return subprocess.run(
+        [sys.executable, '-c', 'from bob.cli.client import main; main()', *args],
+        capture_output=True, text=True, timeout=60, **kwargs
+    )
+
+@pytest.fixture
+def daemon(tmp_path):
+    socket_path = str(tmp_path / 'run' / 'bob.sock')
+    env = dict(os.environ, BOB_SOCKET=socket_path, PYTHONPATH=ROOT)
+    env.pop('BOB_NO_DAEMON', None)
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'bob.cli.main', 'serve'], env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    deadline = time.monotonic() + 30
+    while not os.path.exists(socket_path):
+        assert process.poll() is None and time.monotonic() < deadline, "daemon did not start"
+        time.sleep(0.1)
+    yield env
+    bob('serve', '--stop', env=env)
+    process.wait(timeout=30)
+
+def test_forwarded_command_runs_in_callers_directory(project, daemon):
+    save_objectives({"objectives": [
+        {"id": 1, "title": "Greet users", "description": "Say hello", "priority": "high",
+         "added_at": "2024-01-01T00:00:00"},
+    ]})
+
+    result = bob('objectives', 'list', env=daemon, cwd=project)
+
+    assert result.returncode == 0, result.stderr
+    assert "Greet users" in result.stdout
+
+def test_forwarded_command_exit_code(project, daemon):
+    result = bob('objectives', 'import', 'missing.yaml', env=daemon, cwd=project)
+
+    assert result.returncode == 2
+    assert "does not exist" in result.stderr
+
+def test_daemon_socket_is_private(daemon):
+    assert os.stat(daemon['BOB_SOCKET']).st_mode & 0o777 == 0o700
+    assert os.stat(os.path.dirname(daemon['BOB_SOCKET'])).st_mode & 0o777 == 0o700
+
+def test_only_bob_settings_and_api_keys_are_forwarded():
+    assert is_forwarded_env('BOB_LLM_CONCURRENCY')
+    assert is_forwarded_env('OPENAI_API_KEY')
+    assert not is_forwarded_env('AWS_SECRET_ACCESS_KEY')
+    assert not is_forwarded_env('PATH')
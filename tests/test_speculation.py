@@ -0,0 +1,98 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from bob.core import speculation
+from bob.core.speculation import RUNNING, SpeculationStore, design_inputs, speculation_key
+
+from .conftest import StubProvider
+
+@pytest.fixture
+def store(project, monkeypatch):
+    """A store whose background processes just sleep instead of running `bob speculate`"""
+    started = []
+    processes = []
+    real_popen = subprocess.Popen
+
+    def popen(command, **kwargs):
+        started.append(command)
+        processes.append(real_popen([sys.executable, '-c', 'import time; time.sleep(60)']))
+        return processes[-1]
+
+    monkeypatch.setattr(speculation.subprocess, 'Popen', popen)
+    store = SpeculationStore()
+    store.started = started
+    yield store
+    for process in processes:
+        process.kill()
+        process.wait()
+
+def finish_with_output(store, key, text):
+    with open(store.output_path(key), 'w') as f:
+        f.write(text)
+    store.finish(key)
+
+def test_speculation_key_depends_on_kind_content_and_model():
+    provider = StubProvider()
+    key = speculation_key('design', "inputs", provider)
+
+    assert key == speculation_key('design', "inputs", provider)
+    assert key != speculation_key('docs', "inputs", provider)
+    assert key != speculation_key('design', "other inputs", provider)
+    other = StubProvider()
+    other.model_name = 'other-model'
+    assert key != speculation_key('design', "inputs", other)
+
+def test_design_inputs_ignore_unrelated_fields():
+    objectives = [{"title": "Login", "description": "Sign in", "added_at": "2024-01-01"}]
+
+    assert design_inputs(objectives, [], False, {}) == design_inputs(
+        [dict(objectives[0], added_at="2025-01-01")], [], False, {}
+    )
+    assert design_inputs(objectives, [], False, {}) != design_inputs(objectives, [], True, {})
+
+def test_start_runs_once_per_key(store):
+    assert store.start('k1', 'design', {"inputs": 1})
+    assert not store.start('k1', 'design', {"inputs": 1})
+
+    assert len(store.started) == 1 and store.started[0][-2:] == ['speculate', 'k1']
+    assert store.load_payload('k1') == {"inputs": 1, "kind": 'design'}
+
+def test_take_returns_finished_output_once(store):
+    store.start('k1', 'design', {})
+    assert store.take('k1', wait=False) is None
+
+    finish_with_output(store, 'k1', "design text")
+
+    path = store.take('k1')
+    assert open(path).read() == "design text"
+    assert store.take('k1') is None
+    assert store.load_payload('k1') is None
+
+def test_failed_speculation_is_not_used(store):
+    store.start('k1', 'design', {})
+    with open(store.output_path('k1'), 'w') as f:
+        f.write("partial")
+    store.finish('k1', error="request failed")
+
+    assert store.take('k1') is None
+    assert not os.path.exists(store.output_path('k1'))
+
+def test_cancel_except_keeps_current_keys(store):
+    store.start('old', 'design', {})
+    store.start('new', 'design', {})
+    store.start('docs', 'docs', {})
+
+    store.cancel_except(['design'], keep={'new'})
+
+    with open(store.manifest_path) as f:
+        manifest = json.load(f)
+    assert sorted(manifest) == ['docs', 'new']
+    assert manifest['new']['status'] == RUNNING
+    assert not os.path.exists(store.payload_path('old'))
+    finish_with_output(store, 'new', "text")
+    store.cancel('new')
+    assert store.take('new') is None
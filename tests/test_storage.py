@@ -0,0 +1,105 @@
+import os
+import threading
+import time
+
+import pytest
+import yaml
+
+from bob.core.storage import (
+    atomic_write, atomic_writer, cached_load, clear_load_cache, file_lock, locked_update, try_file_lock
+)
+
+def test_file_lock_is_reentrant_in_one_thread(project):
+    with file_lock('data.yaml'):
+        with file_lock('data.yaml'):
+            atomic_write('data.yaml', 'inner')
+        atomic_write('data.yaml', 'outer')
+    assert open('data.yaml').read() == 'outer'
+
+def test_file_lock_excludes_other_threads(project):
+    events = []
+
+    def other():
+        with file_lock('data.yaml'):
+            events.append('other')
+
+    with file_lock('data.yaml'):
+        thread = threading.Thread(target=other)
+        thread.start()
+        time.sleep(0.2)
+        events.append('holder')
+    thread.join()
+    assert events == ['holder', 'other']
+
+def test_try_file_lock_does_not_wait(project):
+    results = []
+    with file_lock('data.yaml'):
+        def other():
+            with try_file_lock('data.yaml') as acquired:
+                results.append(acquired)
+        thread = threading.Thread(target=other)
+        thread.start()
+        thread.join()
+    with try_file_lock('data.yaml') as acquired:
+        results.append(acquired)
+    assert results == [False, True]
+
+def test_atomic_writer_leaves_file_untouched_on_error(project):
+    atomic_write('data.yaml', 'original')
+    os.chmod('data.yaml', 0o640)
+
+    with pytest.raises(RuntimeError):
+        with atomic_writer('data.yaml') as f:
+            f.write('partial')
+            raise RuntimeError("interrupted")
+
+    assert open('data.yaml').read() == 'original'
+    assert os.listdir('.') == ['data.yaml']
+
+    atomic_write('data.yaml', 'replaced')
+    assert open('data.yaml').read() == 'replaced'
+    assert os.stat('data.yaml').st_mode & 0o777 == 0o640
+
+def test_locked_update_rereads_under_the_lock(project):
+    atomic_write('data.yaml', yaml.dump({"items": [1]}))
+
+    def load():
+        with open('data.yaml') as f:
+            return yaml.safe_load(f)
+
+    def save(data):
+        # save functions take the lock themselves; it must be re-entrant
+        with file_lock('data.yaml'):
+            atomic_write('data.yaml', yaml.dump(data))
+
+    threads = [
+        threading.Thread(target=locked_update, args=('data.yaml', load, save, lambda data, n=n: data['items'].append(n)))
+        for n in range(2, 12)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(load()['items']) == list(range(1, 12))
+
+def test_cached_load_reparses_only_changed_files(project):
+    calls = []
+
+    def parse(f):
+        calls.append(1)
+        return yaml.safe_load(f)
+
+    clear_load_cache()
+    atomic_write('data.yaml', yaml.dump({"items": [1]}))
+    first = cached_load('data.yaml', parse)
+    first['items'].append(2)
+    assert cached_load('data.yaml', parse) == {"items": [1]}
+    assert len(calls) == 1
+
+    atomic_write('data.yaml', yaml.dump({"items": [3]}))
+    assert cached_load('data.yaml', parse) == {"items": [3]}
+    assert len(calls) == 2
+
+    clear_load_cache()
+    cached_load('data.yaml', parse)
+    assert len(calls) == 3
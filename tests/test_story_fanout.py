@@ -0,0 +1,63 @@
+from bob.core.story_fanout import (
+    cluster_objectives, generate_cluster_stories, latest_objective_stories, merge_stories,
+    objective_fingerprint, reuse_objective_stories, split_by_objective
+)
+
+from .conftest import StubProvider
+
+OBJECTIVES = [
+    {"id": "O1", "title": "Login", "description": "Users sign in"},
+    {"id": "O2", "title": "Export", "description": "Export CSV reports"},
+    {"id": "O3", "title": "Search", "description": "Search reports"},
+]
+
+def test_split_by_objective_follows_tags():
+    response = (
+        "1. [O2] As an admin, I want to export reports.\n"
+        "2. As a user, I want the export to be CSV.\n"
+        "3. [o1] As a user, I want to sign in.\n"
+        "4. [O9] As a user, I want something unrelated."
+    )
+
+    assert split_by_objective(response, OBJECTIVES[:2]) == {
+        "O1": ["As a user, I want to sign in.", "[O9] As a user, I want something unrelated."],
+        "O2": ["As an admin, I want to export reports.", "As a user, I want the export to be CSV."],
+    }
+
+def test_unchanged_objectives_reuse_their_stories():
+    previous = {
+        "O1": {"fingerprint": objective_fingerprint(OBJECTIVES[0]), "stories": ["As a user, I sign in."]},
+        "O2": {"fingerprint": "outdated", "stories": ["As a user, I export."]},
+    }
+
+    results, stale = reuse_objective_stories(OBJECTIVES, previous)
+
+    assert results == {"O1": previous["O1"]}
+    assert stale == OBJECTIVES[1:]
+
+def test_latest_objective_stories():
+    groups = [{"objective_stories": {"O1": {}}}, {"stories": "plain"}, {"objective_stories": {"O2": {}}}, {}]
+
+    assert latest_objective_stories(groups) == {"O2": {}}
+    assert latest_objective_stories([{"stories": "plain"}]) == {}
+
+def test_clusters_generate_and_merge_in_objective_order():
+    def reply(prompt):
+        return "\n".join(
+            f"{n}. [{obj['id']}] As a user, I want {obj['title'].lower()}."
+            for n, obj in enumerate(OBJECTIVES, 1) if f"[{obj['id']}] {obj['title']}:" in prompt and obj['id'] != "O3"
+        )
+    provider = StubProvider(reply=reply)
+    clusters = cluster_objectives(OBJECTIVES, 2)
+    done = []
+
+    results = generate_cluster_stories(provider, clusters, on_cluster=done.append)
+
+    assert [len(cluster) for cluster in clusters] == [2, 1]
+    assert len(provider.prompts) == 2 and len(done) == 2
+    # O3 got no stories, so it is left out and regenerated next time
+    assert sorted(results) == ["O1", "O2"]
+    assert results["O1"]["fingerprint"] == objective_fingerprint(OBJECTIVES[0])
+    assert merge_stories(OBJECTIVES, results) == (
+        "1. [O1] As a user, I want login.\n2. [O2] As a user, I want export."
+    )
@@ -0,0 +1,58 @@
+import os
+
+import pytest
+
+from bob.core.streaming import StreamAborted, StreamingFileWriter
+
+def test_fenced_code_is_written_without_prose(project):
+    writer = StreamingFileWriter('out/test_app.py', language='python')
+    chunks = ["Here are the tests:\n```py", "thon\nimport os\n\ndef test_a():\n    assert os\n", "```\nHope this helps!"]
+
+    assert writer.consume(iter(chunks)), writer.error
+
+    assert open('out/test_app.py').read() == "import os\n\ndef test_a():\n    assert os\n"
+    assert os.listdir('out') == ['test_app.py']
+
+def test_bare_code_is_accepted(project):
+    writer = StreamingFileWriter('test_app.py', language='python')
+
+    assert writer.consume(["def test_a():\n", "    assert True\n"])
+    assert open('test_app.py').read() == "def test_a():\n    assert True\n"
+
+def test_prose_is_rejected_early(project):
+    writer = StreamingFileWriter('test_app.py', language='python', max_prose_chars=20)
+    fed = []
+
+    def chunks():
+        for line in ["I cannot write these tests.\n", "Sorry about that.\n", "More prose.\n"]:
+            fed.append(line)
+            yield line
+
+    assert not writer.consume(chunks())
+    assert writer.error == "response is prose, not code"
+    assert len(fed) == 1
+    assert os.listdir('.') == []
+
+def test_syntax_error_keeps_existing_file(project):
+    with open('test_app.py', 'w') as f:
+        f.write("original\n")
+    writer = StreamingFileWriter('test_app.py', language='python')
+
+    assert not writer.consume(["def test_a(:\n", "    pass\n"])
+    assert writer.error.startswith("syntax error on line 1")
+    assert open('test_app.py').read() == "original\n"
+    assert os.listdir('.') == ['test_app.py']
+
+def test_repair_replaces_broken_code(project):
+    writer = StreamingFileWriter('test_app.py', language='python', repair=lambda code: "def test_a():\n    pass\n")
+
+    assert writer.consume(["def test_a(:\n", "    pass\n"])
+    assert open('test_app.py').read() == "def test_a():\n    pass\n"
+
+def test_plain_text_is_written_as_is(project):
+    writer = StreamingFileWriter('notes.md')
+
+    assert writer.consume(["# Notes\n", "Some text"])
+    assert open('notes.md').read() == "# Notes\nSome text"
+    with pytest.raises(StreamAborted):
+        StreamingFileWriter('empty.md').finish()
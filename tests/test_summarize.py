@@ -0,0 +1,70 @@
+from bob.core.summarize import (
+    CHARS_PER_TOKEN, SummaryCache, chunk_texts, estimate_tokens, map_reduce_summarize, split_text
+)
+
+from .conftest import StubProvider
+
+def test_split_text_keeps_small_texts_whole():
+    assert split_text("short", 10) == ["short"]
+
+def test_split_text_splits_at_lines_and_inside_long_lines():
+    text = "a" * 30 + "\n" + "b" * 100 + "\n"
+    pieces = split_text(text, 10)
+
+    assert "".join(pieces) == text
+    assert all(len(piece) <= 9 * CHARS_PER_TOKEN for piece in pieces)
+    assert pieces[0] == "a" * 30 + "\n"
+
+def test_chunk_texts_keeps_order_and_budget():
+    texts = ["x" * 36 for _ in range(5)]
+    chunks = chunk_texts(texts, 20)
+
+    assert [text for chunk in chunks for text in chunk] == texts
+    assert all(sum(estimate_tokens(text) for text in chunk) <= 20 for chunk in chunks)
+    assert len(chunks) == 3
+
+def test_texts_within_budget_are_not_summarized(project):
+    provider = StubProvider(reply="summary")
+
+    assert map_reduce_summarize(provider, ["one", "two"], 100, "Summarize.") == ["one", "two"]
+    assert provider.prompts == []
+
+def test_force_summarizes_once_even_within_budget(project):
+    provider = StubProvider(reply="summary")
+
+    assert map_reduce_summarize(provider, ["one", "two"], 100, "Summarize.", force=True) == ["summary"]
+    assert len(provider.prompts) == 1
+
+def test_large_texts_are_summarized_in_chunks_and_cached(project):
+    provider = StubProvider(reply="short summary")
+    texts = ["story " * 200 for _ in range(6)]
+    levels = []
+
+    result = map_reduce_summarize(provider, texts, 400, "Summarize.", chunk_tokens=400,
+                                  on_level=lambda depth, chunks: levels.append((depth, chunks)))
+
+    # One level is enough: the six chunk summaries fit in the budget
+    assert result == ["short summary"] * 6
+    assert levels == [(1, 6)]
+    calls = len(provider.prompts)
+    # A second run is answered from the cache file
+    assert map_reduce_summarize(provider, texts, 400, "Summarize.", chunk_tokens=400) == result
+    assert len(provider.prompts) == calls
+
+def test_failed_summaries_keep_the_start_of_the_chunk(project):
+    provider = StubProvider(reply="")
+
+    result = map_reduce_summarize(provider, ["word " * 400], 120, "Summarize.", chunk_tokens=1000)
+
+    assert len("".join(result)) <= 120 * CHARS_PER_TOKEN
+    assert result[0].startswith("word word")
+
+def test_summary_cache_merges_with_file(project):
+    first = SummaryCache()
+    second = SummaryCache()
+    first.put('a', "summary a")
+    second.put('b', "summary b")
+    first.save()
+    second.save()
+
+    assert SummaryCache().entries == {'a': "summary a", 'b': "summary b"}
@@ -0,0 +1,36 @@
+import threading
+import time
+
+from bob.core.watch import file_signature, watch_files
+
+def test_file_signature_changes_with_the_file(tmp_path):
+    path = tmp_path / 'design.yaml'
+    assert file_signature(str(path)) is None
+    path.write_text('one')
+    first = file_signature(str(path))
+    path.write_text('two!')
+    assert file_signature(str(path)) != first
+
+def test_burst_of_changes_is_reported_once(tmp_path):
+    watched, other = str(tmp_path / 'design.yaml'), str(tmp_path / 'config.json')
+    stop = threading.Event()
+    changes = []
+
+    def watch():
+        for changed in watch_files([watched, other], interval=0.02, debounce=0.3, stop=stop):
+            changes.append(changed)
+
+    thread = threading.Thread(target=watch)
+    thread.start()
+    try:
+        for n in range(3):
+            with open(watched, 'w') as f:
+                f.write('x' * (n + 1))
+            time.sleep(0.05)
+        deadline = time.monotonic() + 5
+        while not changes and time.monotonic() < deadline:
+            time.sleep(0.05)
+    finally:
+        stop.set()
+        thread.join()
+    assert changes == [{watched}]
@@ -0,0 +1,72 @@
+import os
+
+import pytest
+
+from bob.core import jobs
+from bob.core.workspace import (
+    DONE, FAILED, SKIPPED, WORKSPACE_DIR, WorkspaceRunner, build_report, discover_projects, load_report,
+    log_file_name, order_stages
+)
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def make_project(path):
+    os.makedirs(path, exist_ok=True)
+    with open(os.path.join(path, 'bob_config.json'), 'w') as f:
+        f.write('{}')
+    return str(path)
+
+def test_discover_projects_skips_hidden_and_vendored_dirs(tmp_path):
+    expected = [make_project(tmp_path), make_project(tmp_path / 'a'), make_project(tmp_path / 'b' / 'c')]
+    make_project(tmp_path / '.git' / 'x')
+    make_project(tmp_path / 'node_modules' / 'y')
+    make_project(tmp_path / WORKSPACE_DIR / 'z')
+
+    assert discover_projects(str(tmp_path)) == expected
+    assert discover_projects(str(tmp_path), max_depth=1) == expected[:2]
+
+def test_order_stages():
+    assert order_stages(['docs', 'design', 'docs']) == ['design', 'docs']
+    with pytest.raises(ValueError):
+        order_stages(['deploy'])
+
+def test_log_file_name():
+    assert log_file_name('team/app one') == 'team__app__one'
+    assert log_file_name('.') == '.'
+
+def test_build_report_counts_and_stage_totals():
+    results = [
+        {"status": DONE, "seconds": 2.0, "stages": [{"stage": 'design', "status": DONE, "seconds": 2.0}]},
+        {"status": FAILED, "seconds": 2.0, "stages": [{"stage": 'design', "status": FAILED, "seconds": 1.0},
+                                                      {"stage": 'docs', "status": SKIPPED, "seconds": 0.0}]},
+    ]
+
+    report = build_report(results, ['design', 'docs'], '2024-01-01T00:00:00', 2.0)
+
+    assert report['counts'] == {DONE: 1, FAILED: 1}
+    assert report['speedup'] == 2.0
+    assert report['stage_totals']['design'] == {"runs": 2, "total_seconds": 3.0, "max_seconds": 2.0}
+    assert report['stage_totals']['docs']['runs'] == 0
+
+def test_runner_runs_stages_and_skips_after_a_failure(tmp_path, monkeypatch):
+    # Stages that need no AI provider: the first succeeds and the second fails
+    monkeypatch.setitem(jobs.JOB_COMMANDS, 'user-stories', ['objectives', 'list'])
+    monkeypatch.setitem(jobs.JOB_COMMANDS, 'design', ['objectives', 'import', 'missing.yaml'])
+    monkeypatch.setenv('PYTHONPATH', ROOT)
+    projects = [make_project(tmp_path / 'one'), make_project(tmp_path / 'two')]
+    seen = []
+
+    runner = WorkspaceRunner(str(tmp_path), ['docs', 'design', 'user-stories'], workers=2,
+                             llm_concurrency=2, on_result=seen.append)
+    report = runner.run(projects)
+
+    assert runner.stages == ['user-stories', 'design', 'docs']
+    assert len(seen) == 2 and report['counts'] == {FAILED: 2}
+    for result in report['projects']:
+        assert [(stage['status'], stage['exit_code']) for stage in result['stages']] == [
+            (DONE, 0), (FAILED, 2), (SKIPPED, None)
+        ]
+        with open(result['log']) as f:
+            assert "does not exist" in f.read()
+    assert load_report(str(tmp_path)) == report
+    assert load_report(str(tmp_path / 'one')) is None